@@ -0,0 +1,165 @@
+"""数组后端基准测试
+
+对多步操作链比较三种调用方式：
+  PIL      逐步传入 PIL 图像，每一步在 PIL 与 NumPy 之间转换两次
+  数组     逐步传入 ndarray，每一步分配一个新的结果数组
+  数组+out 预先分配输出缓冲区，每一步原地写入（灰度化的一步写入二维缓冲区）
+报告耗时、PIL 与 NumPy 之间的转换次数和 NumPy 内存分配峰值（tracemalloc
+只能看到 NumPy 的分配，Pillow 内部的图像缓冲区不在统计内），并校验三种
+方式结果一致。最后逐字节校验 CLAHE 与 cv2.createCLAHE 的结果，尺寸包括
+不能被分块数整除的和比分块数还小的图像。
+
+用法：python benchmarks/bench_array_backend.py [--size 2048] [--mode RGB]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.processors.arrays import ArrayProcessor
+from src.processors.registry import parse_chain
+
+CHAINS = [
+    "adjust_brightness factor=1.2 | mean_filter radius=2 | median_filter radius=2",
+    "adjust_brightness factor=1.2 | mean_filter radius=2 | median_filter radius=2 | threshold_segment threshold=128",
+    "median_filter radius=1 | adjust_contrast factor=1.5 | canny_edge",
+    "translate tx=5 ty=5 | mirror | mean_filter radius=3 | equalize | threshold_segment threshold=100"
+]
+
+# CLAHE 校验的 (高, 宽) 与 (限幅, 分块数)
+CLAHE_SIZES = [(64, 64), (100, 100), (200, 300), (16, 16), (257, 513), (1001, 999), (7, 5)]
+CLAHE_PARAMS = [(2.0, 8), (1.0, 4), (10.0, 8), (2.0, 3)]
+
+
+class ConversionCounter:
+    """统计 Image.fromarray 和 np.asarray(PIL 图像) 的调用次数"""
+
+    def __init__(self):
+        self.count = 0
+        self._fromarray = Image.fromarray
+        self._interface = Image.Image.__array_interface__
+
+    def __enter__(self):
+        counter = self
+
+        def fromarray(*args, **kwargs):
+            counter.count += 1
+            return counter._fromarray(*args, **kwargs)
+
+        def interface(image):
+            counter.count += 1
+            return counter._interface.fget(image)
+
+        Image.fromarray = fromarray
+        Image.Image.__array_interface__ = property(interface)
+        return self
+
+    def __exit__(self, *exc):
+        Image.fromarray = self._fromarray
+        Image.Image.__array_interface__ = self._interface
+
+
+def run_steps(image, chain):
+    for op, params in chain:
+        image = op.func(image, **params)
+    return image
+
+
+def make_inplace(array, chain):
+    """按各步输出形状预先分配缓冲区，返回执行函数"""
+    shapes, current = [], array
+    for op, params in chain:
+        current = op.func(current, **params)
+        shapes.append(current.shape)
+    buffers = {shape: np.empty(shape, dtype=np.uint8) for shape in set(shapes)}
+
+    def run():
+        current = array
+        for (op, params), shape in zip(chain, shapes):
+            # 形状不变时原地计算，否则写入对应形状的缓冲区
+            out = current if current.shape == shape and current is not array else buffers[shape]
+            current = op.func(current, **params, out=out)
+        return current
+    return run
+
+
+def measure(func, repeat):
+    """返回 (最短耗时, 转换次数, NumPy 分配峰值字节数, 结果)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    with ConversionCounter() as counter:
+        tracemalloc.start()
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return best, counter.count, peak, result
+
+
+def check_clahe(gray):
+    """在 gray 的左上角各尺寸区域上比较 CLAHE 与 OpenCV，返回不一致的组合数"""
+    mismatches = 0
+    for height, width in CLAHE_SIZES + [gray.shape]:
+        region = np.ascontiguousarray(gray[:height, :width])
+        for clip_limit, grid in CLAHE_PARAMS:
+            reference = cv2.createCLAHE(clip_limit, (grid, grid)).apply(region)
+            result = ArrayProcessor.clahe(region, clip_limit, grid)
+            if not np.array_equal(result, reference):
+                mismatches += 1
+                difference = np.abs(result.astype(int) - reference).max()
+                print(f"  {width}x{height} clip_limit={clip_limit} grid={grid}："
+                      f"最大相差 {difference} 级")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="数组后端基准测试")
+    parser.add_argument('--size', type=int, default=2048)
+    parser.add_argument('--mode', default='RGB', choices=['L', 'RGB', 'RGBA'])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (args.size, args.size, 4), dtype=np.uint8)
+    image = Image.fromarray(pixels).convert(args.mode)
+    array = np.array(image)
+    mb = 1024 * 1024
+
+    print(f"图像：{args.size}x{args.size} {args.mode}")
+    print(f"{'方式':<10} {'耗时(ms)':>10} {'转换次数':>8} {'NumPy峰值(MB)':>14}")
+    mismatches = 0
+    for text in CHAINS:
+        chain = parse_chain(text)
+        print(f"\n{text}")
+        results = {}
+        for name, func in [('PIL', lambda: run_steps(image, chain)),
+                           ('数组', lambda: run_steps(array, chain)),
+                           ('数组+out', make_inplace(array, chain))]:
+            elapsed, conversions, peak, result = measure(func, args.repeat)
+            results[name] = np.asarray(result)
+            print(f"{name:<10} {elapsed * 1000:>10.1f} {conversions:>8} {peak / mb:>14.1f}")
+        reference = results.pop('PIL')
+        for name, result in results.items():
+            if not np.array_equal(result, reference):
+                mismatches += 1
+                print(f"  {name} 的结果与 PIL 接口不一致")
+
+    print(f"\nCLAHE 与 cv2.createCLAHE（{len(CLAHE_SIZES) + 1} 种尺寸 x {len(CLAHE_PARAMS)} 组参数）")
+    clahe_mismatches = check_clahe(np.asarray(image.convert('L')))
+    print("  一致" if not clahe_mismatches else f"  {clahe_mismatches} 组不一致")
+    return 1 if mismatches or clahe_mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
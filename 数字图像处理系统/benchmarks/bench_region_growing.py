@@ -0,0 +1,120 @@
+"""区域生长基准测试
+
+对比旧版逐像素堆栈实现与 RegionGrower 泛洪填充实现的耗时，
+并逐字节校验两者输出一致；再测量 RegionIndex 的构建耗时，以及拖动
+阈值滑动条（0-255 各查询一次）时读取索引与逐次泛洪填充的耗时，
+并校验每个阈值的结果一致。
+
+用法：python benchmarks/bench_region_growing.py [--sizes 256 512 1024] [--threshold 30]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.processors.region_growing import RegionGrower, RegionIndex
+
+
+def legacy_region_growing(img_np, seed_point, threshold):
+    """旧版实现（仅用于对比）"""
+    rows, cols = img_np.shape
+    segmented = np.zeros_like(img_np)
+    segmented[seed_point] = 255
+    seed_value = img_np[seed_point]
+
+    def get_neighbors(point):
+        r, c = point
+        neighbors = []
+        for dr in [-1, 0, 1]:
+            for dc in [-1, 0, 1]:
+                if dr == 0 and dc == 0:
+                    continue
+                new_r, new_c = r + dr, c + dc
+                if 0 <= new_r < rows and 0 <= new_c < cols:
+                    neighbors.append((new_r, new_c))
+        return neighbors
+
+    stack = [seed_point]
+    while stack:
+        current = stack.pop()
+        for neighbor in get_neighbors(current):
+            if segmented[neighbor] == 0 and \
+               abs(int(img_np[neighbor]) - int(seed_value)) < threshold:
+                segmented[neighbor] = 255
+                stack.append(neighbor)
+    return segmented
+
+
+def make_image(size, rng):
+    """生成带噪声的平滑渐变图像，使区域生长能覆盖大片区域"""
+    y, x = np.mgrid[0:size, 0:size].astype(np.float32) / size
+    base = 128 + 60 * np.sin(3 * x) * np.cos(2 * y)
+    noise = rng.normal(0, 6, (size, size))
+    return np.clip(base + noise, 0, 255).astype(np.uint8)
+
+
+def timed(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="区域生长基准测试")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[128, 256, 512, 1024])
+    parser.add_argument('--threshold', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--legacy-max', type=int, default=512,
+                        help="超过该边长时跳过旧版实现")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'尺寸':>10} {'区域占比':>8} {'旧版(s)':>10} {'新版(s)':>10} {'加速比':>8} 一致")
+    for size in args.sizes:
+        img = make_image(size, rng)
+        seed = (size // 2, size // 2)
+        new_time, new_result = timed(
+            lambda: RegionGrower.grow(img, seed, args.threshold), args.repeat)
+        coverage = np.count_nonzero(new_result) / new_result.size
+
+        if size <= args.legacy_max:
+            old_time, old_result = timed(
+                lambda: legacy_region_growing(img, seed, args.threshold), 1)
+            same = old_result.tobytes() == new_result.tobytes()
+            print(f"{size:>5}x{size:<4} {coverage:>8.1%} {old_time:>10.3f} "
+                  f"{new_time:>10.4f} {old_time / new_time:>7.0f}x {'是' if same else '否'}")
+            if not same:
+                sys.exit(1)
+        else:
+            print(f"{size:>5}x{size:<4} {coverage:>8.1%} {'-':>10} {new_time:>10.4f} {'-':>8} -")
+
+    print(f"\n{'尺寸':>10} {'构建(s)':>8} {'泛洪/次(ms)':>12} {'索引/次(ms)':>12} {'加速比':>8} 一致")
+    thresholds = range(256)
+    for size in args.sizes:
+        img = make_image(size, rng)
+        seed = (size // 2, size // 2)
+        build_time, index = timed(lambda: RegionIndex.build(img, seed), args.repeat)
+        flood_time, flood = timed(
+            lambda: [RegionGrower.grow(img, seed, t) for t in thresholds], 1)
+        query_time, queried = timed(
+            lambda: [index.query(t) for t in thresholds], args.repeat)
+        same = all(a.tobytes() == b.tobytes() for a, b in zip(flood, queried))
+        flood_ms = flood_time * 1000 / len(thresholds)
+        query_ms = query_time * 1000 / len(thresholds)
+        print(f"{size:>5}x{size:<4} {build_time:>8.3f} {flood_ms:>12.3f} {query_ms:>12.3f} "
+              f"{flood_ms / query_ms:>7.0f}x {'是' if same else '否'}")
+        if not same:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,125 @@
+"""平滑滤波耗时与半径的关系
+
+对半径 1-20（界面滑动条范围）分别测量均值、高斯和中值滤波的耗时，画出
+文本曲线；中值滤波同时与 Pillow 的 MedianFilter 参考实现比较耗时并逐字节
+校验结果（参考实现耗时随半径平方增长，只测到 --reference-radius）。最后对
+L/RGB/RGBA 三种模式、整数和 --fractional-radii 给出的非整数半径，逐字节校验
+均值滤波（图像和数组输入）与 ImageFilter.BoxBlur 的结果。
+
+用法：python benchmarks/bench_smoothing.py [--size 1024] [--mode RGB] [--csv out.csv]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.processors import SmoothProcessor
+from src.processors.arrays import ArrayProcessor
+
+FILTERS = {
+    'mean': SmoothProcessor.mean_filter,
+    'gaussian': SmoothProcessor.gaussian_filter,
+    'median': SmoothProcessor.median_filter
+}
+
+
+def best_time(func, repeat):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def plot(rows, names, width=50):
+    """每个滤波器一段横向条形图，按该滤波器的最大耗时归一化"""
+    for name in names:
+        values = [row[name] for row in rows if row.get(name) is not None]
+        if not values:
+            continue
+        longest = max(values)
+        print(f"\n{name} (ms)")
+        for row in rows:
+            value = row.get(name)
+            if value is None:
+                continue
+            bar = '#' * max(1, int(value / longest * width))
+            print(f"  r={row['radius']:>2} {value:>9.1f} {bar}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="平滑滤波耗时与半径的关系")
+    parser.add_argument('--size', type=int, default=1024)
+    parser.add_argument('--mode', default='RGB', choices=['L', 'RGB', 'RGBA'])
+    parser.add_argument('--radii', nargs='+', type=int, default=[1, 2, 3, 5, 8, 12, 16, 20])
+    parser.add_argument('--reference-radius', type=int, default=5,
+                        help="Pillow MedianFilter 参考实现测到的最大半径")
+    parser.add_argument('--fractional-radii', nargs='+', type=float, default=[0.5, 1.5, 2.7],
+                        help="均值滤波与 BoxBlur 校验的非整数半径")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--csv', help="把结果写入 CSV 文件，便于用其他工具作图")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (args.size, args.size, 4), dtype=np.uint8)
+    image = Image.fromarray(pixels).convert(args.mode)
+
+    names = list(FILTERS) + ['median_pil']
+    rows = []
+    mismatches = 0
+    print(f"图像：{args.size}x{args.size} {args.mode}")
+    print(f"{'半径':>4} " + ' '.join(f"{name:>12}" for name in names) + "   中值结果")
+    for radius in args.radii:
+        row = {'radius': radius}
+        for name, func in FILTERS.items():
+            elapsed, result = best_time(lambda: func(image, radius), args.repeat)
+            row[name] = elapsed * 1000
+            if name == 'median':
+                median = result
+        check = ''
+        if radius <= args.reference_radius:
+            reference_filter = ImageFilter.MedianFilter(2 * radius + 1)
+            elapsed, reference = best_time(lambda: image.filter(reference_filter), 1)
+            row['median_pil'] = elapsed * 1000
+            same = median.tobytes() == reference.tobytes()
+            mismatches += not same
+            check = '一致' if same else '不一致'
+        rows.append(row)
+        print(f"{radius:>4} " + ' '.join(f"{row[name]:>12.1f}" if name in row else f"{'-':>12}"
+                                        for name in names) + f"   {check}")
+
+    plot(rows, names)
+
+    mean_radii = [r for r in args.radii if r <= args.reference_radius] + args.fractional_radii
+    print(f"\n均值滤波与 BoxBlur 校验（半径 {', '.join(f'{r:g}' for r in mean_radii)}）")
+    for mode in ('L', 'RGB', 'RGBA'):
+        source = Image.fromarray(pixels).convert(mode)
+        array = np.asarray(source)
+        bad = []
+        for radius in mean_radii:
+            reference = source.filter(ImageFilter.BoxBlur(radius)).tobytes()
+            if (SmoothProcessor.mean_filter(source, radius).tobytes() != reference
+                    or ArrayProcessor.mean_filter(array, radius).tobytes() != reference):
+                bad.append(f"{radius:g}")
+        mismatches += len(bad)
+        print(f"  {mode:<4} {'一致' if not bad else '不一致：半径 ' + ', '.join(bad)}")
+
+    if args.csv:
+        with open(args.csv, 'w', encoding='utf-8') as f:
+            f.write(','.join(['radius'] + names) + '\n')
+            for row in rows:
+                f.write(','.join([str(row['radius'])] +
+                                 [f"{row[name]:.3f}" if name in row else '' for name in names]) + '\n')
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
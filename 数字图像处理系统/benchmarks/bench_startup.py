@@ -0,0 +1,92 @@
+"""启动导入耗时检查
+
+用 python -X importtime 在新进程中分别导入：
+  main                 显示欢迎窗口之前需要导入的模块
+  src.gui.main_window  界面与处理器（在欢迎窗口显示期间后台导入）
+取多次运行中的最短累计耗时与预算比较，列出自身耗时最长的模块，并检查
+不应在该阶段导入的模块（如欢迎窗口之前的 NumPy，界面导入时的 OpenCV）。
+超出预算或导入了不应导入的模块时返回 1，可用于回归检查。
+
+用法：python benchmarks/bench_startup.py [--repeat 5] [--scale 1.5] [-o startup.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 模块 -> (说明, 预算毫秒数, 不应导入的模块)
+TARGETS = {
+    'main': ("欢迎窗口之前", 120, ('numpy', 'cv2', 'PIL')),
+    'src.gui.main_window': ("界面与处理器", 500, ('cv2',))
+}
+
+
+def import_profile(module):
+    """在新进程中导入 module，返回 [(自身耗时us, 累计耗时us, 嵌套层级, 模块名), ...]"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=project_root, capture_output=True, text=True, check=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return entries
+
+
+def measure(module, repeat):
+    """返回耗时最短一次的 (累计毫秒数, 导入明细)"""
+    best = None
+    for _ in range(repeat):
+        entries = import_profile(module)
+        total = next(cumulative for _, cumulative, depth, name in entries
+                     if depth == 0 and name == module)
+        if best is None or total < best[0]:
+            best = (total, entries)
+    return best[0] / 1000, best[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动导入耗时检查")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help="预算倍数，在较慢的机器上放宽预算")
+    parser.add_argument('--top', type=int, default=8, help="列出自身耗时最长的模块数")
+    parser.add_argument('-o', '--output', help="结果 JSON 文件")
+    args = parser.parse_args()
+
+    failures = 0
+    report = {}
+    for module, (title, budget, forbidden) in TARGETS.items():
+        budget *= args.scale
+        total, entries = measure(module, args.repeat)
+        imported = {name for _, _, _, name in entries}
+        unexpected = [name for name in forbidden if name in imported]
+        ok = total <= budget and not unexpected
+        failures += not ok
+
+        print(f"\n{title}（import {module}）：{total:.1f} ms / 预算 {budget:.0f} ms"
+              f"{'' if ok else '  超出'}")
+        for self_us, cumulative_us, _, name in sorted(entries, reverse=True)[:args.top]:
+            print(f"  {self_us / 1000:>8.1f} ms  {name}")
+        if unexpected:
+            print(f"  不应导入：{', '.join(unexpected)}")
+        report[module] = {
+            'total_ms': total,
+            'budget_ms': budget,
+            'unexpected': unexpected,
+            'modules': {name: self_us / 1000 for self_us, _, _, name in entries}
+        }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
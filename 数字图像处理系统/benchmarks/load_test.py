@@ -0,0 +1,153 @@
+"""处理服务压力测试
+
+多个客户端线程并发向处理服务上传图像，参数在 --distinct 组取值中轮换
+（组数越少缓存命中越多）。报告吞吐量、延迟分位数、各状态码次数与缓存
+命中次数，并校验每个结果都能解码。不指定 --url 时在本进程内启动一个服务。
+队列已满时服务返回 503，--retry 让客户端按 Retry-After 等待后重试。
+
+用法：python benchmarks/load_test.py [--clients 16] [--requests 20] [-j 4] [--queue 4]
+"""
+import argparse
+import http.client
+import io
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit, quote
+
+import numpy as np
+from PIL import Image
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.server import ProcessingService, ProcessingServer
+
+CHAIN = "gaussian_filter radius={radius} | canny_edge"
+
+
+def synthetic_png(size, seed=0):
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:size, 0:size]
+    base = (x + y) * (255 / (2 * size - 2 or 1))
+    pixels = np.stack([base, base[::-1], base[:, ::-1]], axis=-1) + rng.normal(0, 12, (size, size, 3))
+    buffer = io.BytesIO()
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class Client:
+    def __init__(self, url, body, retry):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port
+        self.body = body
+        self.retry = retry
+        self.connection = http.client.HTTPConnection(self.host, self.port, timeout=300)
+
+    def request(self, chain):
+        """返回 (状态码, 耗时, 是否命中缓存, 结果是否可解码)"""
+        start = time.perf_counter()
+        while True:
+            self.connection.request('POST', f"/process?chain={quote(chain)}", self.body,
+                                    {'Content-Type': 'application/octet-stream'})
+            response = self.connection.getresponse()
+            data = response.read()
+            if response.status == 503 and self.retry:
+                time.sleep(float(response.getheader('Retry-After', '1')))
+                continue
+            break
+        elapsed = time.perf_counter() - start
+        valid = False
+        if response.status == 200:
+            try:
+                Image.open(io.BytesIO(data)).load()
+                valid = True
+            except OSError:
+                pass
+        return response.status, elapsed, response.getheader('X-Cache') == 'hit', valid
+
+    def get_json(self, path):
+        self.connection.request('GET', path)
+        return json.loads(self.connection.getresponse().read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="处理服务压力测试")
+    parser.add_argument('--url', help="已启动的服务地址，如 http://127.0.0.1:8765")
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=20, help="每个客户端的请求数")
+    parser.add_argument('--distinct', type=int, default=8, help="参数取值组数")
+    parser.add_argument('--size', type=int, default=1024, help="上传图像边长")
+    parser.add_argument('--retry', action='store_true', help="收到 503 时按 Retry-After 重试")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="本进程内服务的处理线程数")
+    parser.add_argument('--queue', type=int, help="本进程内服务的排队上限")
+    parser.add_argument('-o', '--output', help="结果 JSON 文件")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server = ProcessingServer(('127.0.0.1', 0),
+                                  ProcessingService(args.workers, args.queue))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = server.url
+
+    body = synthetic_png(args.size)
+    results = []
+    lock = threading.Lock()
+
+    def worker(index):
+        client = Client(url, body, args.retry)
+        for number in range(args.requests):
+            radius = 1 + (index + number) % args.distinct
+            result = client.request(CHAIN.format(radius=radius))
+            with lock:
+                results.append(result)
+
+    print(f"服务：{url}，{args.clients} 个客户端 x {args.requests} 个请求，"
+          f"{args.distinct} 组参数，图像 {args.size}x{args.size}（{len(body) / 2**20:.1f} MB）")
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    statuses = Counter(status for status, _, _, _ in results)
+    ok = [latency for status, latency, _, _ in results if status == 200]
+    hits = sum(hit for _, _, hit, _ in results)
+    invalid = sum(1 for status, _, _, valid in results if status == 200 and not valid)
+    p50, p95, p99 = np.percentile(ok, [50, 95, 99]) * 1000 if ok else (0.0, 0.0, 0.0)
+    print(f"耗时 {elapsed:.2f} s，成功 {len(ok)} 个，吞吐量 {len(ok) / elapsed:.1f} 请求/秒")
+    print(f"延迟 p50 {p50:.1f} ms / p95 {p95:.1f} ms / p99 {p99:.1f} ms")
+    print(f"状态码：{dict(sorted(statuses.items()))}，缓存命中 {hits} 个，无法解码 {invalid} 个")
+
+    metrics = Client(url, b'', False).get_json('/metrics')
+    print(f"服务端：完成 {metrics['completed']}，拒绝 {metrics['rejected']}，"
+          f"失败 {metrics['failed']}，缓存 {metrics['cache']['bytes'] / 2**20:.0f} MB")
+    for name in ('queue_wait', 'process', 'encode', 'request'):
+        timing = metrics['timings'].get(name)
+        if timing:
+            print(f"  {name:<12} p50 {timing['p50_ms']:>8.1f} ms  p95 {timing['p95_ms']:>8.1f} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'elapsed_s': elapsed, 'statuses': dict(statuses), 'cache_hits': hits,
+                       'latency_ms': {'p50': p50, 'p95': p95, 'p99': p99},
+                       'server': metrics}, f, indent=2, ensure_ascii=False)
+    if server is not None:
+        server.shutdown()
+        server.service.shutdown()
+    failed = invalid + sum(count for status, count in statuses.items()
+                           if status not in (200, 503))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,233 @@
+"""处理器基准测试
+
+用合成图像（多种尺寸和 L/RGB/RGBA/P 模式）按界面滑动条的参数范围逐一调用
+GeometricProcessor、EnhanceProcessor、SmoothProcessor、SegmentProcessor 的静态
+方法，记录耗时、峰值内存和内存分配次数，结果写为 JSON，可与保存的基准结果
+比较并按阈值判定性能回退。
+
+内存数据来自 tracemalloc，只统计经 Python 分配器的内存（包括 NumPy 数组）；
+Pillow 在 C 层直接分配的图像内存不在其中，因此另外记录输出图像的字节数。
+
+用法：
+    python benchmarks/run_benchmarks.py -o results.json
+    python benchmarks/run_benchmarks.py --baseline baseline.json --threshold 0.2
+    python benchmarks/run_benchmarks.py --profile median_filter --size 1024 --params radius=5
+"""
+import argparse
+import cProfile
+import itertools
+import json
+import os
+import platform
+import pstats
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.processors import GeometricProcessor, EnhanceProcessor, SmoothProcessor, SegmentProcessor
+
+MODES = ('L', 'RGB', 'RGBA', 'P')
+SIZES = (256, 1024, 2048)
+
+
+def region_growing(image, threshold):
+    """以图像中心为种子点，与界面一致"""
+    return SegmentProcessor.region_growing(image, (image.height // 2, image.width // 2), threshold)
+
+
+# 操作名 -> (函数, {参数名: 取值列表})，取值覆盖界面滑动条的最小值、默认值和最大值
+CASES = {
+    'translate': (GeometricProcessor.translate, {'tx': [-100, 0, 100], 'ty': [50]}),
+    'rotate': (GeometricProcessor.rotate, {'angle': [0, 90, 45, 360]}),
+    'scale': (GeometricProcessor.scale, {'scale_factor': [0.1, 1.0, 3.0]}),
+    'mirror': (GeometricProcessor.mirror, {}),
+    'adjust_brightness': (EnhanceProcessor.adjust_brightness, {'factor': [0.1, 1.0, 3.0]}),
+    'adjust_contrast': (EnhanceProcessor.adjust_contrast, {'factor': [0.1, 1.0, 3.0]}),
+    'equalize': (EnhanceProcessor.equalize, {}),
+    'clahe': (EnhanceProcessor.clahe, {'clip_limit': [1.0, 2.0, 10.0]}),
+    'mean_filter': (SmoothProcessor.mean_filter, {'radius': [1, 3, 20]}),
+    'gaussian_filter': (SmoothProcessor.gaussian_filter, {'radius': [1, 3, 20]}),
+    'median_filter': (SmoothProcessor.median_filter, {'radius': [1, 3, 20]}),
+    'threshold_segment': (SegmentProcessor.threshold_segment, {'threshold': [0, 128, 255]}),
+    'auto_threshold': (SegmentProcessor.auto_threshold, {'classes': [2, 3]}),
+    'canny_edge': (SegmentProcessor.canny_edge, {'low_threshold': [50], 'high_threshold': [150, 255]}),
+    'region_growing': (region_growing, {'threshold': [0, 30, 255]})
+}
+
+
+def synthetic_image(size, mode, seed=0):
+    """生成带渐变和噪声的测试图像，比纯随机噪声更接近真实图像的统计特性"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:size, 0:size]
+    base = (x + y) * (255 / (2 * size - 2 or 1))
+    channels = [base, base[::-1], base[:, ::-1], 255 - base / 2]
+    pixels = np.stack(channels, axis=-1) + rng.normal(0, 12, (size, size, 4))
+    image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), 'RGBA')
+    if mode == 'P':
+        return image.convert('RGB').quantize(256)
+    return image.convert(mode)
+
+
+def param_grid(grid):
+    names = list(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+def case_key(name, mode, size, params):
+    args = ','.join(f"{k}={v}" for k, v in params.items())
+    return f"{name}|{mode}|{size}|{args}"
+
+
+def measure(func, image, params, repeat):
+    """返回 (耗时列表, 峰值内存, 分配块数, 输出字节数)"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(image, **params)
+        times.append(time.perf_counter() - start)
+
+    # 内存单独测一次，避免 tracemalloc 的开销计入耗时
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    result = func(image, **params)
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(max(0, stat.count_diff) for stat in after.compare_to(before, 'lineno'))
+    output_bytes = len(result.tobytes()) if hasattr(result, 'tobytes') else 0
+    return times, peak, blocks, output_bytes
+
+
+def run_suite(names, modes, sizes, repeat):
+    results = {}
+    for size, mode in itertools.product(sizes, modes):
+        image = synthetic_image(size, mode)
+        for name in names:
+            func, grid = CASES[name]
+            for params in param_grid(grid):
+                key = case_key(name, mode, size, params)
+                entry = {'operation': name, 'mode': mode, 'size': size, 'params': params}
+                try:
+                    times, peak, blocks, output_bytes = measure(func, image, params, repeat)
+                except Exception as e:
+                    # 某些操作不支持部分模式，记录错误而不中断整个测试
+                    entry['error'] = f"{type(e).__name__}: {e}"
+                    print(f"{key:<60} 错误：{entry['error']}", file=sys.stderr)
+                else:
+                    entry.update({
+                        'min_ms': min(times) * 1000,
+                        'median_ms': statistics.median(times) * 1000,
+                        'peak_bytes': peak,
+                        'alloc_blocks': blocks,
+                        'output_bytes': output_bytes
+                    })
+                    print(f"{key:<60} {entry['median_ms']:>9.2f} ms  峰值 {peak / 2**20:>7.2f} MB",
+                          file=sys.stderr)
+                results[key] = entry
+    return results
+
+
+def compare(results, baseline, threshold, min_delta=1.0):
+    """按中位耗时比较，返回回退的条目列表 [(键, 基准 ms, 当前 ms)]
+
+    耗时增加不足 min_delta 毫秒的条目视为计时噪声，不算回退。
+    """
+    regressions = []
+    for key, entry in results.items():
+        old = baseline.get(key)
+        if not old or 'median_ms' not in old or 'median_ms' not in entry:
+            continue
+        delta = entry['median_ms'] - old['median_ms']
+        if delta > old['median_ms'] * threshold and delta > min_delta:
+            regressions.append((key, old['median_ms'], entry['median_ms']))
+    return regressions
+
+
+def parse_params(items):
+    params = {}
+    for item in items:
+        name, sep, value = item.partition('=')
+        if not sep:
+            raise SystemExit(f"参数格式应为 name=value：{item!r}")
+        params[name] = float(value) if '.' in value else int(value)
+    return params
+
+
+def profile(name, mode, size, params, repeat, output):
+    func, grid = CASES[name]
+    # 未指定的参数取参数范围中的第二个值（通常是界面默认值）
+    for param, values in grid.items():
+        params.setdefault(param, values[min(1, len(values) - 1)])
+    image = synthetic_image(size, mode)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for _ in range(repeat):
+        func(image, **params)
+    profiler.disable()
+    profiler.dump_stats(output)
+    pstats.Stats(profiler).sort_stats('cumulative').print_stats(20)
+    print(f"性能分析数据已写入 {output}（可用 snakeviz 或 flameprof 查看）", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="处理器基准测试")
+    parser.add_argument('-o', '--output', help="结果 JSON 文件")
+    parser.add_argument('--baseline', help="与之比较的基准结果 JSON 文件")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="中位耗时超过基准的比例阈值，默认 0.2（即 20%%）")
+    parser.add_argument('--min-delta', type=float, default=1.0,
+                        help="耗时增加小于该毫秒数时忽略，默认 1.0")
+    parser.add_argument('--ops', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(SIZES))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--profile', choices=list(CASES), help="只对一个操作做 cProfile 分析")
+    parser.add_argument('--mode', default='RGB', choices=MODES, help="--profile 使用的图像模式")
+    parser.add_argument('--size', type=int, default=1024, help="--profile 使用的图像尺寸")
+    parser.add_argument('--params', nargs='*', default=[], help="--profile 的参数，如 radius=5")
+    parser.add_argument('--profile-output', default='profile.prof')
+    args = parser.parse_args()
+
+    if args.profile:
+        profile(args.profile, args.mode, args.size, parse_params(args.params),
+                args.repeat, args.profile_output)
+        return 0
+
+    results = run_suite(args.ops, args.modes, args.sizes, args.repeat)
+    if args.output:
+        report = {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pillow': Image.__version__,
+            'numpy': np.__version__,
+            'repeat': args.repeat,
+            'results': results
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        for key, old, new in regressions:
+            print(f"性能回退：{key}  {old:.2f} ms -> {new:.2f} ms ({new / old - 1:+.0%})")
+        if regressions:
+            return 1
+        print(f"与基准相比没有超过 {args.threshold:.0%} 的回退")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
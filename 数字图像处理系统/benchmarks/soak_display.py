@@ -0,0 +1,120 @@
+"""显示路径长时间运行测试
+
+模拟拖动滑动条：对同一个画布反复显示不同的图像（快速缩放与最终缩放交替），
+定期记录 Tk 中存活的图像数量和进程常驻内存（RSS），两者都应保持平稳：
+第一次记录之后 Tk 图像数增长或 RSS 增长超过 --max-rss-growth 时返回 1。
+Linux 下没有图形显示（未设置 DISPLAY）时自动在空闲的显示号上启动 Xvfb，
+结束后关闭；找不到 Xvfb 时返回 2。
+
+用法：python benchmarks/soak_display.py [--updates 5000] [--size 1024] [--max-rss-growth 20]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import time
+import tkinter as tk
+
+import numpy as np
+from PIL import Image
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.gui.components import CanvasView
+
+
+def rss_mb():
+    """当前进程常驻内存（MB），无法获取时返回 0"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError):
+        return 0.0
+
+
+def start_virtual_display():
+    """没有图形显示时启动 Xvfb 并设置 DISPLAY，返回 Xvfb 进程；不需要或无法启动时返回 None"""
+    if sys.platform != 'linux' or os.environ.get('DISPLAY'):
+        return None
+    xvfb = shutil.which('Xvfb')
+    if xvfb is None:
+        return None
+    # -displayfd 使 Xvfb 自选空闲的显示号，准备好接受连接后写回
+    read_fd, write_fd = os.pipe()
+    process = subprocess.Popen([xvfb, '-displayfd', str(write_fd), '-screen', '0', '1280x1024x24',
+                                '-nolisten', 'tcp'], pass_fds=(write_fd,),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        number = f.readline().strip()
+    if not number:
+        process.kill()
+        return None
+    os.environ['DISPLAY'] = ':' + number
+    return process
+
+
+def main():
+    parser = argparse.ArgumentParser(description="显示路径长时间运行测试")
+    parser.add_argument('--updates', type=int, default=5000)
+    parser.add_argument('--size', type=int, default=1024)
+    parser.add_argument('--report', type=int, default=500, help="每隔多少次更新记录一次")
+    parser.add_argument('--max-rss-growth', type=float, default=20.0,
+                        help="第一次记录之后允许的 RSS 增长（MB）")
+    args = parser.parse_args()
+
+    xvfb = start_virtual_display()
+    try:
+        return soak(args)
+    except tk.TclError as e:
+        print(f"错误：无法打开图形显示（{e}），请设置 DISPLAY 或安装 Xvfb", file=sys.stderr)
+        return 2
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+            xvfb.wait()
+
+
+def soak(args):
+    root = tk.Tk()
+    canvas = tk.Canvas(root, width=400, height=300, bg='white')
+    canvas.pack()
+    root.update()
+    view = CanvasView(canvas)
+
+    rng = np.random.default_rng(0)
+    frames = [Image.fromarray(rng.integers(0, 256, (args.size, args.size, 3), dtype=np.uint8))
+              for _ in range(8)]
+
+    print(f"{'更新次数':>8} {'Tk图像数':>8} {'画布项数':>8} {'RSS(MB)':>9} {'每次(ms)':>9}")
+    samples = []
+    start = time.perf_counter()
+    for i in range(1, args.updates + 1):
+        # 每 50 次更新中有一次最终渲染，其余为拖动中的快速预览
+        view.show(frames[i % len(frames)], fast=i % 50 != 0)
+        root.update()
+        if i % args.report == 0:
+            elapsed = (time.perf_counter() - start) / args.report * 1000
+            images = len(root.tk.splitlist(root.tk.call('image', 'names')))
+            items = len(canvas.find_all())
+            samples.append((images, rss_mb()))
+            print(f"{i:>8} {images:>8} {items:>8} {samples[-1][1]:>9.1f} {elapsed:>9.2f}")
+            start = time.perf_counter()
+    root.destroy()
+
+    if len(samples) >= 2:
+        # 第一次采样之后不应再有增长
+        image_growth = samples[-1][0] - samples[0][0]
+        rss_growth = samples[-1][1] - samples[0][1]
+        passed = image_growth <= 0 and rss_growth <= args.max_rss_growth
+        print(f"Tk图像数增长：{image_growth}，RSS增长：{rss_growth:.1f} MB，"
+              f"{'通过' if passed else '未通过'}")
+        return 0 if passed else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
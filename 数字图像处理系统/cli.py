@@ -0,0 +1,11 @@
+import os
+import sys
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from src.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -1,12 +1,26 @@
+import logging
 import os
 import sys
+import threading
 import tkinter as tk
 
 # 添加项目根目录到Python路径
 project_root = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, project_root)
 
-from src.gui.main_window import MainWindow
+from src.utils.instrumentation import metrics, ENV_VAR
+from src.utils.lazy_import import preload
+
+# 界面与处理器模块（连带 NumPy、Pillow）以及首次处理时才用到的 OpenCV，
+# 在欢迎窗口显示期间由后台线程导入
+WARM_UP_MODULES = ('src.gui.main_window', 'cv2')
+
+def warm_up():
+    try:
+        preload(*WARM_UP_MODULES)
+    except Exception:
+        # 导入失败时由主线程再次导入并报告错误
+        logging.getLogger(__name__).debug("后台预加载失败", exc_info=True)
 
 def main():
     root = tk.Tk()
@@ -26,14 +40,18 @@ def main():
     y = (screen_height - window_height) // 2
     welcome.geometry(f"{window_width}x{window_height}+{x}+{y}")
     
-    # 创建应用程序实例
-    app = MainWindow(root)
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
     
     # 欢迎文本
     tk.Label(welcome, text="欢迎使用数字图像处理系统",
              font=("Arial", 16, "bold")).pack(expand=True)
     
     def on_welcome_close():
+        # 后台导入尚未完成时在这里等待其完成
+        from src.gui.main_window import MainWindow
+        
+        # 创建应用程序实例
+        MainWindow(root)
         welcome.destroy()
         root.deiconify()
         # 设置主窗口大小和位置
@@ -48,5 +66,12 @@ def main():
     
     root.mainloop()
 
+    # 设置了 IMAGE_PROCESSOR_METRICS 环境变量时，退出前导出耗时统计
+    metrics_path = os.environ.get(ENV_VAR)
+    if metrics_path:
+        metrics.export_json(metrics_path)
+        logging.basicConfig(level=logging.INFO)
+        metrics.log_summary()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,23 @@
+import argparse
+
+from . import batch, serve, sweep, tile, video
+
+# 子命令名 -> 模块，模块需提供 HELP、add_arguments(parser) 和 run(args)
+COMMANDS = {
+    'batch': batch,
+    'serve': serve,
+    'sweep': sweep,
+    'tile': tile,
+    'video': video
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='cli.py', description="数字图像处理系统命令行工具")
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+    for name, module in COMMANDS.items():
+        module.add_arguments(subparsers.add_parser(name, help=module.HELP,
+                                                   description=module.HELP))
+    args = parser.parse_args(argv)
+    return COMMANDS[args.command].run(args)
\ No newline at end of file
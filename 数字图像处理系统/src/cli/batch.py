@@ -0,0 +1,204 @@
+"""批量处理：对目录或通配符匹配的图像执行操作链或流水线并保存结果
+
+示例：
+    python cli.py batch photos/ -c "gaussian_filter radius=3 | threshold_segment threshold=128" -o out/
+    python cli.py batch photos/ -p edges.json -o out/
+"""
+import glob
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from PIL import Image
+
+from ..processors.registry import OPERATIONS, parse_chain, format_chain, apply_chain
+from ..processors.pipeline import Pipeline
+from ..utils.image_export import check_options, export_image, parse_options
+from ..utils.loaded_image import normalize_mode
+
+HELP = "批量处理目录或通配符匹配的图像"
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tif', '.tiff', '.webp')
+
+# 输出目录中记录上次使用的操作链（或流水线），改变时所有输出都视为过期
+CHAIN_MANIFEST = '.batch-chain'
+
+
+def add_arguments(parser):
+    parser.add_argument('inputs', nargs='+', help="输入图像、目录或通配符")
+    spec = parser.add_mutually_exclusive_group(required=True)
+    spec.add_argument('-c', '--chain',
+                      help=f"操作链，用 | 分隔，例如 \"gaussian_filter radius=3 | threshold_segment "
+                           f"threshold=128\"；可用操作：{', '.join(OPERATIONS)}")
+    spec.add_argument('-p', '--pipeline',
+                      help="流水线 JSON 文件（可与界面共用）；有多个输出时每个输出保存为 "
+                           "<文件名>_<输出节点>.<格式>")
+    parser.add_argument('-o', '--output', required=True, help="输出目录")
+    parser.add_argument('-f', '--format', default='png', help="输出格式（扩展名），默认 png")
+    parser.add_argument('-O', '--save-option', action='append', metavar='NAME=VALUE',
+                        help="导出选项，可重复，如 quality=85、compress_level=1、"
+                             "compression=tiff_lzw")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="并行进程数，默认等于 CPU 核数")
+    parser.add_argument('-r', '--recursive', action='store_true', help="递归处理子目录")
+    parser.add_argument('--force', action='store_true', help="忽略已是最新的输出，全部重新处理")
+    parser.add_argument('-q', '--quiet', action='store_true', help="不输出逐个文件的进度")
+
+
+def collect_inputs(patterns, recursive=False):
+    """展开输入，返回 [(输入路径, 相对输出路径), ...]"""
+    tasks = []
+    seen = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            walker = os.walk(pattern) if recursive else [(pattern, [], os.listdir(pattern))]
+            matches = []
+            for dirpath, _, filenames in walker:
+                for name in filenames:
+                    path = os.path.join(dirpath, name)
+                    matches.append((path, os.path.relpath(path, pattern)))
+        else:
+            matches = [(path, os.path.basename(path))
+                       for path in glob.glob(pattern, recursive=recursive)]
+        for path, relative in sorted(matches):
+            if not path.lower().endswith(IMAGE_EXTENSIONS) or not os.path.isfile(path):
+                continue
+            key = os.path.abspath(path)
+            if key not in seen:
+                seen.add(key)
+                tasks.append((path, relative))
+    return tasks
+
+
+def output_path(output_dir, relative, fmt, suffix=None):
+    stem = os.path.splitext(relative)[0]
+    if suffix:
+        stem = f"{stem}_{suffix}"
+    return os.path.join(output_dir, stem + '.' + fmt.lower())
+
+
+def is_up_to_date(src, dst):
+    return os.path.exists(dst) and os.path.getmtime(dst) >= os.path.getmtime(src)
+
+
+def save_result(result, dst, options):
+    # 写入临时文件后改名，中断时不会留下被误判为最新的不完整输出
+    export_image(result, dst, **options)
+
+
+def process_one(task):
+    """在工作进程中处理单个文件，返回 (输入路径, 输出路径, 输入字节数, 耗时, 错误信息)
+
+    spec 为 ('chain', 操作链文本) 或 ('pipeline', 流水线 JSON)，dsts 为
+    {输出节点名: 输出路径}（操作链时键为 None），options 为导出选项。
+    """
+    src, dsts, (kind, text), options = task
+    start = time.perf_counter()
+    # 输入文件可能在扫描之后被删除，此时与其他错误一样只记入该文件的结果
+    nbytes = 0
+    try:
+        nbytes = os.path.getsize(src)
+        with Image.open(src) as image:
+            image = normalize_mode(image)
+            if kind == 'pipeline':
+                results = Pipeline.from_json(text).run(image, list(dsts))
+            else:
+                results = {None: apply_chain(image, parse_chain(text))}
+        for name, dst in dsts.items():
+            save_result(results[name], dst, options)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return src, ', '.join(dsts.values()), nbytes, time.perf_counter() - start, error
+
+
+def run(args):
+    try:
+        if args.pipeline:
+            pipeline = Pipeline.load(args.pipeline)
+            spec = ('pipeline', pipeline.to_json())
+            outputs = pipeline.outputs
+        else:
+            spec = ('chain', format_chain(parse_chain(args.chain)))
+            outputs = [None]
+        options = parse_options(args.save_option)
+        check_options('output.' + args.format, options)
+    except (ValueError, OSError) as e:
+        print(f"错误：{e}", file=sys.stderr)
+        return 2
+    # 记录在清单中的规范化文本，导出选项改变时输出同样视为过期
+    chain_text = spec[1]
+    manifest_text = chain_text
+    if options:
+        manifest_text += '\n' + ' '.join(f"{name}={value}" for name, value in sorted(options.items()))
+
+    inputs = collect_inputs(args.inputs, args.recursive)
+    if not inputs:
+        print("错误：没有找到输入图像", file=sys.stderr)
+        return 2
+
+    os.makedirs(args.output, exist_ok=True)
+    manifest = os.path.join(args.output, CHAIN_MANIFEST)
+    force = args.force
+    if not force:
+        try:
+            with open(manifest, encoding='utf-8') as f:
+                force = f.read().strip() != manifest_text
+        except OSError:
+            force = True
+    if force:
+        # 先删除旧清单：处理中断或部分失败时，已按新操作链写出的输出不会
+        # 在下次以旧操作链运行时被误判为最新
+        try:
+            os.remove(manifest)
+        except FileNotFoundError:
+            pass
+
+    tasks, skipped = [], 0
+    for src, relative in inputs:
+        # 只有一个输出时沿用输入文件名
+        dsts = {name: output_path(args.output, relative, args.format,
+                                  name if len(outputs) > 1 else None)
+                for name in outputs}
+        if not force and all(is_up_to_date(src, dst) for dst in dsts.values()):
+            skipped += 1
+        else:
+            tasks.append((src, dsts, spec, options))
+
+    print(f"{'流水线' if args.pipeline else '操作链'}：{chain_text}", file=sys.stderr)
+    print(f"共 {len(inputs)} 个文件，{skipped} 个已是最新，待处理 {len(tasks)} 个，"
+          f"进程数 {args.workers}", file=sys.stderr)
+
+    start = time.perf_counter()
+    done, failed, total_bytes = 0, 0, 0
+    workers = max(1, min(args.workers, len(tasks)))
+    pool = Pool(workers) if workers > 1 else None
+    try:
+        results = pool.imap_unordered(process_one, tasks) if pool else map(process_one, tasks)
+        for src, dst, nbytes, seconds, error in results:
+            done += 1
+            if error:
+                failed += 1
+                print(f"[{done}/{len(tasks)}] 失败 {src}：{error}", file=sys.stderr)
+                continue
+            total_bytes += nbytes
+            if not args.quiet:
+                print(f"[{done}/{len(tasks)}] {src} -> {dst} ({seconds:.2f}s)", file=sys.stderr)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    elapsed = time.perf_counter() - start
+
+    # 全部成功后才记录操作链，避免部分失败时下次被误判为最新
+    if not failed:
+        with open(manifest, 'w', encoding='utf-8') as f:
+            f.write(manifest_text)
+
+    succeeded = done - failed
+    rate = succeeded / elapsed if elapsed > 0 else 0.0
+    mb_rate = total_bytes / 1e6 / elapsed if elapsed > 0 else 0.0
+    print(f"完成：成功 {succeeded}，失败 {failed}，跳过 {skipped}，耗时 {elapsed:.2f}s，"
+          f"{rate:.2f} 张/秒，{mb_rate:.2f} MB/秒", file=sys.stderr)
+    return 1 if failed else 0
\ No newline at end of file
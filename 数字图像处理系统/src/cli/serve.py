@@ -0,0 +1,51 @@
+"""本机处理服务：通过 HTTP 接收图像与操作链，多个客户端共用本机的处理线程
+
+示例：
+    python cli.py serve -j 8 --root /data/scans
+    curl --data-binary @photo.jpg "http://127.0.0.1:8765/process?chain=canny_edge" -o edges.png
+    curl http://127.0.0.1:8765/metrics
+"""
+import logging
+import os
+import sys
+
+from ..server import ProcessingService, ProcessingServer
+
+HELP = "启动本机 HTTP 处理服务"
+
+
+def add_arguments(parser):
+    parser.add_argument('--host', default='127.0.0.1', help="监听地址，默认只接受本机连接")
+    parser.add_argument('--port', type=int, default=8765, help="端口，默认 8765")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="处理线程数，默认等于 CPU 核数")
+    parser.add_argument('--queue', type=int,
+                        help="排队任务数上限，超出时返回 503，默认为线程数的 2 倍")
+    parser.add_argument('--cache-mb', type=int, default=512, help="结果缓存容量（MB），默认 512")
+    parser.add_argument('--max-upload-mb', type=int, default=256,
+                        help="上传图像的大小上限（MB），默认 256")
+    parser.add_argument('--root', action='append', default=[],
+                        help="允许客户端按路径读取的目录，可重复指定；不指定时只接受上传")
+    parser.add_argument('-v', '--verbose', action='store_true', help="记录每个请求")
+
+
+def run(args):
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    service = ProcessingService(args.workers, args.queue, args.cache_mb * 2**20,
+                                args.root, args.max_upload_mb * 2**20)
+    try:
+        server = ProcessingServer((args.host, args.port), service)
+    except OSError as e:
+        print(f"错误：无法监听 {args.host}:{args.port}：{e}", file=sys.stderr)
+        return 2
+
+    print(f"处理服务已启动：{server.url}（{service.workers} 个线程，"
+          f"最多 {service.workers + service.queue_size} 个任务）", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("已停止", file=sys.stderr)
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
\ No newline at end of file
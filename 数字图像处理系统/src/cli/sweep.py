@@ -0,0 +1,102 @@
+"""参数扫描：对一个操作的参数网格批量求值，生成联系表或导出结果与各组合的耗时
+
+示例：
+    python cli.py sweep photo.jpg canny_edge -g low_threshold=20:100:20 -g high_threshold=100,150,200 -s sheet.png
+    python cli.py sweep photo.jpg threshold_segment -g threshold=64:192:16 -o out/ --timings sweep.csv
+    python cli.py sweep photo.jpg canny_edge -g low_threshold=20:100:20 --no-share    # 不共用预计算，用于对比
+"""
+import os
+import sys
+
+from ..processors.registry import OPERATIONS, get_operation
+from ..processors.sweep import ParameterSweep, format_value, parse_grid
+from ..utils.image_export import check_options, export_image, parse_options
+from ..utils.loaded_image import LoadedImage
+
+HELP = "对一个操作的参数网格批量求值，生成联系表或导出结果与耗时"
+
+
+def add_arguments(parser):
+    parser.add_argument('input', help="输入图像")
+    parser.add_argument('operation', help=f"操作名，可用：{', '.join(OPERATIONS)}")
+    parser.add_argument('-g', '--grid', action='append', required=True, metavar='NAME=VALUES',
+                        help="扫描的参数，可重复；取值为逗号分隔的列表或含终点的 start:stop:step，"
+                             "如 low_threshold=20:100:20、high_threshold=100,150,200")
+    parser.add_argument('-p', '--param', action='append', metavar='NAME=VALUE',
+                        help="固定的参数，可重复，未指定的取默认值")
+    parser.add_argument('-s', '--sheet', help="联系表输出文件")
+    parser.add_argument('--cell', type=int, default=256, help="联系表每格的边长，默认 256")
+    parser.add_argument('--columns', type=int,
+                        help="联系表的列数，默认为最后一个扫描参数的取值个数")
+    parser.add_argument('-o', '--output', help="保存各组合结果的目录")
+    parser.add_argument('-f', '--format', default='png', help="结果的输出格式（扩展名），默认 png")
+    parser.add_argument('-O', '--save-option', action='append', metavar='NAME=VALUE',
+                        help="结果的导出选项，可重复，如 compress_level=1")
+    parser.add_argument('--timings', help="把各组合的参数与耗时写入文件（.csv 或 .json）")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="并行线程数，默认等于 CPU 核数")
+    parser.add_argument('--no-share', action='store_true',
+                        help="不共用预计算，每个组合独立计算，用于对比")
+
+
+def run(args):
+    try:
+        op = get_operation(args.operation)
+        grid = parse_grid(op, args.grid)
+        fixed = {}
+        for text in args.param or ():
+            name, sep, value = text.partition('=')
+            if not sep:
+                raise ValueError(f"参数格式应为 name=value：{text!r}")
+            fixed[name.strip()] = value.strip()
+        sweep = ParameterSweep(op, grid, fixed, args.workers, share=not args.no_share)
+        save_options = parse_options(args.save_option)
+        check_options('output.' + args.format, save_options)
+        loaded = LoadedImage.open(args.input)
+    except (ValueError, OSError) as e:
+        print(f"错误：{e}", file=sys.stderr)
+        return 2
+
+    swept = '，'.join(f"{name} {len(values)} 个取值" for name, values in sweep.grid.items())
+    print(f"操作：{op.name}，扫描 {swept}，共 {len(sweep.combinations())} 组，"
+          f"线程数 {sweep.workers}{'，不共用预计算' if args.no_share else ''}", file=sys.stderr)
+
+    extension = '.' + args.format.lower()
+
+    def save(result):
+        # 在工作线程中保存，编码与其他组合的计算并行进行
+        result.path = os.path.join(args.output, sweep.file_name(result, extension))
+        export_image(result.image, result.path, **save_options)
+
+    try:
+        report = sweep.run(loaded.image, thumbnail=args.cell if args.sheet else None,
+                           keep_images=False, on_result=save if args.output else None)
+    except (ValueError, OSError) as e:
+        print(f"错误：{e}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        print("已中断", file=sys.stderr)
+        return 130
+
+    width = max(len(name) for name in sweep.names)
+    for result in report.results:
+        values = '  '.join(f"{name:>{width}}={format_value(result.params[name]):<6}"
+                           for name in sweep.names)
+        coverage = '' if result.coverage is None else f"  前景 {result.coverage:6.1%}"
+        print(f"[{result.index:3d}] {values}  {result.seconds * 1000:8.1f} ms{coverage}",
+              file=sys.stderr)
+    print(f"完成：共用预计算 {report.shared_seconds * 1000:.1f} ms，各组合合计 "
+          f"{report.total_seconds:.2f} s，总耗时 {report.elapsed:.2f} s", file=sys.stderr)
+
+    try:
+        if args.sheet:
+            sheet = report.contact_sheet(cell=args.cell, columns=args.columns)
+            export_image(sheet.image, args.sheet)
+            print(f"联系表：{args.sheet}（{sheet.columns} 列）", file=sys.stderr)
+        if args.timings:
+            report.write_timings(args.timings)
+            print(f"耗时：{args.timings}", file=sys.stderr)
+    except (ValueError, OSError) as e:
+        print(f"错误：{e}", file=sys.stderr)
+        return 1
+    return 0
\ No newline at end of file
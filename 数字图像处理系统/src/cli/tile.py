@@ -0,0 +1,55 @@
+"""分块处理：对超出内存的大图像逐块执行操作链并直接写入磁盘
+
+示例：
+    python cli.py tile scan.tif -c "gaussian_filter radius=3 | equalize" -o result.npy -j 4
+"""
+import os
+import sys
+import time
+
+from ..processors.registry import parse_chain, format_chain
+from ..processors.tiled import TiledProcessor, TileSource
+from ..utils.image_export import check_options, parse_options
+
+HELP = "分块处理超出内存的大图像"
+
+
+def add_arguments(parser):
+    parser.add_argument('input', help="输入图像（.npy 或 BMP/未压缩 TIFF 等可内存映射的格式）")
+    parser.add_argument('-c', '--chain', required=True, help="操作链，用 | 分隔")
+    parser.add_argument('-o', '--output', required=True, help="输出文件（.npy 或图像格式）")
+    parser.add_argument('-t', '--tile-size', type=int, default=1024, help="块边长，默认 1024")
+    parser.add_argument('--strip', action='store_true', help="按整行条带分块")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="并行线程数，默认等于 CPU 核数")
+    parser.add_argument('-O', '--save-option', action='append', metavar='NAME=VALUE',
+                        help="输出为图像格式时的导出选项，可重复，如 compression=tiff_lzw")
+
+
+def run(args):
+    try:
+        chain = parse_chain(args.chain)
+        source = TileSource.open(args.input)
+        save_options = parse_options(args.save_option)
+        check_options(args.output, save_options)
+    except (ValueError, OSError) as e:
+        print(f"错误：{e}", file=sys.stderr)
+        return 2
+
+    if not source.lazy:
+        print("提示：输入为压缩格式，需要整体解码一次；转换为 .npy 或未压缩 TIFF 可按块读取",
+              file=sys.stderr)
+    print(f"操作链：{format_chain(chain)}", file=sys.stderr)
+
+    processor = TiledProcessor(args.tile_size, args.workers, args.strip)
+    start = time.perf_counter()
+    try:
+        mode, (width, height) = processor.run(source, chain, args.output, save_options)
+    except ValueError as e:
+        print(f"错误：{e}", file=sys.stderr)
+        return 2
+    elapsed = time.perf_counter() - start
+    megapixels = width * height / 1e6
+    print(f"完成：{width}x{height} {mode} -> {args.output}，耗时 {elapsed:.2f}s，"
+          f"{megapixels / elapsed if elapsed > 0 else 0:.1f} 百万像素/秒", file=sys.stderr)
+    return 0
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""视频流处理：逐帧执行操作链并写出视频
+
+示例：
+    python cli.py video clip.mp4 -c "gaussian_filter radius=2 | canny_edge" -o edges.mp4 -j 4
+    python cli.py video clip.mp4 -c threshold_segment --live --latency 100    # 模拟摄像头
+    python cli.py video 0 -c canny_edge -o camera.mp4                         # 摄像头 0
+"""
+import json
+import os
+import sys
+
+from ..processors.registry import parse_chain, format_chain
+from ..processors.video import VideoSource, VideoProcessor
+
+HELP = "对视频文件或摄像头逐帧执行操作链"
+
+
+def add_arguments(parser):
+    parser.add_argument('input', help="视频文件，或摄像头编号（如 0）")
+    parser.add_argument('-c', '--chain', required=True, help="操作链，用 | 分隔")
+    parser.add_argument('-o', '--output', help="输出视频文件，不指定时只统计帧率")
+    parser.add_argument('--fourcc', default='mp4v', help="输出编码的 FourCC，默认 mp4v")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="并行线程数，默认等于 CPU 核数")
+    parser.add_argument('--queue', type=int, default=8, help="帧队列容量，默认 8")
+    parser.add_argument('--live', action='store_true',
+                        help="按视频帧率实时供帧，模拟摄像头；处理不及时的帧被丢弃")
+    parser.add_argument('--fps', type=float, help="覆盖输入的帧率")
+    parser.add_argument('--latency', type=float,
+                        help="延迟预算（毫秒），等待超过预算的帧被跳过")
+    parser.add_argument('--stats', help="把统计结果写入 JSON 文件")
+
+
+def run(args):
+    if len(args.fourcc) != 4:
+        print(f"错误：FourCC 须为 4 个字符：{args.fourcc}", file=sys.stderr)
+        return 2
+    try:
+        chain = parse_chain(args.chain)
+        processor = VideoProcessor(chain, args.workers, args.queue,
+                                   args.latency / 1000 if args.latency else None)
+        source = VideoSource(args.input, args.live, args.fps)
+    except (ValueError, OSError) as e:
+        print(f"错误：{e}", file=sys.stderr)
+        return 2
+
+    print(f"操作链：{format_chain(chain)}", file=sys.stderr)
+    try:
+        stats = processor.run(source, args.output, args.fourcc)
+    except ValueError as e:
+        print(f"错误：{e}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        print("已中断", file=sys.stderr)
+        return 130
+    finally:
+        source.close()
+
+    print(f"完成：读取 {stats.read} 帧，输出 {stats.processed} 帧，"
+          f"丢弃 {stats.dropped} 帧，跳过 {stats.skipped} 帧，超出预算 {stats.late} 帧；"
+          f"{stats.fps:.1f} 帧/秒（输入 {source.fps:.1f} 帧/秒），"
+          f"延迟 p50 {stats.latency(50) * 1000:.1f}ms / p95 {stats.latency(95) * 1000:.1f}ms",
+          file=sys.stderr)
+    if args.stats:
+        with open(args.stats, 'w', encoding='utf-8') as f:
+            json.dump(stats.as_dict(), f, indent=2)
+    return 0
\ No newline at end of file
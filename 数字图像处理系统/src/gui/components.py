@@ -1,14 +1,8 @@
 import tkinter as tk
 from PIL import Image, ImageTk
-import sys
-import os
 
-# 获取项目根目录
-project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-if project_root not in sys.path:
-    sys.path.insert(0, project_root)
-
-from src.processors import GeometricProcessor, EnhanceProcessor, SmoothProcessor, SegmentProcessor
+from ..utils.image_export import EXPORT_FORMATS
+from ..utils.instrumentation import metrics, data_bytes
 
 class ControlPanel:
     def __init__(self, parent, main_window):
@@ -20,8 +14,9 @@ class ControlPanel:
         # 创建滚动区域
         self.create_scrollable_frame()
         
-        # 初始化参数变量字典
+        # 初始化参数变量字典，以及各滑动条的取值范围
         self.param_vars = {}
+        self.param_ranges = {}
         
         # 在滚动框架中创建控件
         self.create_control_panel()
@@ -56,6 +51,9 @@ class ControlPanel:
         # 创建文件操作按钮
         self.create_file_controls()
         
+        # 创建直方图显示
+        self.create_histogram_view()
+        
         # 创建参数设置区域
         self.create_parameter_controls()
         
@@ -70,6 +68,60 @@ class ControlPanel:
                  command=self.main_window.load_image).pack(fill=tk.X, pady=2)
         tk.Button(file_frame, text="保存结果",
                  command=self.main_window.save_image).pack(fill=tk.X, pady=2)
+        tk.Button(file_frame, text="导出全部结果",
+                 command=self.main_window.export_all).pack(fill=tk.X, pady=2)
+
+        self.create_export_controls(file_frame)
+
+    def create_export_controls(self, parent):
+        """导出格式与各格式的选项，只显示所选格式的选项"""
+        export_frame = tk.LabelFrame(parent, text="导出设置")
+        export_frame.pack(fill=tk.X, pady=2)
+
+        self.export_format = tk.StringVar(value='png')
+        tk.OptionMenu(export_frame, self.export_format, *EXPORT_FORMATS,
+                      command=lambda _: self.show_export_options()).pack(fill=tk.X)
+
+        # (格式, 选项名) -> 变量
+        self.export_vars = {}
+        self.export_frames = {}
+        for key, fmt in EXPORT_FORMATS.items():
+            frame = self.export_frames[key] = tk.Frame(export_frame)
+            for name, label, default, choices in fmt.params:
+                row = tk.Frame(frame)
+                row.pack(fill=tk.X)
+                if isinstance(default, bool):
+                    var = tk.BooleanVar(value=default)
+                    tk.Checkbutton(row, text=label, variable=var, anchor=tk.W).pack(fill=tk.X)
+                elif isinstance(default, int):
+                    var = tk.IntVar(value=default)
+                    tk.Label(row, text=label, width=10).pack(side=tk.LEFT)
+                    tk.Scale(row, from_=choices[0], to=choices[1], orient=tk.HORIZONTAL,
+                             variable=var).pack(side=tk.LEFT, fill=tk.X, expand=True)
+                else:
+                    var = tk.StringVar(value=default)
+                    tk.Label(row, text=label, width=10).pack(side=tk.LEFT)
+                    tk.OptionMenu(row, var, *choices).pack(side=tk.LEFT, fill=tk.X, expand=True)
+                self.export_vars[key, name] = var
+        self.show_export_options()
+
+    def show_export_options(self):
+        for key, frame in self.export_frames.items():
+            if key == self.export_format.get():
+                frame.pack(fill=tk.X)
+            else:
+                frame.pack_forget()
+
+    def export_settings(self):
+        """返回所选的导出格式及其选项"""
+        key = self.export_format.get()
+        return key, {name: self.export_vars[key, name].get()
+                     for name, _, _, _ in EXPORT_FORMATS[key].params}
+
+    def create_histogram_view(self):
+        histogram_frame = tk.LabelFrame(self.scrollable_frame, text="直方图", padx=5, pady=5)
+        histogram_frame.pack(fill=tk.X, pady=5)
+        self.histogram_view = HistogramView(histogram_frame)
 
     def create_parameter_controls(self):
         param_frame = tk.LabelFrame(self.scrollable_frame, text="参数设置", padx=5, pady=5)
@@ -85,7 +137,8 @@ class ControlPanel:
             },
             '图像增强': {
                 'brightness': ('亮度:', 0.1, 3.0, 1.0),
-                'contrast': ('对比度:', 0.1, 3.0, 1.0)
+                'contrast': ('对比度:', 0.1, 3.0, 1.0),
+                'clahe_clip': ('CLAHE限幅:', 1.0, 10.0, 2.0)
             },
             '图像平滑': {
                 'mean_radius': ('均值半径:', 1, 20, 3),
@@ -101,8 +154,9 @@ class ControlPanel:
         }
 
         # 创建所有滑动条
+        groups = {}
         for category, params in all_params.items():
-            group = tk.LabelFrame(param_frame, text=category)
+            group = groups[category] = tk.LabelFrame(param_frame, text=category)
             group.pack(fill=tk.X, pady=2)
 
             for key, (label, min_val, max_val, default) in params.items():
@@ -123,14 +177,33 @@ class ControlPanel:
 
                 scale.pack(side=tk.LEFT, fill=tk.X, expand=True)
                 self.param_vars[key] = var
+                self.param_ranges[key] = (min_val, max_val)
 
-                # 修改事件绑定方式
-                def on_scale_change(event, key=key):
+                # 拖动时在代理图像上预览，松开后计算全分辨率结果
+                def on_scale_drag(event, key=key):
+                    if hasattr(self.main_window, 'current_transform'):
+                        self.main_window.update_results(preview=True)
+
+                def on_scale_release(event, key=key):
                     if hasattr(self.main_window, 'current_transform'):
                         self.main_window.update_results()
 
-                scale.bind("<B1-Motion>", on_scale_change)
-                scale.bind("<ButtonRelease-1>", on_scale_change)
+                scale.bind("<B1-Motion>", on_scale_drag)
+                scale.bind("<ButtonRelease-1>", on_scale_release)
+
+        # 由缓存的灰度直方图求 Otsu 阈值并设置到阈值滑动条
+        tk.Button(groups['图像分割'], text="自动阈值 (Otsu)",
+                 command=self.main_window.auto_threshold).pack(fill=tk.X, pady=2)
+
+    def sweep_values(self, key, count):
+        """参数扫描时滑动条 key 在其范围内等间隔的 count 个取值（去掉重复的）"""
+        low, high = self.param_ranges[key]
+        step = (high - low) / max(count - 1, 1)
+        if isinstance(self.param_vars[key], tk.DoubleVar):
+            values = [round(low + i * step, 1) for i in range(count)]
+        else:
+            values = [int(round(low + i * step)) for i in range(count)]
+        return list(dict.fromkeys(values))
 
     def create_process_controls(self):
         process_frame = tk.LabelFrame(self.scrollable_frame, text="图像处理", padx=5, pady=5)
@@ -148,6 +221,250 @@ class ControlPanel:
             btn.configure(command=lambda t=command_type: self.main_window.show_transform_results(t))
             btn.pack(fill=tk.X, pady=2)
 
+        tk.Button(process_frame, text="渲染全分辨率",
+                 command=self.main_window.render_full).pack(fill=tk.X, pady=2)
+        tk.Button(process_frame, text="运行流水线",
+                 command=self.main_window.run_pipeline).pack(fill=tk.X, pady=2)
+        tk.Button(process_frame, text="参数扫描",
+                 command=self.main_window.sweep_parameters).pack(fill=tk.X, pady=2)
+
+        stats_frame = tk.LabelFrame(self.scrollable_frame, text="性能统计", padx=5, pady=5)
+        stats_frame.pack(fill=tk.X, pady=5)
+
+        tk.Button(stats_frame, text="显示/隐藏统计 (F12)",
+                 command=self.main_window.toggle_stats).pack(fill=tk.X, pady=2)
+        tk.Button(stats_frame, text="导出统计",
+                 command=self.main_window.export_stats).pack(fill=tk.X, pady=2)
+
+class CanvasView:
+    """画布上的单个图像显示项
+
+    每个画布只保留一个图像项和一个 PhotoImage：显示尺寸和模式不变时用
+    paste() 原地更新，否则替换为新的 PhotoImage，因此长时间拖动滑动条时
+    内存不会增长。拖动中使用较快的缩放滤波，停止更新 SETTLE_DELAY 毫秒后
+    再用 LANCZOS 重新绘制一次。画布尺寸在 <Configure> 事件时更新缓存。
+    可在图像上以相对位置标记一个点（如区域生长的种子点），随图像一起重绘。
+    """
+
+    MARKER_SIZE = 6
+    MARKER_COLOR = '#ff3030'
+
+    SETTLE_DELAY = 200
+    FAST_RESAMPLE = Image.Resampling.BILINEAR
+    FINAL_RESAMPLE = Image.Resampling.LANCZOS
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.size = None           # 缓存的画布尺寸
+        self.fit_cache = None      # (图像尺寸, 显示尺寸)
+        self.photo = None
+        self.photo_key = None       # (显示尺寸, 模式)，相同时可原地 paste
+        self.item = None
+        self.image = None          # 当前显示的源图像
+        self.settle_job = None
+        self.marker = None         # 标记点的相对位置 (x, y)
+        self.origin = (0, 0)       # 图像左上角在画布上的位置
+        canvas.bind("<Configure>", self.on_configure, add='+')
+
+    def on_configure(self, event):
+        if (event.width, event.height) == self.size:
+            return
+        self.size = (event.width, event.height)
+        self.fit_cache = None
+        # 尺寸变化后按新尺寸重新绘制当前图像
+        if self.image is not None:
+            self.show(self.image, fast=True)
+
+    def canvas_size(self):
+        if self.size is None:
+            width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+            if width <= 1:  # 如果画布尺寸还未初始化
+                return int(self.canvas.cget('width')), int(self.canvas.cget('height'))
+            self.size = (width, height)
+        return self.size
+
+    def fit(self, image_size):
+        """按画布尺寸计算显示尺寸，结果缓存到画布尺寸变化为止"""
+        if self.fit_cache and self.fit_cache[0] == image_size:
+            return self.fit_cache[1]
+        canvas_width, canvas_height = self.canvas_size()
+        width, height = image_size
+        scale = min(canvas_width / width, canvas_height / height) * 0.9
+        display_size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        self.fit_cache = (image_size, display_size)
+        return display_size
+
+    def show(self, image, fast=False):
+        self.image = image
+        if self.settle_job is not None:
+            self.canvas.after_cancel(self.settle_job)
+            self.settle_job = None
+
+        display_size = self.fit(image.size)
+        if fast:
+            with metrics.measure('display.resize_fast', data_bytes(image)):
+                display_image = image.resize(display_size, self.FAST_RESAMPLE, reducing_gap=2.0)
+            self.settle_job = self.canvas.after(self.SETTLE_DELAY, self.settle)
+        else:
+            with metrics.measure('display.resize', data_bytes(image)):
+                display_image = image.resize(display_size, self.FINAL_RESAMPLE)
+        if display_image.mode not in ('1', 'L', 'RGB', 'RGBA'):
+            display_image = display_image.convert('RGBA' if 'A' in display_image.getbands() else 'RGB')
+
+        canvas_width, canvas_height = self.canvas_size()
+        x = (canvas_width - display_size[0]) // 2
+        y = (canvas_height - display_size[1]) // 2
+
+        if self.photo is not None and self.photo_key == (display_size, display_image.mode):
+            with metrics.measure('display.paste', data_bytes(display_image)):
+                self.photo.paste(display_image)
+            self.canvas.coords(self.item, x, y)
+            self.place(x, y, display_size)
+            return
+
+        # 旧的 PhotoImage 失去引用后由 ImageTk 释放
+        with metrics.measure('display.photo_image', data_bytes(display_image)):
+            self.photo = ImageTk.PhotoImage(display_image)
+        self.photo_key = (display_size, display_image.mode)
+        if self.item is None:
+            self.item = self.canvas.create_image(x, y, anchor=tk.NW, image=self.photo)
+        else:
+            self.canvas.itemconfigure(self.item, image=self.photo)
+            self.canvas.coords(self.item, x, y)
+        self.place(x, y, display_size)
+
+    def place(self, x, y, display_size):
+        """记录图像位置并重绘标记点"""
+        self.origin = (x, y)
+        self.canvas.delete('marker')
+        if self.marker is None:
+            return
+        cx = x + self.marker[0] * display_size[0]
+        cy = y + self.marker[1] * display_size[1]
+        size = self.MARKER_SIZE
+        for dx, dy in ((size, 0), (0, size)):
+            self.canvas.create_line(cx - dx, cy - dy, cx + dx, cy + dy,
+                                    fill=self.MARKER_COLOR, width=2, tags='marker')
+
+    def mark(self, position):
+        """在相对位置 position 处标记一个点，为 None 时清除"""
+        self.marker = position
+        if self.image is not None:
+            self.place(*self.origin, self.fit(self.image.size))
+
+    def relative_position(self, x, y):
+        """画布坐标在图像上的相对位置 (0~1, 0~1)，不在图像上时返回 None"""
+        if self.image is None:
+            return None
+        width, height = self.fit(self.image.size)
+        fx = (x - self.origin[0]) / width
+        fy = (y - self.origin[1]) / height
+        if 0 <= fx < 1 and 0 <= fy < 1:
+            return fx, fy
+        return None
+
+    def settle(self):
+        self.settle_job = None
+        if self.image is not None:
+            self.show(self.image)
+
+    def clear(self):
+        if self.settle_job is not None:
+            self.canvas.after_cancel(self.settle_job)
+            self.settle_job = None
+        if self.item is not None:
+            self.canvas.delete(self.item)
+        self.canvas.delete('marker')
+        self.item = self.photo = self.image = self.marker = None
+
+class SweepWindow:
+    """参数扫描结果窗口
+
+    显示参数扫描的联系表，点击其中一格时调用 on_select(格序号)。再次扫描时
+    在同一窗口中替换联系表。
+    """
+
+    MAX_SIZE = (1200, 800)
+
+    def __init__(self, root, on_select):
+        self.on_select = on_select
+        self.sheet = None
+        self.window = tk.Toplevel(root)
+        self.label = tk.Label(self.window, anchor=tk.W, justify=tk.LEFT)
+        self.label.pack(fill=tk.X, padx=5, pady=2)
+        self.canvas = tk.Canvas(self.window, bg='white')
+        self.canvas.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.view = CanvasView(self.canvas)
+        # 点击一格把该组参数设到滑动条上
+        self.canvas.bind("<Button-1>", self.on_click)
+
+    def exists(self):
+        return bool(self.window.winfo_exists())
+
+    def show(self, title, sheet, text):
+        self.window.title(title)
+        self.label.configure(text=text)
+        self.sheet = sheet
+        self.canvas.configure(width=min(sheet.image.width, self.MAX_SIZE[0]),
+                              height=min(sheet.image.height, self.MAX_SIZE[1]))
+        self.view.show(sheet.image)
+        self.window.lift()
+
+    def on_click(self, event):
+        position = self.view.relative_position(event.x, event.y)
+        if position is None or self.sheet is None:
+            return
+        width, height = self.sheet.image.size
+        index = self.sheet.index_at(position[0] * width, position[1] * height)
+        if index is not None:
+            self.on_select(index)
+
+class HistogramView:
+    """直方图显示
+
+    绘制灰度及各颜色通道的直方图（按最高计数归一化），用虚线标出 Otsu 阈值、
+    点线标出三级 Otsu 阈值，并显示灰度均值和标准差。数据取自图像载入时缓存
+    的 ImageStatistics，不重新扫描像素。
+    """
+
+    WIDTH = 256
+    HEIGHT = 100
+    COLORS = {'R': '#d04040', 'G': '#40a040', 'B': '#4060d0', 'gray': '#303030'}
+
+    def __init__(self, parent):
+        self.canvas = tk.Canvas(parent, width=self.WIDTH, height=self.HEIGHT,
+                                bg='white', highlightthickness=0)
+        self.canvas.pack()
+        self.label = tk.Label(parent, anchor=tk.W, justify=tk.LEFT)
+        self.label.pack(fill=tk.X)
+
+    def show(self, stats):
+        self.canvas.delete('all')
+        bands = [band for band in stats.bands if band in self.COLORS] + ['gray']
+        peak = max(int(stats.histogram(band).max()) for band in bands)
+        if not peak:
+            self.label.configure(text="")
+            return
+        scale = (self.HEIGHT - 1) / peak
+        for band in bands:
+            points = []
+            for level, count in enumerate(stats.histogram(band).tolist()):
+                points += [level, self.HEIGHT - 1 - count * scale]
+            self.canvas.create_line(*points, fill=self.COLORS[band])
+
+        otsu = stats.otsu()
+        self.canvas.create_line(otsu, 0, otsu, self.HEIGHT, fill='#e08000', dash=(4, 2))
+        levels = stats.multi_otsu(3)
+        for level in levels:
+            self.canvas.create_line(level, 0, level, self.HEIGHT, fill='#8040c0', dash=(1, 2))
+        self.label.configure(text=f"均值 {stats.mean():.1f}  标准差 {stats.std():.1f}\n"
+                                  f"Otsu {otsu}  三级 {levels[0]}/{levels[1]}")
+
+    def clear(self):
+        self.canvas.delete('all')
+        self.label.configure(text="")
+
+
 class DisplayPanel:
     def __init__(self, parent, main_window):
         self.main_window = main_window
@@ -169,6 +486,10 @@ class DisplayPanel:
         self.original_frame.pack(fill=tk.BOTH, expand=True, pady=5)
         self.original_canvas = tk.Canvas(self.original_frame, width=800, height=400, bg='white')
         self.original_canvas.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.views = {self.original_canvas: CanvasView(self.original_canvas)}
+        # 点击原图设置区域生长的种子点
+        self.original_canvas.bind("<Button-1>",
+                                  lambda e: self.main_window.select_seed(e.x, e.y))
 
     def create_results_display(self):
         # 创建下方的4个结果显示区域
@@ -182,58 +503,57 @@ class DisplayPanel:
                 frame.grid(row=i, column=j, padx=5, pady=5, sticky="nsew")
                 canvas = tk.Canvas(frame, width=400, height=300, bg='white')
                 canvas.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+                # 点击结果面板选择要保存的结果
+                canvas.bind("<Button-1>",
+                            lambda e, index=len(self.result_canvases): self.main_window.select_result(index))
                 self.result_canvases.append(canvas)
+                self.views[canvas] = CanvasView(canvas)
 
         # 设置网格权重
         for i in range(2):
             self.results_frame.grid_columnconfigure(i, weight=1)
             self.results_frame.grid_rowconfigure(i, weight=1)
 
+    def canvas_size(self, canvas):
+        """获取画布尺寸，画布尚未布局时使用默认尺寸"""
+        return self.views[canvas].canvas_size()
+
+    def result_canvas_size(self):
+        """结果画布尺寸，用于选择预览所用的代理图像"""
+        return self.canvas_size(self.result_canvases[0])
+
+    def highlight_result(self, index):
+        """高亮选中的结果面板"""
+        for i, canvas in enumerate(self.result_canvases):
+            canvas.master.configure(fg='blue' if i == index else 'black')
+
+    def original_position(self, x, y):
+        """原图画布坐标在图像上的相对位置，不在图像上时返回 None"""
+        return self.views[self.original_canvas].relative_position(x, y)
+
+    def mark_seed(self, position):
+        """在原图上标出种子点（相对位置）"""
+        self.views[self.original_canvas].mark(position)
+
     def update_original_image(self, image):
         """更新原始图像显示"""
         self.update_canvas(self.original_canvas, image, "原始图像")
 
-    def update_result_image(self, index, image, title):
-        """更新处理结果图像显示"""
+    def update_result_image(self, index, image, title, fast=False):
+        """更新处理结果图像显示，fast 为 True 时先用快速缩放显示"""
         if 0 <= index < len(self.result_canvases):
-            self.update_canvas(self.result_canvases[index], image, title)
+            self.update_canvas(self.result_canvases[index], image, title, fast)
 
-    def update_canvas(self, canvas, image, title):
+    def clear_result(self, index):
+        """清空处理结果窗口"""
+        if 0 <= index < len(self.result_canvases):
+            canvas = self.result_canvases[index]
+            self.views[canvas].clear()
+            canvas.master.configure(text="处理结果")
+
+    def update_canvas(self, canvas, image, title, fast=False):
         """更新单个画布的显示"""
-        # 清除画布
-        canvas.delete("all")
-        
-        # 获取画布尺寸
-        canvas_width = canvas.winfo_width()
-        canvas_height = canvas.winfo_height()
-        
-        if canvas_width <= 1:  # 如果画布尺寸还未初始化
-            canvas_width = 400
-            canvas_height = 300
-
-        # 计算缩放比例
-        width_ratio = canvas_width / image.width
-        height_ratio = canvas_height / image.height
-        scale = min(width_ratio, height_ratio) * 0.9
-
-        # 缩放图像
-        display_width = int(image.width * scale)
-        display_height = int(image.height * scale)
-        display_image = image.resize((display_width, display_height), Image.Resampling.LANCZOS)
-
-        # 创建PhotoImage对象
-        photo = ImageTk.PhotoImage(display_image)
-        # 保存引用防止被垃圾回收
-        if not hasattr(canvas, 'images'):
-            canvas.images = []
-        canvas.images.append(photo)
-
-        # 计算居中位置
-        x = (canvas_width - display_width) // 2
-        y = (canvas_height - display_height) // 2
-
-        # 显示图像
-        canvas.create_image(x, y, anchor=tk.NW, image=photo)
+        self.views[canvas].show(image, fast)
         
         # 更新标题
         canvas.master.configure(text=title)
\ No newline at end of file
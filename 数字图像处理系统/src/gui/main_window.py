@@ -1,19 +1,118 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
+import itertools
+import os
+from functools import partial
 from PIL import Image, ImageTk
-from ..gui.components import ControlPanel, DisplayPanel
+from ..gui.components import ControlPanel, DisplayPanel, SweepWindow
 from ..processors import GeometricProcessor, EnhanceProcessor, SmoothProcessor, SegmentProcessor
+from ..processors.pipeline import Pipeline
+from ..processors.sweep import ParameterSweep
+from ..utils.scheduler import ProcessingScheduler
+from ..utils.result_cache import ResultCache
+from ..utils.loaded_image import LoadedImage
+from ..utils.image_export import EXPORT_FORMATS, export_image, format_for_path
+from ..utils.instrumentation import metrics, ENV_VAR
 
 class MainWindow:
+    # 每组变换的4个结果面板：(标题, 操作名, 处理函数, 依赖的参数)
+    # 操作名为 None 表示直接显示原图
+    RESULT_SLOTS = {
+        "geometric": [
+            ("平移变换", "translate", GeometricProcessor.translate, ('translate_x', 'translate_y')),
+            ("旋转变换", "rotate", GeometricProcessor.rotate, ('rotate',)),
+            ("缩放变换", "scale", GeometricProcessor.scale, ('scale',)),
+            ("镜像变换", "mirror", GeometricProcessor.mirror, ())
+        ],
+        "enhance": [
+            ("亮度调整", "adjust_brightness", EnhanceProcessor.adjust_brightness, ('brightness',)),
+            ("对比度调整", "adjust_contrast", EnhanceProcessor.adjust_contrast, ('contrast',)),
+            ("直方图均衡化", "equalize", EnhanceProcessor.equalize, ()),
+            ("CLAHE", "clahe", EnhanceProcessor.clahe, ('clahe_clip',))
+        ],
+        "smooth": [
+            ("均值滤波", "mean_filter", SmoothProcessor.mean_filter, ('mean_radius',)),
+            ("高斯滤波", "gaussian_filter", SmoothProcessor.gaussian_filter, ('gaussian_radius',)),
+            ("中值滤波", "median_filter", SmoothProcessor.median_filter, ('median_radius',)),
+            ("原图对比", None, None, ())
+        ],
+        "segment": [
+            ("阈值分割", "threshold_segment", SegmentProcessor.threshold_segment, ('threshold',)),
+            ("Canny边缘检测", "canny_edge", SegmentProcessor.canny_edge, ('edge_low', 'edge_high')),
+            ("区域生长", "region_growing", SegmentProcessor.region_growing,
+             ('region_seed', 'region_threshold')),
+            ("原图对比", None, None, ())
+        ]
+    }
+
+    # 与图像尺寸相关的参数，在代理图像上按比例缩放
+    SPATIAL_PARAMS = {
+        'translate_x': 'offset',
+        'translate_y': 'offset',
+        'mean_radius': 'radius',
+        'gaussian_radius': 'radius',
+        'median_radius': 'radius'
+    }
+
+    # 面板参数 -> 操作（processors.registry）的参数名，参数扫描时使用
+    SWEEP_PARAMS = {
+        'translate_x': 'tx',
+        'translate_y': 'ty',
+        'rotate': 'angle',
+        'scale': 'scale_factor',
+        'brightness': 'factor',
+        'contrast': 'factor',
+        'clahe_clip': 'clip_limit',
+        'mean_radius': 'radius',
+        'gaussian_radius': 'radius',
+        'median_radius': 'radius',
+        'threshold': 'threshold',
+        'edge_low': 'low_threshold',
+        'edge_high': 'high_threshold',
+        'region_seed': 'seed',
+        'region_threshold': 'threshold'
+    }
+    # 参数扫描时每个参数的取值个数，按扫描的参数个数；联系表每格的边长
+    SWEEP_STEPS = {1: 12, 2: 5}
+    SWEEP_CELL = 192
+
     def __init__(self, root):
         self.root = root
         self.root.title("数字图像处理系统")
         
         # 初始化变量
         self.image = None
+        self.image_path = None
+        self.loaded = None
+        self.pyramid = None
         self.photo_refs = {}
         self.current_transform = None
         
+        # 结果缓存：键为 (图像标识, 金字塔层级, 操作名, 参数值)，每次打开图像分配新的标识
+        self.result_cache = ResultCache()
+        self.image_tokens = itertools.count()
+        self.image_token = None
+        # 各结果面板最近一次请求的键，以及已显示的 (键, 图像, 金字塔层级)
+        self.slot_keys = {}
+        self.slot_results = {}
+        self.selected_result = 0
+        # 区域生长种子点在原图上的相对位置，None 表示图像中心
+        self.region_seed = None
+        # 参数扫描结果窗口，第一次扫描时创建
+        self.sweep_window = None
+        
+        # 后台处理调度器，结果通过 after() 回到 Tk 主线程
+        self.scheduler = ProcessingScheduler(on_error=self.on_process_error)
+        self.scheduler.attach_to_tk(self.root)
+        # 导出在单独的线程中依次进行，换图或重新计算时不会被取消
+        self.exporter = ProcessingScheduler(max_workers=1)
+        self.exporter.attach_to_tk(self.root)
+        
+        # 耗时统计浮层，显示时才开启统计
+        self.stats_label = None
+        self.stats_job = None
+        self.root.bind("<F12>", lambda e: self.toggle_stats())
+        
         # 创建主界面
         self.create_main_ui()
     
@@ -34,111 +133,433 @@ class MainWindow:
         )
         if file_path:
             try:
-                self.image = Image.open(file_path)
-                self.display_panel.update_original_image(self.image)
+                # 解码并规范化模式一次，灰度图、金字塔等派生视图由各处理器共用
+                loaded = LoadedImage.open(file_path)
+                self.cancel_region_indexes()
+                self.loaded = loaded
+                self.image = self.loaded.image
+                self.image_path = file_path
+                self.pyramid = self.loaded.pyramid
+                self.image_token = next(self.image_tokens)
+                # 丢弃上一张图像尚未完成的处理结果和缓存
+                self.scheduler.cancel()
+                self.result_cache.clear()
+                self.slot_keys = {}
+                self.slot_results = {}
+                level = self.pyramid.level_for(
+                    *self.display_panel.canvas_size(self.display_panel.original_canvas))
+                self.display_panel.update_original_image(self.pyramid[level])
+                # 种子点回到图像中心，并在后台为其构建区域生长索引
+                self.region_seed = None
+                self.display_panel.mark_seed((0.5, 0.5))
+                self.prepare_region_indexes()
+                # 直方图统计量缓存在 LoadedImage 上，均衡化、CLAHE 和自动阈值共用
+                self.control_panel.histogram_view.show(self.loaded.stats)
                 messagebox.showinfo("提示", "图片打开成功！")
             except Exception as e:
                 messagebox.showerror("错误", f"打开图片时出错：{str(e)}")
     
     def save_image(self):
-        if hasattr(self, 'processed_image') and self.processed_image:
-            save_path = filedialog.asksaveasfilename(defaultextension=".png")
-            if save_path:
-                self.processed_image.save(save_path)
-                messagebox.showinfo("提示", "图片保存成功！")
+        """在后台保存选中结果面板的全分辨率图像，格式与选项取自导出设置"""
+        index = self.selected_result
+        if index not in self.slot_results:
+            messagebox.showerror("错误", "没有可保存的处理结果！")
+            return
+        key, options = self.control_panel.export_settings()
+        selected = EXPORT_FORMATS[key]
+        filetypes = [(fmt.name, ' '.join('*' + ext for ext in fmt.extensions))
+                     for fmt in [selected] + [f for f in EXPORT_FORMATS.values() if f is not selected]]
+        save_path = filedialog.asksaveasfilename(defaultextension=selected.extension,
+                                                 filetypes=filetypes)
+        if not save_path:
+            return
+        # 扩展名是其他格式时按该格式的默认选项保存
+        path_key = format_for_path(save_path)
+        if path_key != key:
+            options = {}
+        self.export_slots([(index, save_path)], path_key, options)
+
+    def export_all(self):
+        """按导出设置把所有结果面板的全分辨率图像保存到所选目录
+
+        文件名为 <原图文件名>_<操作名或流水线输出节点>.<扩展名>，原图对比面板不导出。
+        """
+        indexes = [index for index in sorted(self.slot_results) if self.slot_name(index)]
+        if not indexes:
+            messagebox.showerror("错误", "没有可导出的处理结果！")
+            return
+        directory = filedialog.askdirectory(title="选择导出目录")
+        if not directory:
+            return
+        key, options = self.control_panel.export_settings()
+        stem = os.path.splitext(os.path.basename(self.image_path))[0]
+        extension = EXPORT_FORMATS[key].extension
+        self.export_slots([(index, os.path.join(directory, f"{stem}_{self.slot_name(index)}{extension}"))
+                           for index in indexes], key, options)
+
+    def slot_name(self, index):
+        """结果面板在导出文件名中的名称，原图对比面板返回 None"""
+        if self.current_transform == 'pipeline':
+            return self.slot_results[index][0]
+        return self.RESULT_SLOTS[self.current_transform][index][1]
+
+    def export_slots(self, targets, key, options):
+        """在导出线程中保存 [(面板序号, 路径), ...]，全部完成后汇报文件大小和耗时
+
+        显示的是预览结果时，全分辨率结果也在导出线程中计算：处理线程上该面板
+        的任务会被拖动滑动条等新任务替换，导出不能依赖它完成。编码器边编码边
+        写入磁盘，界面在保存期间保持响应。
+        """
+        progress = {'count': len(targets), 'results': [], 'errors': []}
+        for index, path in targets:
+            self.exporter.submit(
+                path, self.export_result, self.full_resolution(index), path, key, **options,
+                callback=partial(self.on_exported, progress),
+                error_callback=partial(self.on_export_error, progress, path)
+            )
+
+    def full_resolution(self, index):
+        """返回计算结果面板全分辨率结果的函数，可在任意线程中调用"""
+        _, image, level = self.slot_results[index]
+        if level == 0:
+            return lambda: image
+        _, operation, func, param_names = self.RESULT_SLOTS[self.current_transform][index]
+        source = self.pyramid[0]
+        if func is None:
+            return lambda: source
+        args = tuple(self.param_value(name, 0) for name in param_names)
+        key = (self.image_token, 0, operation, args)
+
+        def compute():
+            result = self.result_cache.get(key)
+            return result if result is not None else self.compute_result(key, func, source, args)
+        return compute
+
+    @staticmethod
+    def export_result(compute, path, key, **options):
+        return export_image(compute(), path, key, **options)
+
+    def on_exported(self, progress, result):
+        progress['results'].append(result)
+        self.report_exports(progress)
+
+    def on_export_error(self, progress, path, error):
+        progress['errors'].append(f"{path}：{error}")
+        self.report_exports(progress)
 
-    def update_results(self):
-        """更新处理结果"""
-        if not self.image or not self.current_transform:
+    def report_exports(self, progress):
+        """一批导出全部完成后提示各文件的格式、大小和耗时"""
+        results, errors = progress['results'], progress['errors']
+        if len(results) + len(errors) < progress['count']:
+            return
+        if errors:
+            messagebox.showerror("错误", "保存图片时出错：\n" + "\n".join(errors))
+        if len(results) == 1 and progress['count'] == 1:
+            messagebox.showinfo("提示", f"图片保存成功！\n{results[0].describe()}")
+        elif results:
+            lines = [f"{os.path.basename(r.path)}：{r.describe()}" for r in results]
+            total = sum(r.nbytes for r in results) / 2**20
+            seconds = sum(r.seconds for r in results)
+            messagebox.showinfo("提示", f"已导出 {len(results)} 个文件到 "
+                                        f"{os.path.dirname(results[0].path)}，共 {total:.1f} MB，"
+                                        f"{seconds:.2f} s\n" + "\n".join(lines))
+
+    def auto_threshold(self):
+        """把阈值滑动条设为整幅图像灰度直方图的 Otsu 阈值"""
+        if not self.image:
+            messagebox.showerror("错误", "请先选择并加载图像！")
+            return
+        self.control_panel.param_vars['threshold'].set(self.loaded.stats.otsu())
+        if self.current_transform == 'segment':
+            self.update_results()
+
+    def select_seed(self, x, y):
+        """点击原图设置区域生长的种子点，并在后台为其构建索引"""
+        if not self.image:
+            return
+        position = self.display_panel.original_position(x, y)
+        if position is None:
+            return
+        self.region_seed = position
+        self.display_panel.mark_seed(position)
+        self.prepare_region_indexes()
+        if self.current_transform == 'segment':
+            self.update_results()
+
+    def seed_at(self, level):
+        """种子点在金字塔第 level 级图像上的 (row, col)"""
+        width, height = self.pyramid[level].size
+        fx, fy = self.region_seed or (0.5, 0.5)
+        return min(int(fy * height), height - 1), min(int(fx * width), width - 1)
+
+    def prepare_region_indexes(self):
+        """为当前种子点构建预览级与全分辨率的区域生长索引
+
+        索引建好后拖动区域生长阈值只需读取索引；建好之前仍用泛洪填充计算。
+        之前的种子尚未建好的索引先中止，已建好的保留，点回原处时直接使用。
+        """
+        self.cancel_region_indexes()
+        preview = self.pyramid.level_for(*self.display_panel.result_canvas_size())
+        # 预览级先建好，拖动滑动条时即可使用
+        for level in dict.fromkeys((preview, 0)):
+            self.loaded.level(level).prepare_region_index(self.seed_at(level))
+
+    def cancel_region_indexes(self):
+        """中止当前图像各级尚未建好的区域生长索引"""
+        if self.loaded is not None:
+            for level in range(len(self.pyramid)):
+                self.loaded.level(level).cancel_region_indexes()
+
+    def select_result(self, index):
+        """选择要保存的结果面板"""
+        self.selected_result = index
+        self.display_panel.highlight_result(index)
+
+    def scaled_param(self, name, value, scale):
+        """将参数换算到缩放比例为 scale 的代理图像上"""
+        kind = self.SPATIAL_PARAMS.get(name)
+        if kind is None or scale == 1:
+            return value
+        if kind == 'offset':
+            return int(round(value * scale))
+        return max(1, int(round(value * scale)))
+
+    def param_value(self, name, level):
+        """面板参数在金字塔第 level 级代理图像上的取值"""
+        if name == 'region_seed':
+            return self.seed_at(level)
+        value = self.control_panel.param_vars[name].get()
+        return self.scaled_param(name, value, self.pyramid.scale(level))
+
+    def update_results(self, preview=False):
+        """更新处理结果
+
+        preview 为 True 时（如拖动滑动条）在与结果画布尺寸相当的代理图像上计算，
+        否则计算全分辨率结果。只重新计算参数发生变化的面板，参数回到之前的
+        取值时直接使用缓存结果。处理任务在后台线程中执行，完成后在 Tk 主线程
+        中刷新对应的结果面板。
+        """
+        if not self.image or self.current_transform not in self.RESULT_SLOTS:
             return
         
-        params = self.control_panel.param_vars
+        level = 0
+        if preview:
+            level = self.pyramid.level_for(*self.display_panel.result_canvas_size())
         
-        if self.current_transform == "geometric":
-            # 几何变换处理
-            translated = GeometricProcessor.translate(
-                self.image, 
-                params['translate_x'].get(), 
-                params['translate_y'].get()
-            )
-            self.display_panel.update_result_image(0, translated, "平移变换")
-            
-            rotated = GeometricProcessor.rotate(self.image, params['rotate'].get())
-            self.display_panel.update_result_image(1, rotated, "旋转变换")
-            
-            scaled = GeometricProcessor.scale(self.image, params['scale'].get())
-            self.display_panel.update_result_image(2, scaled, "缩放变换")
-            
-            mirrored = self.image.transpose(Image.FLIP_LEFT_RIGHT)
-            self.display_panel.update_result_image(3, mirrored, "镜像变换")
-
-        elif self.current_transform == "enhance":
-            # 图像增强处理
-            brightened = EnhanceProcessor.adjust_brightness(
-                self.image, 
-                params['brightness'].get()
-            )
-            self.display_panel.update_result_image(0, brightened, "亮度调整")
-            
-            contrasted = EnhanceProcessor.adjust_contrast(
-                self.image, 
-                params['contrast'].get()
-            )
-            self.display_panel.update_result_image(1, contrasted, "对比度调整")
-            
-            equalized = EnhanceProcessor.equalize(self.image)
-            self.display_panel.update_result_image(2, equalized, "直方图均衡化")
-            
-            self.display_panel.update_result_image(3, self.image, "原图对比")
-
-        elif self.current_transform == "smooth":
-            # 图像平滑处理
-            mean = SmoothProcessor.mean_filter(
-                self.image, 
-                params['mean_radius'].get()
-            )
-            self.display_panel.update_result_image(0, mean, "均值滤波")
-            
-            gaussian = SmoothProcessor.gaussian_filter(
-                self.image, 
-                params['gaussian_radius'].get()
-            )
-            self.display_panel.update_result_image(1, gaussian, "高斯滤波")
-            
-            median = SmoothProcessor.median_filter(
-                self.image, 
-                params['median_radius'].get()
-            )
-            self.display_panel.update_result_image(2, median, "中值滤波")
-            
-            self.display_panel.update_result_image(3, self.image, "原图对比")
-
-        elif self.current_transform == "segment":
-            # 图像分割处理
-            threshold = SegmentProcessor.threshold_segment(
-                self.image, 
-                params['threshold'].get()
-            )
-            self.display_panel.update_result_image(0, threshold, "阈值分割")
-            
-            edges = SegmentProcessor.canny_edge(
-                self.image,
-                params['edge_low'].get(),
-                params['edge_high'].get()
-            )
-            self.display_panel.update_result_image(1, edges, "Canny边缘检测")
-            
-            # 使用图像中心点作为种子点
-            w, h = self.image.size
-            seed_point = (h//2, w//2)
-            region = SegmentProcessor.region_growing(
-                self.image,
-                seed_point,
-                params['region_threshold'].get()
+        for index in range(len(self.RESULT_SLOTS[self.current_transform])):
+            self.update_slot(index, level)
+
+    def render_full(self):
+        """计算当前所有结果面板的全分辨率结果"""
+        self.update_results(preview=False)
+
+    def update_slot(self, index, level):
+        """在金字塔第 level 级上更新单个结果面板"""
+        title, operation, func, param_names = self.RESULT_SLOTS[self.current_transform][index]
+        image = self.pyramid[level]
+        args = tuple(self.param_value(name, level) for name in param_names)
+        key = (self.image_token, level, operation, args)
+        show = partial(self.show_result, index, title, key, level)
+
+        # 该面板的输入没有变化：已显示或正在计算中
+        if self.slot_keys.get(index) == key:
+            return
+        self.slot_keys[index] = key
+
+        # 原图无需计算；有缓存时直接显示，同时作废该面板上尚未完成的旧任务
+        result = image if func is None else self.result_cache.get(key)
+        if result is not None:
+            self.scheduler.cancel(index)
+            show(result)
+            return
+
+        self.scheduler.submit(
+            index, self.compute_result, key, func, image, args,
+            callback=show,
+            error_callback=partial(self.on_process_error, index=index)
+        )
+
+    def run_pipeline(self):
+        """载入流水线 JSON 文件，在全分辨率图像上计算各输出节点并显示在结果面板中
+
+        流水线与批处理命令（cli.py batch -p）共用同一文件格式；中间结果以内容
+        哈希为键存入结果缓存，再次运行或只修改了部分节点时直接复用。
+        """
+        if not self.image:
+            messagebox.showerror("错误", "请先选择并加载图像！")
+            return
+        file_path = filedialog.askopenfilename(filetypes=[("流水线", "*.json")])
+        if not file_path:
+            return
+        try:
+            pipeline = Pipeline.load(file_path, cache=self.result_cache)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("错误", f"载入流水线时出错：{str(e)}")
+            return
+
+        # 滑动条不再刷新结果面板
+        self.current_transform = 'pipeline'
+        self.scheduler.cancel()
+        self.slot_keys = {}
+        self.slot_results = {}
+        # 每次载入图像都换新的标记且清空缓存，以它作为源图像的键，不在界面
+        # 线程中对整幅像素求哈希
+        pipeline.set_input(self.image, key=f"image-{self.image_token}")
+        outputs = pipeline.outputs[:len(self.display_panel.result_canvases)]
+        for index in range(len(self.display_panel.result_canvases)):
+            if index >= len(outputs):
+                self.display_panel.clear_result(index)
+                continue
+            name = outputs[index]
+            self.scheduler.submit(
+                index, pipeline.evaluate, name,
+                callback=partial(self.show_result, index, name, name, 0),
+                error_callback=partial(self.on_process_error, index=index)
             )
-            self.display_panel.update_result_image(2, region, "区域生长")
-            
-            self.display_panel.update_result_image(3, self.image, "原图对比")
+
+    def sweep_parameters(self):
+        """在选中结果面板的参数范围内批量计算，结果以联系表显示
+
+        每个滑动条参数在其范围内等间隔取 SWEEP_STEPS 个值，各组合在预览所用的
+        代理图像上并行计算，共用灰度图、直方图和 Canny 梯度等预计算。半径、
+        平移量等与尺寸相关的参数换算到代理图像上后大多相同，扫描这些参数时
+        改用原图中心按原始分辨率裁出的区域。点击联系表中的一格把该组参数设到
+        滑动条上。
+        """
+        if not self.image:
+            messagebox.showerror("错误", "请先选择并加载图像！")
+            return
+        if self.current_transform not in self.RESULT_SLOTS:
+            messagebox.showerror("错误", "请先选择一组图像处理！")
+            return
+        slots = self.RESULT_SLOTS[self.current_transform]
+        title, operation, _, param_names = slots[self.selected_result]
+        swept = [name for name in param_names if name in self.control_panel.param_ranges]
+        if not swept:
+            messagebox.showerror("错误", f"{title}没有可扫描的参数！")
+            return
+
+        width, height = self.display_panel.result_canvas_size()
+        if any(name in self.SPATIAL_PARAMS for name in swept):
+            level = 0
+            left = max(0, (self.image.width - width) // 2)
+            top = max(0, (self.image.height - height) // 2)
+            image = self.image.crop((left, top, min(self.image.width, left + width),
+                                     min(self.image.height, top + height)))
+            source = f"原图中心区域 {image.width}x{image.height}"
+        else:
+            level = self.pyramid.level_for(width, height)
+            image = self.pyramid[level]
+            source = f"代理图像 {image.width}x{image.height}"
+        scale = self.pyramid.scale(level)
+        count = self.SWEEP_STEPS.get(len(swept), 4)
+        # 代理图像上的取值 -> 面板上的取值，换算后相同的取值（如较小的半径）只保留第一个
+        values = {}
+        for name in swept:
+            values[name] = {}
+            for value in self.control_panel.sweep_values(name, count):
+                values[name].setdefault(self.scaled_param(name, value, scale), value)
+        grid = {self.SWEEP_PARAMS[name]: list(values[name]) for name in swept}
+        fixed = {self.SWEEP_PARAMS[name]: self.param_value(name, level)
+                 for name in param_names if name not in swept}
+        try:
+            sweep = ParameterSweep(operation, grid, fixed)
+        except ValueError as e:
+            messagebox.showerror("错误", f"参数扫描出错：{str(e)}")
+            return
+        # 各组合对应的面板参数取值，顺序与网格相同
+        settings = [dict(zip(swept, combination))
+                    for combination in itertools.product(*(v.values() for v in values.values()))]
+        self.scheduler.submit(
+            'sweep', self.compute_sweep, sweep, image, swept, settings,
+            callback=partial(self.show_sweep, title, source, settings),
+            error_callback=self.on_process_error
+        )
+
+    def compute_sweep(self, sweep, image, swept, settings):
+        """在后台线程中完成参数扫描并生成联系表，标注面板上的参数取值"""
+        report = sweep.run(image, thumbnail=self.SWEEP_CELL, keep_images=False)
+        labels = {result.index: result.label(swept, settings[result.index])
+                  for result in report.results}
+        return report, report.contact_sheet(labels, self.SWEEP_CELL)
+
+    def show_sweep(self, title, source, settings, outcome):
+        report, sheet = outcome
+        if self.sweep_window is None or not self.sweep_window.exists():
+            self.sweep_window = SweepWindow(
+                self.root, lambda index: self.apply_sweep_setting(settings[index]))
+        else:
+            self.sweep_window.on_select = lambda index: self.apply_sweep_setting(settings[index])
+        self.sweep_window.show(
+            f"参数扫描 - {title}", sheet,
+            f"{len(report.results)} 组参数，{source}，共用预计算 "
+            f"{report.shared_seconds * 1000:.0f} ms，总耗时 {report.elapsed:.2f} s\n"
+            f"点击一格把该组参数设到滑动条上")
+
+    def apply_sweep_setting(self, setting):
+        """把参数扫描中选中的一组参数设到滑动条上并刷新结果"""
+        for name, value in setting.items():
+            self.control_panel.param_vars[name].set(value)
+        self.update_results()
+
+    def show_result(self, index, title, key, level, image):
+        """显示结果并记录其分辨率"""
+        self.slot_results[index] = (key, image, level)
+        if level:
+            title = f"{title}（预览）"
+        # 预览结果在拖动过程中频繁刷新，使用快速缩放
+        self.display_panel.update_result_image(index, image, title, fast=bool(level))
+
+    def compute_result(self, key, func, image, args):
+        """在后台线程中计算结果并写入缓存"""
+        result = func(image, *args)
+        # 载入新图像后才完成的旧任务不再写入缓存，否则其固定条目永远不会被淘汰
+        if key[0] != self.image_token:
+            return result
+        # 不依赖参数的结果在图像不变时一直保留
+        self.result_cache.put(key, result, pinned=not args)
+        return result
+
+    def on_process_error(self, error, index=None):
+        """后台处理任务出错时提示用户"""
+        # 允许相同参数再次触发计算
+        if index is not None:
+            self.slot_keys.pop(index, None)
+        messagebox.showerror("错误", f"处理图像时出错：{str(error)}")
+
+    def toggle_stats(self):
+        """显示或隐藏耗时统计浮层"""
+        if self.stats_label is not None:
+            self.root.after_cancel(self.stats_job)
+            self.stats_label.destroy()
+            self.stats_label = self.stats_job = None
+            # 通过环境变量开启的统计在整个运行期间保持开启
+            if not os.environ.get(ENV_VAR):
+                metrics.disable()
+            return
+        metrics.enable()
+        self.stats_label = tk.Label(self.display_panel.frame, font=("Courier", 9),
+                                    justify=tk.LEFT, anchor=tk.NW, bg='#ffffe0',
+                                    relief=tk.SOLID, borderwidth=1)
+        self.stats_label.place(relx=1.0, rely=0.0, anchor=tk.NE)
+        self.refresh_stats()
+
+    def refresh_stats(self):
+        text = metrics.format_table(limit=15)
+        self.stats_label.configure(text=f"{text}\n缓存：{len(self.result_cache)} 项，"
+                                        f"{self.result_cache.bytes_used / 2**20:.0f} MB，"
+                                        f"命中 {self.result_cache.hits} / 未命中 {self.result_cache.misses}")
+        self.stats_job = self.root.after(500, self.refresh_stats)
+
+    def export_stats(self):
+        """导出耗时统计为 JSON 文件，同时写入日志"""
+        save_path = filedialog.asksaveasfilename(defaultextension=".json",
+                                                 filetypes=[("JSON", "*.json")])
+        if not save_path:
+            return
+        metrics.export_json(save_path)
+        metrics.log_summary()
+        messagebox.showinfo("提示", "统计数据导出成功！")
 
     def show_transform_results(self, transform_type):
         """显示变换结果"""
@@ -147,4 +568,4 @@ class MainWindow:
             return
         
         self.current_transform = transform_type
-        self.update_results()
\ No newline at end of file
+        self.update_results(preview=True)
\ No newline at end of file
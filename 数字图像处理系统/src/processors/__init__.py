@@ -1,11 +1,31 @@
-from .geometric import GeometricProcessor
-from .enhance import EnhanceProcessor
-from .smooth import SmoothProcessor
-from .segment import SegmentProcessor
-
-__all__ = [
-    'GeometricProcessor',
-    'EnhanceProcessor',
-    'SmoothProcessor',
-    'SegmentProcessor'
-] 
\ No newline at end of file
+import importlib
+
+# 导出名 -> 所在子模块。子模块在第一次访问对应名称时才导入，只用到
+# 其中一部分（如 affine、region_growing）时不会连带导入全部处理器
+_EXPORTS = {
+    'GeometricProcessor': '.geometric',
+    'AffineTransform': '.affine',
+    'ArrayProcessor': '.arrays',
+    'EnhanceProcessor': '.enhance',
+    'SmoothProcessor': '.smooth',
+    'SegmentProcessor': '.segment',
+    'RegionGrower': '.region_growing',
+    'PointLUT': '.lut',
+    'PointChain': '.lut',
+    'ParameterSweep': '.sweep'
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
\ No newline at end of file
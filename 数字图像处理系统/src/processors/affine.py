@@ -0,0 +1,224 @@
+import math
+
+from PIL import Image
+
+# 插值方式名称 -> PIL 常量；Image.transform 不支持 LANCZOS，仅轴对齐变换可用
+RESAMPLE = {
+    'nearest': Image.Resampling.NEAREST,
+    'bilinear': Image.Resampling.BILINEAR,
+    'bicubic': Image.Resampling.BICUBIC,
+    'lanczos': Image.Resampling.LANCZOS
+}
+
+BOUNDS = ('same', 'expand')
+
+# 与像素网格对齐的翻转和直角旋转：逆变换系数 -> transpose 方法
+# 系数中的 w、h 为源图像宽高，'swap' 表示输出宽高互换
+_TRANSPOSES = [
+    ((-1, 0, 'w', 0, 1, 0), Image.Transpose.FLIP_LEFT_RIGHT, False),
+    ((1, 0, 0, 0, -1, 'h'), Image.Transpose.FLIP_TOP_BOTTOM, False),
+    ((-1, 0, 'w', 0, -1, 'h'), Image.Transpose.ROTATE_180, False),
+    ((0, -1, 'w', 1, 0, 0), Image.Transpose.ROTATE_90, True),
+    ((0, 1, 0, -1, 0, 'h'), Image.Transpose.ROTATE_270, True),
+    ((0, 1, 0, 1, 0, 0), Image.Transpose.TRANSPOSE, True),
+    ((0, -1, 'w', -1, 0, 'h'), Image.Transpose.TRANSVERSE, True)
+]
+
+_EPS = 1e-6
+
+
+def _multiply(m, n):
+    """3x3 矩阵乘法，按固定顺序累加，保证与 PIL 内部的浮点计算一致"""
+    return [[m[i][0] * n[0][j] + m[i][1] * n[1][j] + m[i][2] * n[2][j] for j in range(3)]
+            for i in range(3)]
+
+
+def _snap(value):
+    """把与整数相差极小的坐标对齐到整数"""
+    nearest = round(value)
+    return nearest if abs(value - nearest) < _EPS else value
+
+
+class AffineTransform:
+    """可组合的二维仿射变换
+
+    translate、rotate、scale、flip、shear 按调用顺序依次作用在图像上，
+    合成为一个 3x3 矩阵，apply() 只做一次重采样。坐标以像素左上角为原点，
+    像素中心位于 (x + 0.5, y + 0.5)；未指定中心时以 size 对应图像的中心为准。
+    同时维护正向矩阵和逆矩阵：各步骤的逆矩阵直接按解析式构造，旋转的计算
+    方式与 Image.rotate 相同，因此包装后的 GeometricProcessor.rotate 结果不变。
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.forward = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+        self.inverse = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+
+    @property
+    def center(self):
+        width, height = self.size
+        return width / 2.0, height / 2.0
+
+    def _then(self, forward, inverse):
+        """追加一步变换：正向矩阵左乘，逆矩阵右乘"""
+        self.forward = _multiply(forward, self.forward)
+        self.inverse = _multiply(self.inverse, inverse)
+        return self
+
+    def _about(self, matrix, center):
+        """把绕原点的 2x2 线性变换改为绕 center 进行"""
+        cx, cy = self.center if center is None else center
+        (a, b), (d, e) = matrix
+        return [[a, b, (a * -cx + b * -cy) + cx],
+                [d, e, (d * -cx + e * -cy) + cy],
+                [0.0, 0.0, 1.0]]
+
+    def translate(self, tx, ty):
+        """平移，内容向右移动 tx、向下移动 ty"""
+        return self._then([[1.0, 0.0, tx], [0.0, 1.0, ty], [0.0, 0.0, 1.0]],
+                          [[1.0, 0.0, -tx], [0.0, 1.0, -ty], [0.0, 0.0, 1.0]])
+
+    def rotate(self, angle, center=None):
+        """逆时针旋转 angle 度"""
+        # 与 Image.rotate 相同的取模和舍入
+        angle = -math.radians(angle % 360.0)
+        cos, sin = round(math.cos(angle), 15), round(math.sin(angle), 15)
+        return self._then(self._about([[cos, -sin], [sin, cos]], center),
+                          self._about([[cos, sin], [-sin, cos]], center))
+
+    def scale(self, sx, sy=None, center=None):
+        """缩放，sy 默认与 sx 相同"""
+        sy = sx if sy is None else sy
+        if not sx or not sy:
+            raise ValueError("缩放比例不能为 0")
+        return self._then(self._about([[sx, 0.0], [0.0, sy]], center),
+                          self._about([[1.0 / sx, 0.0], [0.0, 1.0 / sy]], center))
+
+    def flip(self, horizontal=True, vertical=False, center=None):
+        """水平和/或垂直翻转"""
+        sx = -1.0 if horizontal else 1.0
+        sy = -1.0 if vertical else 1.0
+        matrix = self._about([[sx, 0.0], [0.0, sy]], center)
+        return self._then(matrix, matrix)
+
+    def shear(self, shx, shy=0.0, center=None):
+        """错切：x' = x + shx * y，y' = y + shy * x"""
+        det = 1.0 - shx * shy
+        if abs(det) < _EPS:
+            raise ValueError("错切系数使变换不可逆")
+        return self._then(self._about([[1.0, shx], [shy, 1.0]], center),
+                          self._about([[1.0 / det, -shx / det], [-shy / det, 1.0 / det]], center))
+
+    def concat(self, other):
+        """在当前变换之后追加另一个变换"""
+        return self._then(other.forward, other.inverse)
+
+    @classmethod
+    def from_steps(cls, size, steps):
+        """由 [(步骤名, 参数元组), ...] 构造，步骤名为上述方法名，mirror 等同于 flip"""
+        transform = cls(size)
+        for name, args in steps:
+            method = 'flip' if name == 'mirror' else name
+            if method not in ('translate', 'rotate', 'scale', 'flip', 'shear'):
+                raise ValueError(f"未知的仿射变换步骤：{name}")
+            getattr(transform, method)(*args)
+        return transform
+
+    @property
+    def coefficients(self):
+        """Image.transform 所需的逆变换系数 (a, b, c, d, e, f)"""
+        (a, b, c), (d, e, f), _ = self.inverse
+        return a, b, c, d, e, f
+
+    def map_point(self, x, y):
+        (a, b, c), (d, e, f), _ = self.forward
+        return a * x + b * y + c, d * x + e * y + f
+
+    def output_box(self, bounds='same'):
+        """输出图像尺寸，以及 'expand' 时需要追加的平移量"""
+        if bounds not in BOUNDS:
+            raise ValueError(f"未知的边界策略：{bounds}（可用：{', '.join(BOUNDS)}）")
+        if bounds == 'same':
+            return self.size, (0.0, 0.0)
+        width, height = self.size
+        corners = [self.map_point(x, y) for x, y in ((0, 0), (width, 0), (0, height), (width, height))]
+        xs = [_snap(x) for x, _ in corners]
+        ys = [_snap(y) for _, y in corners]
+        left, top = math.floor(min(xs)), math.floor(min(ys))
+        size = (max(1, math.ceil(max(xs)) - left), max(1, math.ceil(max(ys)) - top))
+        return size, (-left, -top)
+
+    def apply(self, image, resample='nearest', bounds='same', fill=None):
+        """对图像执行合成后的变换，只进行一次重采样
+
+        resample 为插值方式名称或 PIL 常量；bounds 为 'same'（保持原尺寸）或
+        'expand'（扩展到容纳整幅变换结果）；fill 为图像外区域的填充色，
+        默认为 0（黑色或全透明）。
+        """
+        if isinstance(resample, str):
+            if resample not in RESAMPLE:
+                raise ValueError(f"未知的插值方式：{resample}（可用：{', '.join(RESAMPLE)}）")
+            resample = RESAMPLE[resample]
+        size, (dx, dy) = self.output_box(bounds)
+        transform = self
+        if dx or dy:
+            transform = AffineTransform(self.size).concat(self).translate(dx, dy)
+        coefficients = transform.coefficients
+        # 只在判断变换类型时对齐到整数，实际重采样使用原始系数
+        snapped = tuple(_snap(v) for v in coefficients)
+
+        # 与像素网格对齐的变换直接复制像素
+        if snapped == (1, 0, 0, 0, 1, 0) and size == image.size:
+            return image.copy()
+        method = self._transpose_method(snapped, image.size, size)
+        if method is not None:
+            return image.transpose(method)
+
+        a, b, c, d, e, f = snapped
+        if b == 0 and d == 0 and a > 0 and e > 0 and resample != Image.Resampling.NEAREST:
+            return self._resize(image, size, coefficients, resample, fill)
+
+        if resample not in (Image.Resampling.NEAREST, Image.Resampling.BILINEAR,
+                            Image.Resampling.BICUBIC):
+            # 含旋转或错切时 LANCZOS 不可用，退回双三次插值
+            resample = Image.Resampling.BICUBIC
+        return image.transform(size, Image.Transform.AFFINE, coefficients, resample,
+                               fillcolor=fill)
+
+    @staticmethod
+    def _transpose_method(coefficients, source_size, size):
+        width, height = source_size
+        for pattern, method, swap in _TRANSPOSES:
+            expected = tuple({'w': width, 'h': height}.get(v, v) for v in pattern)
+            if coefficients == expected and size == ((height, width) if swap else (width, height)):
+                return method
+        return None
+
+    @staticmethod
+    def _resize(image, size, coefficients, resample, fill):
+        """仅含缩放和平移的变换：对源图像的可见区域做一次 resize，支持 LANCZOS"""
+        a, _, c, _, e, f = coefficients
+        width, height = image.size
+        # 源图像在输出中占据的区域，与输出范围求交
+        left = _snap(max(0.0, -c / a))
+        top = _snap(max(0.0, -f / e))
+        right = _snap(min(float(size[0]), (width - c) / a))
+        bottom = _snap(min(float(size[1]), (height - f) / e))
+        # resize 只能写入整像素区域，向内取整后再换算回源坐标
+        left, top = math.ceil(left), math.ceil(top)
+        right, bottom = math.floor(right), math.floor(bottom)
+        if right <= left or bottom <= top:
+            return Image.new(image.mode, size, fill or 0)
+
+        box = tuple(_snap(v) for v in (a * left + c, e * top + f, a * right + c, e * bottom + f))
+        box = (max(0, box[0]), max(0, box[1]), min(width, box[2]), min(height, box[3]))
+        target = (right - left, bottom - top)
+        if box == (0, 0, width, height):
+            resized = image.resize(target, resample)
+        else:
+            resized = image.resize(target, resample, box=box)
+        if target == size:
+            return resized
+        result = Image.new(image.mode, size, fill or 0)
+        result.paste(resized, (left, top))
+        return result
\ No newline at end of file
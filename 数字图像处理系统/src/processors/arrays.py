@@ -0,0 +1,235 @@
+import functools
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+from .lut import PointLUT
+from .region_growing import RegionGrower
+from ..utils.image_stats import ImageStatistics, histogram, rgb_to_gray, tile_histograms
+from ..utils.lazy_import import lazy_import
+from ..utils.loaded_image import LoadedImage, normalize_mode
+
+# OpenCV 导入耗时较长，在第一次调用数组后端时才导入
+cv2 = lazy_import('cv2')
+
+
+def _output(out, shape):
+    """检查或分配输出缓冲区"""
+    if out is None:
+        return np.empty(shape, dtype=np.uint8)
+    if out.shape != tuple(shape) or out.dtype != np.uint8:
+        raise ValueError(f"输出缓冲区应为 {tuple(shape)} 的 uint8 数组，"
+                         f"实际为 {out.shape} {out.dtype}")
+    return out
+
+
+def _gray(array, out=None):
+    """灰度数组，彩色数组转换后写入 out（为 None 时新分配）"""
+    return array if array.ndim == 2 else rgb_to_gray(array, out=out)
+
+
+class ArrayProcessor:
+    """NumPy 数组后端
+
+    接受并返回 uint8 数组：灰度图为 (高, 宽)，彩色图为 (高, 宽, 3|4)，
+    通道顺序为 RGB(A)，与 np.asarray(PIL 图像) 相同。各方法都可以通过 out=
+    传入预分配的输出缓冲区，out 也可以是输入数组本身（原地计算）；需要灰度
+    的操作输出为二维数组。结果与 PIL 接口逐字节一致，EnhanceProcessor、
+    SmoothProcessor 和 SegmentProcessor 只是把 PIL 图像转换为数组后调用这里
+    的同名方法。
+    """
+
+    @staticmethod
+    def translate(array, tx, ty, out=None):
+        """输出 (x, y) 取自输入 (x + tx, y + ty)，图像外为 0"""
+        out = _output(out, array.shape)
+        height, width = array.shape[:2]
+        tx, ty = int(tx), int(ty)
+        rows = slice(max(0, -ty), min(height, height - ty))
+        cols = slice(max(0, -tx), min(width, width - tx))
+        if rows.start < rows.stop and cols.start < cols.stop:
+            # 输入与输出重叠（原地平移）时 NumPy 会先复制源区域
+            out[rows, cols] = array[rows.start + ty:rows.stop + ty, cols.start + tx:cols.stop + tx]
+        else:
+            rows = cols = slice(0, 0)
+        out[:rows.start] = 0
+        out[rows.stop:] = 0
+        out[:, :cols.start] = 0
+        out[:, cols.stop:] = 0
+        return out
+
+    @staticmethod
+    def mirror(array, out=None):
+        return cv2.flip(array, 1, dst=_output(out, array.shape))
+
+    @staticmethod
+    def adjust_brightness(array, factor, out=None):
+        return PointLUT.apply(array, PointLUT.brightness(factor), _output(out, array.shape))
+
+    @staticmethod
+    def adjust_contrast(array, factor, mean=None, out=None):
+        """mean 为灰度均值，调用方已有灰度直方图时可直接传入"""
+        if mean is None:
+            mean = PointLUT.histogram_mean(histogram(_gray(array)))
+        return PointLUT.apply(array, PointLUT.contrast(factor, mean), _output(out, array.shape))
+
+    @staticmethod
+    def equalize(array, stats=None, out=None):
+        """stats 为输入图像的 ImageStatistics，已有时省去统计直方图"""
+        # 灰度图直接写入输出缓冲区，再原地映射
+        out = _output(out, array.shape[:2])
+        gray = _gray(array, out)
+        counts = stats.gray if stats is not None else histogram(gray)
+        return PointLUT.apply(gray, PointLUT.equalize(counts.tolist()), out)
+
+    @staticmethod
+    def clahe(array, clip_limit=2.0, grid=8, tiles=None, out=None):
+        """限制对比度的自适应直方图均衡化（CLAHE），输出灰度图，与 cv2.createCLAHE 一致
+
+        把图像分为 grid x grid 个等大的块（尺寸不能整除时先按 OpenCV 的方式
+        补边，见 tile_histograms），各块直方图在 clip_limit 倍平均高度处截断、
+        截去的部分均匀分配后求均衡化映射，像素值由相邻四块的映射按到块中心
+        的距离双线性插值，块中心的位置和 float32 的插值运算与 OpenCV 相同。
+        tiles 为 tile_histograms(灰度图, grid) 的结果，已有时省去分块统计。
+        """
+        gray = _gray(array)
+        tile_height, tile_width, counts = tiles if tiles is not None else tile_histograms(gray, grid)
+        luts = _clahe_luts(counts, clip_limit)
+        y0, y1, wy = _interpolation_weights(tile_height, counts.shape[0], gray.shape[0])
+        x0, x1, wx = _interpolation_weights(tile_width, counts.shape[1], gray.shape[1])
+        y0, y1, wy = y0[:, None], y1[:, None], wy[:, None]
+        one = np.float32(1)
+        top = luts[y0, x0, gray] * (one - wx) + luts[y0, x1, gray] * wx
+        bottom = luts[y1, x0, gray] * (one - wx) + luts[y1, x1, gray] * wx
+        result = top * (one - wy) + bottom * wy
+        out = _output(out, gray.shape)
+        np.rint(result, out=result)
+        np.copyto(out, result, casting='unsafe')
+        return out
+
+    @staticmethod
+    def auto_threshold(array, classes=2, stats=None, out=None):
+        """按 Otsu（classes=2）或多级 Otsu 阈值分割，各类映射为 0-255 间等距的灰度
+
+        stats 为输入图像的 ImageStatistics，已有时直接取其中缓存的阈值。
+        """
+        out = _output(out, array.shape[:2])
+        gray = _gray(array, out)
+        if stats is None:
+            stats = ImageStatistics.from_array(gray)
+        return PointLUT.apply(gray, PointLUT.multi_threshold(stats.multi_otsu(classes)), out)
+
+    @staticmethod
+    def mean_filter(array, radius, out=None):
+        """均值滤波：先水平后垂直两次盒式滤波，每次取整，与 ImageFilter.BoxBlur 一致
+
+        非整数半径时 BoxBlur 对窗口两端的像素按小数部分加权，cv2.blur 没有
+        对应的实现，经 PIL 计算。
+        """
+        out = _output(out, array.shape)
+        if radius != int(radius):
+            blurred = Image.fromarray(array).filter(ImageFilter.BoxBlur(radius))
+            np.copyto(out, np.asarray(blurred))
+            return out
+        size = 2 * int(radius) + 1
+        horizontal = cv2.blur(array, (size, 1), borderType=cv2.BORDER_REPLICATE)
+        return cv2.blur(horizontal, (1, size), dst=out, borderType=cv2.BORDER_REPLICATE)
+
+    @staticmethod
+    def median_filter(array, radius, out=None):
+        """中值滤波，窗口为 (2*radius+1) x (2*radius+1)"""
+        return cv2.medianBlur(array, 2 * int(radius) + 1, dst=_output(out, array.shape))
+
+    @staticmethod
+    def threshold_segment(array, threshold, out=None):
+        out = _output(out, array.shape[:2])
+        return PointLUT.apply(_gray(array, out), PointLUT.threshold(threshold), out)
+
+    @staticmethod
+    def canny_edge(array, low_threshold, high_threshold, out=None):
+        out = _output(out, array.shape[:2])
+        return cv2.Canny(_gray(array, out), low_threshold, high_threshold, edges=out)
+
+    @staticmethod
+    def region_growing(array, seed_point, threshold, connectivity=8, output='image', out=None):
+        """区域生长；output 为 'mask'/'labels' 时返回布尔或 int32 数组，不使用 out"""
+        result = RegionGrower.grow(_gray(array), seed_point, threshold, connectivity, output)
+        if output != 'image' or out is None:
+            return result
+        np.copyto(_output(out, result.shape), result)
+        return out
+
+
+def _clahe_luts(counts, clip_limit):
+    """由 (块行数, 块列数, 256) 的直方图求各块的映射表，截断与重新分配方式同 OpenCV"""
+    counts = counts.copy()
+    areas = counts.sum(axis=-1)
+    limits = np.maximum(1, (clip_limit * areas / 256).astype(np.int64))
+    excess = np.maximum(counts - limits[..., None], 0).sum(axis=-1)
+    np.minimum(counts, limits[..., None], out=counts)
+    counts += (excess // 256)[..., None]
+    # 平均分配后剩余的部分从灰度 0 起等间隔地各加 1
+    for index, residual in np.ndenumerate(excess % 256):
+        if residual:
+            step = max(256 // residual, 1)
+            counts[index][0:step * residual:step] += 1
+    # 与 OpenCV 相同以 float32 的比例计算映射并舍入
+    cdf = np.cumsum(counts, axis=-1).astype(np.float32)
+    scale = np.float32(255) / np.maximum(areas, 1).astype(np.float32)
+    return np.clip(np.rint(cdf * scale[..., None]), 0, 255).astype(np.float32)
+
+
+def _interpolation_weights(tile_size, tiles, length):
+    """各像素相对块中心的位置：返回左（上）侧块号、右（下）侧块号和权重
+
+    与 OpenCV 相同，像素 x 的位置为 float32 的 x / 块尺寸 - 0.5，
+    超出首末块中心的像素只取首末块的映射。
+    """
+    position = np.arange(length, dtype=np.float32) * (np.float32(1) / np.float32(tile_size)) \
+        - np.float32(0.5)
+    low = np.floor(position)
+    weight = position - low
+    low = low.astype(np.intp)
+    high = np.minimum(low + 1, tiles - 1)
+    return np.maximum(low, 0), high, weight
+
+
+def to_array(image):
+    """PIL 图像对应的只读数组，同一张已登记图像的多次调用共用一次转换"""
+    return LoadedImage.of(normalize_mode(image)).array
+
+
+def dispatch(backend, exclude=()):
+    """类装饰器：公开的静态方法按第一个参数的类型选择后端
+
+    参数为 ndarray 时调用 backend 的同名方法；backend 没有该方法时把数组
+    包装为 PIL 图像调用原方法，再把结果转换回数组（写入 out）。参数为
+    PIL 图像时行为不变。exclude 中的方法（第一个参数不是图像）不做分派。
+    """
+    def decorator(cls):
+        for name, member in list(vars(cls).items()):
+            if isinstance(member, staticmethod) and not name.startswith('_') \
+                    and name not in exclude:
+                setattr(cls, name, staticmethod(_dispatching(member.__func__,
+                                                             getattr(backend, name, None))))
+        return cls
+    return decorator
+
+
+def _dispatching(func, array_func):
+    @functools.wraps(func)
+    def wrapper(image, *args, **kwargs):
+        if not isinstance(image, np.ndarray):
+            return func(image, *args, **kwargs)
+        if array_func is not None:
+            return array_func(image, *args, **kwargs)
+        out = kwargs.pop('out', None)
+        result = func(Image.fromarray(image), *args, **kwargs)
+        if not isinstance(result, Image.Image):
+            return result
+        # np.asarray 得到的是只读数组，复制到可写的输出缓冲区
+        result = np.asarray(result)
+        out = _output(out, result.shape)
+        np.copyto(out, result)
+        return out
+    return wrapper
\ No newline at end of file
@@ -1,17 +1,37 @@
-from PIL import ImageEnhance, ImageOps
+from PIL import Image
+from .arrays import ArrayProcessor, dispatch, to_array
+from .lut import PointLUT
+from ..utils.instrumentation import instrumented
+from ..utils.loaded_image import LoadedImage
 
+@instrumented('enhance', exclude=('equalize_lut',))
+@dispatch(ArrayProcessor, exclude=('equalize_lut',))
 class EnhanceProcessor:
+    # PIL 接口：转换为数组后调用 ArrayProcessor，输入为 ndarray 时直接调用后者
+
     @staticmethod
     def adjust_brightness(image, factor):
-        enhancer = ImageEnhance.Brightness(image)
-        return enhancer.enhance(factor)
+        return Image.fromarray(ArrayProcessor.adjust_brightness(to_array(image), factor))
     
     @staticmethod
     def adjust_contrast(image, factor):
-        enhancer = ImageEnhance.Contrast(image)
-        return enhancer.enhance(factor)
+        # 灰度直方图在同一图像的各操作间共用
+        mean = PointLUT.histogram_mean(LoadedImage.of(image).stats.gray)
+        return Image.fromarray(ArrayProcessor.adjust_contrast(to_array(image), factor, mean))
     
     @staticmethod
     def equalize(image):
-        gray = image.convert('L')
-        return ImageOps.equalize(gray)
\ No newline at end of file
+        loaded = LoadedImage.of(image)
+        return Image.fromarray(ArrayProcessor.equalize(loaded.gray_array, loaded.stats))
+    
+    @staticmethod
+    def clahe(image, clip_limit=2.0, grid=8):
+        """限制对比度的自适应直方图均衡化，输出灰度图"""
+        loaded = LoadedImage.of(image)
+        return Image.fromarray(ArrayProcessor.clahe(loaded.gray_array, clip_limit, grid,
+                                                    loaded.tile_histograms(grid)))
+    
+    @staticmethod
+    def equalize_lut(histogram):
+        """根据 256 级直方图计算均衡化查找表（与 ImageOps.equalize 算法一致）"""
+        return PointLUT.equalize_lut(histogram)
\ No newline at end of file
@@ -1,17 +1,20 @@
-from PIL import Image
+from .affine import AffineTransform
+from .arrays import ArrayProcessor, dispatch
+from ..utils.instrumentation import instrumented
 
+@instrumented('geometric')
+@dispatch(ArrayProcessor)
 class GeometricProcessor:
+    # 重采样由 PIL 完成；数组输入的平移和镜像由 ArrayProcessor 直接复制像素，
+    # 其余变换经 PIL 计算
     @staticmethod
     def translate(image, tx, ty):
-        return image.transform(
-            image.size,
-            Image.AFFINE,
-            (1, 0, tx, 0, 1, ty)
-        )
+        # 与 Image.transform 的约定一致：输出 (x, y) 取自输入 (x + tx, y + ty)
+        return AffineTransform(image.size).translate(-tx, -ty).apply(image)
     
     @staticmethod
     def rotate(image, angle):
-        return image.rotate(angle)
+        return AffineTransform(image.size).rotate(angle).apply(image)
     
     @staticmethod
     def scale(image, scale_factor):
@@ -20,9 +23,24 @@ class GeometricProcessor:
             max(1, int(width * scale_factor)),
             max(1, int(height * scale_factor))
         )
-        scaled = Image.new('RGB', image.size, 'white')
-        temp = image.resize(new_size, Image.Resampling.LANCZOS)
         x = (width - new_size[0]) // 2
         y = (height - new_size[1]) // 2
-        scaled.paste(temp, (x, y))
-        return scaled
\ No newline at end of file
+        # 缩放到整像素尺寸后居中，放大时只对可见区域重采样一次
+        transform = AffineTransform(image.size) \
+            .scale(new_size[0] / width, new_size[1] / height, center=(0, 0)) \
+            .translate(x, y)
+        # 背景与原图同一模式，灰度图和带透明通道的图像不会被转换为 RGB
+        return transform.apply(image, 'lanczos', fill='white')
+    
+    @staticmethod
+    def mirror(image):
+        return AffineTransform(image.size).flip().apply(image)
+    
+    @staticmethod
+    def affine(image, steps, resample='bicubic', bounds='same'):
+        """将多个几何变换合成为一次重采样
+
+        steps 为 [(步骤名, 参数元组), ...]，步骤名可为 translate、rotate、
+        scale、flip（mirror）、shear，按顺序作用。
+        """
+        return AffineTransform.from_steps(image.size, steps).apply(image, resample, bounds)
\ No newline at end of file
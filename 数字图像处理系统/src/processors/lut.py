@@ -0,0 +1,206 @@
+import numpy as np
+from PIL import Image, ImageEnhance
+
+from ..utils.image_stats import histogram, rgb_to_gray
+from ..utils.lazy_import import lazy_import
+from ..utils.loaded_image import LoadedImage, normalize_mode
+
+cv2 = lazy_import('cv2')
+
+# 0-255 灰度渐变，点操作作用在它上面即得到该操作的查找表
+_RAMP = Image.frombytes('L', (256, 1), bytes(range(256)))
+_IDENTITY = np.arange(256, dtype=np.uint8)
+
+
+class PointLUT:
+    """单个点操作对应的 256 级查找表
+
+    亮度和对比度直接把 PIL 的同一运算作用在灰度渐变上生成查找表，
+    因此取整方式与逐图像调用完全一致。
+    """
+
+    @staticmethod
+    def brightness(factor):
+        ramp = ImageEnhance.Brightness(_RAMP).enhance(factor)
+        return np.frombuffer(ramp.tobytes(), dtype=np.uint8)
+
+    @staticmethod
+    def contrast(factor, mean):
+        """mean 为图像灰度均值（四舍五入后的整数）"""
+        degenerate = Image.new('L', _RAMP.size, mean)
+        ramp = Image.blend(degenerate, _RAMP, factor)
+        return np.frombuffer(ramp.tobytes(), dtype=np.uint8)
+
+    @staticmethod
+    def threshold(threshold):
+        return np.where(_IDENTITY < threshold, 0, 255).astype(np.uint8)
+
+    @staticmethod
+    def multi_threshold(thresholds):
+        """多级阈值：灰度按升序阈值分为 len(thresholds)+1 类，映射为 0-255 间等距的灰度"""
+        levels = np.linspace(0, 255, len(thresholds) + 1).round().astype(np.uint8)
+        return levels[np.searchsorted(np.asarray(thresholds), _IDENTITY, side='right')]
+
+    @staticmethod
+    def equalize_lut(histogram):
+        """根据 256 级直方图计算均衡化查找表（与 ImageOps.equalize 算法一致）"""
+        histo = [count for count in histogram if count]
+        if len(histo) <= 1:
+            return list(range(256))
+        step = (sum(histo) - histo[-1]) // 255
+        if not step:
+            return list(range(256))
+        lut = []
+        n = step // 2
+        for count in histogram:
+            lut.append(n // step)
+            n += count
+        return lut
+
+    @staticmethod
+    def equalize(histogram):
+        # Image.point 会把超出范围的表项截断到 0-255
+        return np.clip(PointLUT.equalize_lut(histogram), 0, 255).astype(np.uint8)
+
+    @staticmethod
+    def histogram_mean(histogram):
+        """与 ImageStat 相同的均值计算，并四舍五入为整数"""
+        histogram = np.asarray(histogram, dtype=np.float64)
+        total = histogram.sum()
+        if not total:
+            return 0
+        return int(np.dot(histogram, np.arange(256)) / total + 0.5)
+
+    @staticmethod
+    def apply(array, lut, out=None):
+        """把查找表作用在 uint8 数组上，4 通道数组的透明通道保持不变
+
+        out 可以是 array 本身（原地映射）。
+        """
+        if array.ndim == 3 and array.shape[2] == 4:
+            lut = np.stack([lut, lut, lut, _IDENTITY], axis=-1).reshape(256, 1, 4)
+        return cv2.LUT(array, lut, dst=out)
+
+
+class PointChain:
+    """点操作编译器
+
+    把亮度、对比度、直方图均衡化和阈值分割组成的操作链合成为一个查找表，
+    最后只用一次 Image.point 作用在图像上，中间不生成任何图像。
+    灰度图像上对比度和均衡化所需的统计量由原图直方图经查找表推算；彩色图像
+    遇到需要灰度统计量或先转灰度的操作（均衡化、阈值分割）时，按已合成的
+    查找表做一次映射并转换为灰度。结果与逐步调用 EnhanceProcessor、
+    SegmentProcessor 逐字节一致。也可作用在 uint8 数组上（通道顺序为 RGB），
+    返回数组。
+    """
+
+    OPERATIONS = ('adjust_brightness', 'adjust_contrast', 'equalize', 'threshold_segment')
+    # 这些操作先把图像转换为灰度图
+    GRAY_OPERATIONS = ('equalize', 'threshold_segment')
+
+    def __init__(self, steps):
+        """steps 为 [(操作名, 参数字典), ...]"""
+        self.steps = []
+        for name, params in steps:
+            name = getattr(name, 'name', name)
+            if name not in self.OPERATIONS:
+                raise ValueError(f"操作 {name} 不是点操作")
+            self.steps.append((name, dict(params)))
+
+    @classmethod
+    def is_point_operation(cls, name):
+        return getattr(name, 'name', name) in cls.OPERATIONS
+
+    def apply(self, image):
+        if isinstance(image, np.ndarray):
+            return self._apply_array(image)
+        image = normalize_mode(image)
+
+        lut = _IDENTITY
+        source_histogram = None
+        for name, params in self.steps:
+            if name in self.GRAY_OPERATIONS and image.mode != 'L':
+                image = self._to_gray(image, lut)
+                lut, source_histogram = _IDENTITY, None
+
+            if name == 'adjust_brightness':
+                step = PointLUT.brightness(params['factor'])
+            elif name == 'threshold_segment':
+                step = PointLUT.threshold(params['threshold'])
+            else:
+                if image.mode == 'L':
+                    if source_histogram is None:
+                        # 原图的直方图取自缓存的统计量
+                        source_histogram = LoadedImage.of(image).stats.gray
+                    # 经查找表映射后的直方图
+                    histogram = np.bincount(lut, weights=source_histogram, minlength=256)
+                else:
+                    histogram = self._gray_histogram(image, lut)
+                histogram = np.asarray(histogram, dtype=np.int64).tolist()
+                if name == 'equalize':
+                    step = PointLUT.equalize(histogram)
+                else:
+                    step = PointLUT.contrast(params['factor'], PointLUT.histogram_mean(histogram))
+            lut = step[lut]
+
+        return self._apply_lut(image, lut)
+
+    def _apply_array(self, array):
+        lut = _IDENTITY
+        source_histogram = None
+        for name, params in self.steps:
+            if name in self.GRAY_OPERATIONS and array.ndim == 3:
+                array = rgb_to_gray(self._apply_array_lut(array, lut))
+                lut, source_histogram = _IDENTITY, None
+
+            if name == 'adjust_brightness':
+                step = PointLUT.brightness(params['factor'])
+            elif name == 'threshold_segment':
+                step = PointLUT.threshold(params['threshold'])
+            else:
+                if array.ndim == 2:
+                    if source_histogram is None:
+                        source_histogram = histogram(array)
+                    counts = np.bincount(lut, weights=source_histogram, minlength=256)
+                else:
+                    counts = histogram(rgb_to_gray(self._apply_array_lut(array, lut)))
+                counts = np.asarray(counts, dtype=np.int64).tolist()
+                if name == 'equalize':
+                    step = PointLUT.equalize(counts)
+                else:
+                    step = PointLUT.contrast(params['factor'], PointLUT.histogram_mean(counts))
+            lut = step[lut]
+
+        if np.array_equal(lut, _IDENTITY):
+            return array.copy()
+        return PointLUT.apply(array, lut)
+
+    @staticmethod
+    def _apply_array_lut(array, lut):
+        return array if np.array_equal(lut, _IDENTITY) else PointLUT.apply(array, lut)
+
+    @staticmethod
+    def _apply_lut(image, lut):
+        if np.array_equal(lut, _IDENTITY):
+            return image.copy()
+        table = lut.tolist()
+        if image.mode == 'L':
+            return image.point(table)
+        # 透明通道保持不变
+        tables = table * 3
+        if image.mode == 'RGBA':
+            tables += _IDENTITY.tolist()
+        return image.point(tables)
+
+    @classmethod
+    def _gray_histogram(cls, image, lut):
+        if np.array_equal(lut, _IDENTITY):
+            return LoadedImage.of(image).stats.gray
+        return cls._to_gray(image, lut).histogram()
+
+    @classmethod
+    def _to_gray(cls, image, lut):
+        """彩色图像各通道经查找表映射后再转换为灰度"""
+        if np.array_equal(lut, _IDENTITY):
+            return LoadedImage.of(image).gray
+        return cls._apply_lut(image, lut).convert('L')
\ No newline at end of file
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import threading
+import weakref
+
+from .registry import get_operation
+from ..utils.result_cache import ResultCache
+
+SOURCE = 'input'
+FORMAT_VERSION = 1
+
+
+def image_digest(image):
+    """图像内容的哈希值（模式、尺寸和像素数据）"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{image.mode}:{image.size}".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+class Node:
+    """处理图中的节点：对输入节点的输出执行一个已注册的操作"""
+
+    def __init__(self, name, op, params, input):
+        self.name = name
+        self.op = op
+        self.params = params
+        self.input = input
+
+    def to_dict(self):
+        params = {k: list(v) if isinstance(v, tuple) else v
+                  for k, v in self.params.items() if v is not None}
+        return {'id': self.name, 'op': self.op.name, 'params': params, 'input': self.input}
+
+    def __repr__(self):
+        return f"Node({self.name!r}, {self.op.name!r}, input={self.input!r})"
+
+
+class Pipeline:
+    """延迟求值的处理图
+
+    每个节点对一个上游节点（或源图像 "input"）执行注册表中的一个操作，
+    多个节点可以共用同一上游，形成分支。只有请求某个输出时才沿上游求值。
+    节点结果以内容哈希为键缓存：键由操作名、参数和上游节点的键逐级计算，
+    源图像的键为像素数据的哈希。因此相同的前缀只计算一次，修改某个节点的
+    参数后只有它和下游节点的键改变，上游结果直接取自缓存。
+
+    可序列化为 JSON，界面和批处理命令使用同一份流水线文件：
+        {"version": 1,
+         "nodes": [{"id": "blur", "op": "gaussian_filter", "params": {"radius": 3}, "input": "input"},
+                   {"id": "edges", "op": "canny_edge", "input": "blur"}],
+         "outputs": ["edges"]}
+    """
+
+    def __init__(self, cache=None):
+        self.nodes = {}
+        self.outputs = []
+        self.cache = cache if cache is not None else ResultCache()
+        self._source = None
+        self._source_key = None
+        # 同一结果同时被多个分支请求时只计算一次；没有线程持有的锁自动移除
+        self._locks = weakref.WeakValueDictionary()
+        self._locks_guard = threading.Lock()
+
+    def add(self, name, op_name, params=None, input=SOURCE, output=False):
+        """添加节点，参数经过校验并补全默认值；input 须为源图像或已添加的节点"""
+        if name == SOURCE or name in self.nodes:
+            raise ValueError(f"节点名重复：{name}")
+        if input != SOURCE and input not in self.nodes:
+            raise ValueError(f"节点 {name} 的输入 {input} 不存在")
+        op = get_operation(op_name)
+        self.nodes[name] = Node(name, op, op.resolve(params or {}), input)
+        if output:
+            self.outputs.append(name)
+        return name
+
+    def set_params(self, name, **params):
+        """修改节点参数，下游节点随之失效（其缓存键改变）"""
+        node = self.node(name)
+        node.params = node.op.resolve({**node.params, **params})
+
+    def node(self, name):
+        try:
+            return self.nodes[name]
+        except KeyError:
+            raise ValueError(f"未知的节点：{name}") from None
+
+    def set_input(self, image, key=None):
+        """设置源图像；key 为已知的内容哈希（如编码文件的哈希），省去对像素求哈希"""
+        if image is not self._source or (key is not None and key != self._source_key):
+            self._source = image
+            self._source_key = key or image_digest(image)
+
+    def key(self, name):
+        """节点结果的内容哈希"""
+        if name == SOURCE:
+            if self._source_key is None:
+                raise ValueError("尚未设置源图像")
+            return self._source_key
+        node = self.node(name)
+        spec = json.dumps([node.op.name, node.to_dict()['params'], self.key(node.input)],
+                          sort_keys=True)
+        return hashlib.blake2b(spec.encode(), digest_size=16).hexdigest()
+
+    def evaluate(self, name):
+        """求某个节点的输出，只计算缓存中没有的上游节点"""
+        if name == SOURCE:
+            if self._source is None:
+                raise ValueError("尚未设置源图像")
+            return self._source
+        key = self.key(name)
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+        with self._lock_for(key):
+            result = self.cache.get(key)
+            if result is None:
+                node = self.nodes[name]
+                result = node.op.func(self.evaluate(node.input), **node.params)
+                self.cache.put(key, result)
+        return result
+
+    def run(self, image=None, outputs=None):
+        """求所有（或指定的）输出节点，返回 {节点名: 图像}"""
+        if image is not None:
+            self.set_input(image)
+        return {name: self.evaluate(name) for name in (outputs or self.outputs)}
+
+    def _lock_for(self, key):
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def to_dict(self):
+        return {
+            'version': FORMAT_VERSION,
+            'nodes': [node.to_dict() for node in self.nodes.values()],
+            'outputs': list(self.outputs)
+        }
+
+    def to_json(self, indent=None):
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=indent)
+
+    @classmethod
+    def from_dict(cls, data, cache=None):
+        if data.get('version', FORMAT_VERSION) != FORMAT_VERSION:
+            raise ValueError(f"不支持的流水线版本：{data.get('version')}")
+        pipeline = cls(cache)
+        pending = list(data.get('nodes', []))
+        for spec in pending:
+            if not isinstance(spec, dict) or 'id' not in spec or 'op' not in spec:
+                raise ValueError(f"节点定义须包含 id 和 op：{spec!r}")
+        # 节点可按任意顺序给出，逐轮添加输入已就绪的节点
+        while pending:
+            remaining = []
+            for spec in pending:
+                source = spec.get('input', SOURCE)
+                if source == SOURCE or source in pipeline.nodes:
+                    pipeline.add(spec['id'], spec['op'], spec.get('params'), source)
+                else:
+                    remaining.append(spec)
+            if len(remaining) == len(pending):
+                names = ', '.join(spec['id'] for spec in remaining)
+                raise ValueError(f"节点的输入不存在或存在环：{names}")
+            pending = remaining
+        outputs = data.get('outputs') or list(pipeline.nodes)[-1:]
+        for name in outputs:
+            pipeline.node(name)
+        pipeline.outputs = list(outputs)
+        return pipeline
+
+    @classmethod
+    def from_json(cls, text, cache=None):
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"流水线文件格式错误：{e}") from None
+        return cls.from_dict(data, cache)
+
+    @classmethod
+    def load(cls, path, cache=None):
+        with open(path, encoding='utf-8') as f:
+            return cls.from_json(f.read(), cache)
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_json(indent=2))
+
+    @classmethod
+    def from_chain(cls, chain, cache=None):
+        """由 parse_chain 得到的线性操作链构造，节点名为 "步骤序号_操作名" """
+        pipeline = cls(cache)
+        previous = SOURCE
+        for index, (op, params) in enumerate(chain, 1):
+            previous = pipeline.add(f"{index}_{op.name}", op.name, params, previous)
+        if previous != SOURCE:
+            pipeline.outputs = [previous]
+        return pipeline
\ No newline at end of file
@@ -0,0 +1,175 @@
+import numpy as np
+
+from ..utils.image_stats import histogram
+from ..utils.lazy_import import lazy_import
+
+cv2 = lazy_import('cv2')
+
+
+class RegionGrower:
+    """区域生长引擎
+
+    先按种子灰度值一次性确定容差范围，再用 OpenCV 的扫描线泛洪填充
+    标记与种子连通的像素，结果与逐像素堆栈实现逐字节一致。
+    """
+
+    CONNECTIVITIES = (4, 8)
+    OUTPUTS = ('image', 'mask', 'labels')
+
+    @staticmethod
+    def normalize_seeds(seeds):
+        """统一种子点格式为 [(row, col), ...]"""
+        if len(seeds) == 2 and all(np.isscalar(v) for v in seeds):
+            seeds = [seeds]
+        return [(int(r), int(c)) for r, c in seeds]
+
+    @staticmethod
+    def grow(gray, seeds, threshold, connectivity=8, output='image'):
+        """对灰度数组执行区域生长
+
+        gray: 二维 uint8 数组
+        seeds: 单个 (row, col) 或其列表，每个种子以自身灰度值为基准
+        threshold: 与种子灰度差严格小于该值的像素被并入区域
+        output: 'image' 返回 0/255 的 uint8 数组，'mask' 返回布尔数组，
+                'labels' 返回 int32 标签图（第 i 个种子的区域标记为 i+1，
+                重叠部分归属先出现的种子）
+        """
+        if connectivity not in RegionGrower.CONNECTIVITIES:
+            raise ValueError(f"不支持的连通方式：{connectivity}")
+        if output not in RegionGrower.OUTPUTS:
+            raise ValueError(f"不支持的输出类型：{output}")
+
+        # floodFill 要求输入可写（MASK_ONLY 模式下不会修改图像本身）
+        gray = np.require(gray, np.uint8, ['C', 'W'])
+        rows, cols = gray.shape
+        seeds = RegionGrower.normalize_seeds(seeds)
+        for r, c in seeds:
+            if not (0 <= r < rows and 0 <= c < cols):
+                raise IndexError(f"种子点 {(r, c)} 超出图像范围")
+
+        # floodFill 的掩码比图像四周各多一个像素，填充值写入 255
+        fill_mask = np.zeros((rows + 2, cols + 2), dtype=np.uint8)
+        region = fill_mask[1:-1, 1:-1]
+        flags = (connectivity | (255 << 8) |
+                 cv2.FLOODFILL_MASK_ONLY | cv2.FLOODFILL_FIXED_RANGE)
+        # |v - seed| < threshold 等价于 seed - (threshold-1) <= v <= seed + (threshold-1)
+        diff = int(threshold) - 1
+
+        if output == 'labels':
+            result = np.zeros((rows, cols), dtype=np.int32)
+        elif len(seeds) > 1:
+            result = np.zeros((rows, cols), dtype=bool)
+
+        for index, (r, c) in enumerate(seeds):
+            if index:
+                fill_mask.fill(0)
+            if diff < 0:
+                # 阈值不大于 0 时只有种子点本身属于区域
+                region[r, c] = 255
+            else:
+                cv2.floodFill(gray, fill_mask, (c, r), 0, diff, diff, flags)
+
+            if output == 'labels':
+                result[(region != 0) & (result == 0)] = index + 1
+            elif len(seeds) > 1:
+                result |= region != 0
+
+        if output == 'labels':
+            return result
+        if len(seeds) == 1:
+            return region != 0 if output == 'mask' else region.copy()
+        return result if output == 'mask' else result.astype(np.uint8) * 255
+
+
+class RegionIndex:
+    """单个种子点的区域生长索引
+
+    阈值为 t 时的区域是与种子连通、且灰度与种子相差小于 t 的像素，随 t 增大
+    单调扩张，即 |v - 种子灰度| 的连通分量树中种子所在的一条分支。索引把这条
+    分支展开为每个像素的代价 cost：该像素并入种子所在分量时的最大灰度差
+    （从种子出发的所有路径上最大灰度差的最小值）。任意阈值的区域就是
+    cost < t 的像素，查询只做一次比较，不再泛洪填充。
+
+    不同灰度的种子对应不同的 |v - s|，各种子之间没有可以共用的分量树，
+    因此索引按种子构建：阈值从小到大各做一次泛洪填充，区域覆盖整幅图像、
+    或阈值超过种子灰度到 0/255 的距离（此后区域必为整幅图像）时停止。
+    """
+
+    def __init__(self, cost, seed, connectivity=8):
+        self.cost = cost
+        self.seed = seed
+        self.connectivity = connectivity
+        # areas[t] 为阈值 t（1-256）时的区域面积
+        self.areas = np.concatenate(([0], np.cumsum(histogram(cost))))
+
+    @classmethod
+    def build(cls, gray, seed, connectivity=8, cancelled=None):
+        """为二维 uint8 数组 gray 上的单个种子 (row, col) 构建索引
+
+        cancelled 为可选的回调，每个阈值之前调用一次，返回 True 时中止构建
+        并返回 None。
+        """
+        if connectivity not in RegionGrower.CONNECTIVITIES:
+            raise ValueError(f"不支持的连通方式：{connectivity}")
+        seeds = RegionGrower.normalize_seeds(seed)
+        if len(seeds) != 1:
+            raise ValueError("区域生长索引只支持单个种子点")
+        gray = np.require(gray, np.uint8, ['C', 'W'])
+        rows, cols = gray.shape
+        r, c = seeds[0]
+        if not (0 <= r < rows and 0 <= c < cols):
+            raise IndexError(f"种子点 {(r, c)} 超出图像范围")
+
+        value = int(gray[r, c])
+        fill_mask = np.zeros((rows + 2, cols + 2), dtype=np.uint8)
+        # 各像素位于区域内的阈值个数
+        inside = np.zeros_like(fill_mask)
+        flags = (connectivity | (1 << 8) |
+                 cv2.FLOODFILL_MASK_ONLY | cv2.FLOODFILL_FIXED_RANGE)
+        for diff in range(max(value, 255 - value)):
+            if cancelled is not None and cancelled():
+                return None
+            if diff:
+                fill_mask.fill(0)
+            area = cv2.floodFill(gray, fill_mask, (c, r), 0, diff, diff, flags)[0]
+            if area == rows * cols:
+                break
+            cv2.add(inside, fill_mask, dst=inside)
+        else:
+            diff = max(value, 255 - value)
+        # 区域在灰度差 diff 时已是整幅图像，像素的代价为此前不在区域内的次数
+        cost = (diff - inside[1:-1, 1:-1]).astype(np.uint8)
+        return cls(cost, (r, c), connectivity)
+
+    @property
+    def shape(self):
+        return self.cost.shape
+
+    @property
+    def nbytes(self):
+        return self.cost.nbytes
+
+    def area(self, threshold):
+        """阈值为 threshold 时的区域面积"""
+        if threshold <= 0:
+            return 1
+        return int(self.areas[min(int(threshold), 256)])
+
+    def query(self, threshold, output='image'):
+        """阈值为 threshold 时的区域，output 的含义与 RegionGrower.grow 相同"""
+        if output not in RegionGrower.OUTPUTS:
+            raise ValueError(f"不支持的输出类型：{output}")
+        if threshold <= 0:
+            # 阈值不大于 0 时只有种子点本身属于区域
+            region = np.zeros(self.shape, dtype=np.uint8)
+            region[self.seed] = 255
+        elif threshold > 255:
+            region = np.full(self.shape, 255, dtype=np.uint8)
+        else:
+            region = cv2.compare(self.cost, int(threshold), cv2.CMP_LT)
+
+        if output == 'image':
+            return region
+        if output == 'mask':
+            return region != 0
+        return (region != 0).astype(np.int32)
\ No newline at end of file
@@ -0,0 +1,153 @@
+import numpy as np
+
+from .geometric import GeometricProcessor
+from .enhance import EnhanceProcessor
+from .smooth import SmoothProcessor
+from .segment import SegmentProcessor
+from .lut import PointChain
+
+
+def parse_seed(text):
+    """解析 "row,col" 形式的种子点"""
+    if isinstance(text, (tuple, list)):
+        return tuple(int(v) for v in text)
+    row, col = text.split(',')
+    return int(row), int(col)
+
+
+def region_growing(image, threshold, seed=None):
+    """区域生长，未指定种子点时使用图像中心"""
+    if seed is None:
+        if isinstance(image, np.ndarray):
+            h, w = image.shape[:2]
+        else:
+            w, h = image.size
+        seed = (h//2, w//2)
+    return SegmentProcessor.region_growing(image, seed, threshold)
+
+
+def parse_affine_steps(text):
+    """解析 "rotate:30;scale:1.5;translate:10:5;mirror" 形式的仿射变换步骤"""
+    steps = []
+    for step in text.split(';'):
+        name, *args = step.strip().split(':')
+        if not name:
+            raise ValueError(f"仿射变换步骤为空：{text!r}")
+        steps.append((name, tuple(float(arg) for arg in args)))
+    return steps
+
+
+def affine(image, steps, resample='bicubic', bounds='same'):
+    """按步骤文本合成仿射变换并一次完成重采样"""
+    return GeometricProcessor.affine(image, parse_affine_steps(steps), resample, bounds)
+
+
+class Operation:
+    """可按名称调用的处理操作
+
+    params 为 [(参数名, 类型转换函数, 默认值), ...]，参数名与界面滑动条的默认值
+    保持一致，供命令行、批处理等无界面的调用方使用。
+    """
+
+    def __init__(self, name, func, params=()):
+        self.name = name
+        self.func = func
+        self.params = list(params)
+
+    @property
+    def param_names(self):
+        return [name for name, _, _ in self.params]
+
+    def resolve(self, kwargs):
+        """校验参数并补全默认值，返回按声明顺序排列的参数字典"""
+        unknown = set(kwargs) - set(self.param_names)
+        if unknown:
+            raise ValueError(f"操作 {self.name} 不支持参数：{', '.join(sorted(unknown))}")
+        resolved = {}
+        for name, convert, default in self.params:
+            value = kwargs.get(name, default)
+            resolved[name] = value if value is None else convert(value)
+        return resolved
+
+    def __call__(self, image, **kwargs):
+        return self.func(image, **self.resolve(kwargs))
+
+    def __repr__(self):
+        return f"Operation({self.name!r})"
+
+
+OPERATIONS = {op.name: op for op in [
+    Operation('translate', GeometricProcessor.translate, [('tx', int, 0), ('ty', int, 0)]),
+    Operation('rotate', GeometricProcessor.rotate, [('angle', float, 90)]),
+    Operation('scale', GeometricProcessor.scale, [('scale_factor', float, 1.0)]),
+    Operation('mirror', GeometricProcessor.mirror),
+    Operation('affine', affine, [('steps', str, 'mirror'), ('resample', str, 'bicubic'),
+                                 ('bounds', str, 'same')]),
+    Operation('adjust_brightness', EnhanceProcessor.adjust_brightness, [('factor', float, 1.0)]),
+    Operation('adjust_contrast', EnhanceProcessor.adjust_contrast, [('factor', float, 1.0)]),
+    Operation('equalize', EnhanceProcessor.equalize),
+    Operation('clahe', EnhanceProcessor.clahe, [('clip_limit', float, 2.0), ('grid', int, 8)]),
+    Operation('mean_filter', SmoothProcessor.mean_filter, [('radius', int, 3)]),
+    Operation('gaussian_filter', SmoothProcessor.gaussian_filter, [('radius', int, 3)]),
+    Operation('median_filter', SmoothProcessor.median_filter, [('radius', int, 3)]),
+    Operation('threshold_segment', SegmentProcessor.threshold_segment, [('threshold', int, 128)]),
+    Operation('auto_threshold', SegmentProcessor.auto_threshold, [('classes', int, 2)]),
+    Operation('canny_edge', SegmentProcessor.canny_edge,
+              [('low_threshold', int, 50), ('high_threshold', int, 150)]),
+    Operation('region_growing', region_growing, [('threshold', int, 30), ('seed', parse_seed, None)])
+]}
+
+
+def get_operation(name):
+    try:
+        return OPERATIONS[name]
+    except KeyError:
+        raise ValueError(f"未知的操作：{name}（可用操作：{', '.join(OPERATIONS)}）") from None
+
+
+def parse_chain(text):
+    """解析操作链，例如 "gaussian_filter radius=3 | threshold_segment threshold=128"
+
+    返回 [(Operation, 参数字典), ...]，参数已完成类型转换并补全默认值。
+    """
+    chain = []
+    for step in text.split('|'):
+        tokens = step.split()
+        if not tokens:
+            raise ValueError(f"操作链中存在空步骤：{text!r}")
+        op = get_operation(tokens[0])
+        kwargs = {}
+        for token in tokens[1:]:
+            name, sep, value = token.partition('=')
+            if not sep:
+                raise ValueError(f"参数格式应为 name=value：{token!r}")
+            kwargs[name] = value
+        chain.append((op, op.resolve(kwargs)))
+    return chain
+
+
+def format_chain(chain):
+    """将操作链格式化为规范的文本形式"""
+    steps = []
+    for op, params in chain:
+        args = [f"{name}={','.join(map(str, value)) if isinstance(value, tuple) else value}"
+                for name, value in params.items() if value is not None]
+        steps.append(' '.join([op.name] + args))
+    return ' | '.join(steps)
+
+
+def apply_chain(image, chain):
+    """按顺序对图像执行操作链，连续的点操作合成为一个查找表一次完成"""
+    index = 0
+    while index < len(chain):
+        end = index
+        while end < len(chain) and PointChain.is_point_operation(chain[end][0]):
+            end += 1
+        if end - index >= 2:
+            image = PointChain(chain[index:end]).apply(image)
+            index = end
+            continue
+        op, params = chain[index]
+        image = op.func(image, **params)
+        index += 1
+    return image
\ No newline at end of file
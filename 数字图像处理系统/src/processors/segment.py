@@ -1,61 +1,53 @@
-import cv2
-import numpy as np
 from PIL import Image
+from .arrays import ArrayProcessor, dispatch
+from .region_growing import RegionGrower
+from ..utils.instrumentation import instrumented
+from ..utils.loaded_image import LoadedImage
 
+@instrumented('segment')
+@dispatch(ArrayProcessor)
 class SegmentProcessor:
+    # 灰度数组在同一图像的各分割操作间共用，计算由 ArrayProcessor 完成
+
     @staticmethod
     def threshold_segment(image, threshold):
         """阈值分割"""
-        # 转换为灰度图
-        gray = image.convert('L')
-        # 阈值分割
-        thresh = np.where(np.array(gray) < threshold, 0, 255)
-        return Image.fromarray(thresh.astype(np.uint8))
+        gray = LoadedImage.of(image).gray_array
+        # 通过查找表一次映射，不生成中间数组
+        return Image.fromarray(ArrayProcessor.threshold_segment(gray, threshold))
+    
+    @staticmethod
+    def auto_threshold(image, classes=2):
+        """自动阈值分割：classes=2 为 Otsu 二值化，更多类时为多级 Otsu"""
+        loaded = LoadedImage.of(image)
+        return Image.fromarray(ArrayProcessor.auto_threshold(loaded.gray_array, classes,
+                                                             loaded.stats))
     
     @staticmethod
     def canny_edge(image, low_threshold, high_threshold):
         """Canny边缘检测"""
-        # 转换为OpenCV格式
-        img_np = np.array(image)
-        # 转换为灰度图
-        gray = cv2.cvtColor(img_np, cv2.COLOR_RGB2GRAY)
-        # 边缘检测
-        edges = cv2.Canny(gray, low_threshold, high_threshold)
-        return Image.fromarray(edges)
+        # 灰度数组，任意模式的图像均可处理
+        gray = LoadedImage.of(image).gray_array
+        return Image.fromarray(ArrayProcessor.canny_edge(gray, low_threshold, high_threshold))
     
     @staticmethod
-    def region_growing(image, seed_point, threshold):
-        """区域生长"""
-        # 转换为灰度图
-        gray = image.convert('L')
-        img_np = np.array(gray)
-        rows, cols = img_np.shape
-        
-        # 初始化结果图像
-        segmented = np.zeros_like(img_np)
-        segmented[seed_point] = 255
-        seed_value = img_np[seed_point]
-        
-        def get_neighbors(point):
-            r, c = point
-            neighbors = []
-            for dr in [-1, 0, 1]:
-                for dc in [-1, 0, 1]:
-                    if dr == 0 and dc == 0:
-                        continue
-                    new_r, new_c = r + dr, c + dc
-                    if 0 <= new_r < rows and 0 <= new_c < cols:
-                        neighbors.append((new_r, new_c))
-            return neighbors
-        
-        # 区域生长过程
-        stack = [seed_point]
-        while stack:
-            current = stack.pop()
-            for neighbor in get_neighbors(current):
-                if segmented[neighbor] == 0 and \
-                   abs(int(img_np[neighbor]) - int(seed_value)) < threshold:
-                    segmented[neighbor] = 255
-                    stack.append(neighbor)
-        
-        return Image.fromarray(segmented) 
\ No newline at end of file
+    def region_growing(image, seed_point, threshold, connectivity=8, output='image'):
+        """区域生长
+
+        seed_point 可以是单个 (row, col) 或多个种子点的列表；
+        output 为 'image' 时返回 PIL 图像，'mask'/'labels' 时返回 NumPy 数组。
+        单个种子点的区域生长索引已建好（见 LoadedImage.prepare_region_index）时
+        直接由索引得到结果，不再泛洪填充。
+        """
+        loaded = LoadedImage.of(image)
+        seeds = RegionGrower.normalize_seeds(seed_point)
+        index = loaded.region_index(seeds[0], connectivity, wait=False) if len(seeds) == 1 else None
+        if index is not None:
+            result = index.query(threshold, output)
+        else:
+            # 灰度数组只读，RegionGrower 会复制一份可写数组
+            result = ArrayProcessor.region_growing(loaded.gray_array, seed_point, threshold,
+                                                   connectivity, output)
+        if output == 'image':
+            return Image.fromarray(result)
+        return result
\ No newline at end of file
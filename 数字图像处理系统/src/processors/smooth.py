@@ -1,10 +1,19 @@
-from PIL import ImageFilter
+from PIL import Image, ImageFilter
+from .arrays import ArrayProcessor, dispatch, to_array
+from ..utils.instrumentation import instrumented
 
+@instrumented('smooth')
+@dispatch(ArrayProcessor)
 class SmoothProcessor:
+    # 均值和中值滤波由 ArrayProcessor 实现，耗时与半径无关；GaussianBlur（三次
+    # 分数半径的盒式滤波近似）没有对应的 OpenCV 实现，数组输入经 PIL 计算
+
     @staticmethod
     def mean_filter(image, radius):
-        """均值滤波"""
-        return image.filter(ImageFilter.BoxBlur(radius))
+        """均值滤波，结果与 ImageFilter.BoxBlur(radius) 一致"""
+        if radius != int(radius):
+            return image.filter(ImageFilter.BoxBlur(radius))
+        return Image.fromarray(ArrayProcessor.mean_filter(to_array(image), radius))
     
     @staticmethod
     def gaussian_filter(image, radius):
@@ -13,5 +22,9 @@ class SmoothProcessor:
     
     @staticmethod
     def median_filter(image, radius):
-        """中值滤波"""
-        return image.filter(ImageFilter.MedianFilter(size=radius)) 
\ No newline at end of file
+        """中值滤波，窗口为 (2*radius+1) x (2*radius+1)
+
+        cv2.medianBlur 对大窗口使用常数时间的直方图算法（Perreault-Hébert），
+        各通道分别计算，边界复制边缘像素，结果与 ImageFilter.MedianFilter 一致。
+        """
+        return Image.fromarray(ArrayProcessor.median_filter(to_array(image), radius))
\ No newline at end of file
@@ -0,0 +1,414 @@
+import csv
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from .registry import get_operation, parse_seed
+from ..utils.instrumentation import metrics, data_bytes
+from ..utils.lazy_import import lazy_import
+from ..utils.loaded_image import LoadedImage
+
+cv2 = lazy_import('cv2')
+
+# 一次扫描的参数组合数上限，防止写错的网格生成过多结果
+MAX_COMBINATIONS = 1024
+
+# 各操作在参数组合之间共用的 LoadedImage 视图，扫描开始前先计算一次
+SHARED_VIEWS = {
+    'adjust_contrast': ('stats',),
+    'equalize': ('gray_array', 'stats'),
+    'clahe': ('gray_array',),
+    'threshold_segment': ('gray_array', 'stats'),
+    'auto_threshold': ('gray_array', 'stats'),
+    'canny_edge': ('gray_array',),
+    'region_growing': ('gray_array',)
+}
+# 结果为二值图的操作，记录前景（非零像素）所占比例
+SEGMENT_OPERATIONS = ('threshold_segment', 'canny_edge', 'region_growing')
+
+
+def parse_values(text, convert):
+    """解析一个参数的取值
+
+    "a,b,c" 为逐个列出的取值，"start:stop:step" 为包含终点的等差序列；
+    本身含逗号的取值（如种子点 "row,col"）用分号分隔。
+    """
+    text = text.strip()
+    if ':' in text and convert in (int, float):
+        try:
+            start, stop, step = (float(part) for part in text.split(':'))
+        except ValueError:
+            raise ValueError(f"范围须为 start:stop:step 形式：{text}") from None
+        if step <= 0 or stop < start:
+            raise ValueError(f"范围须满足 step > 0 且 stop >= start：{text}")
+        count = int(math.floor((stop - start) / step + 1e-9)) + 1
+        if count > MAX_COMBINATIONS:
+            raise ValueError(f"范围包含的取值超过 {MAX_COMBINATIONS} 个：{text}")
+        values = [round(start + i * step, 10) for i in range(count)]
+    elif ';' in text or convert is parse_seed:
+        values = text.split(';')
+    else:
+        values = text.split(',')
+    try:
+        return [convert(value.strip() if isinstance(value, str) else value) for value in values]
+    except (TypeError, ValueError):
+        raise ValueError(f"无法解析参数取值：{text}") from None
+
+
+def parse_grid(operation, texts):
+    """把 ['low_threshold=20:100:20', 'high_threshold=100,150'] 解析为 {参数名: [取值, ...]}"""
+    converts = {name: convert for name, convert, _ in operation.params}
+    grid = {}
+    for text in texts or ():
+        name, sep, values = text.partition('=')
+        name = name.strip()
+        if not sep or not name:
+            raise ValueError(f"参数网格须为 name=values 形式：{text}")
+        if name not in converts:
+            raise ValueError(f"操作 {operation.name} 没有参数 {name}"
+                             f"（可用：{', '.join(converts) or '无'}）")
+        grid[name] = parse_values(values, converts[name])
+    return grid
+
+
+class SweepResult:
+    """一个参数组合的结果
+
+    index 为组合在完整网格中的序号（行优先，最后一个参数变化最快），
+    seconds 为该组合单独的计算耗时，coverage 为分割结果的前景比例（其他操作为 None）。
+    """
+
+    def __init__(self, index, params, image, seconds, coverage=None, thumbnail=None):
+        self.index = index
+        self.params = params
+        self.image = image
+        self.seconds = seconds
+        self.coverage = coverage
+        self.thumbnail = thumbnail
+        self.path = None
+
+    def label(self, names, values=None):
+        """联系表中的标注：names 中各参数的取值、耗时和前景比例
+
+        values 为 {名称: 取值}，默认为本组合的参数，可换成界面上对应的参数。
+        """
+        values = self.params if values is None else values
+        lines = [f"{name}={format_value(values[name])}" for name in names]
+        line = f"{self.seconds * 1000:.1f} ms"
+        if self.coverage is not None:
+            line += f"  {self.coverage:.1%}"
+        return '\n'.join(lines + [line])
+
+    def as_dict(self):
+        return {'index': self.index,
+                'params': {name: _json_value(value) for name, value in self.params.items()},
+                'ms': self.seconds * 1000,
+                'coverage': self.coverage,
+                'path': self.path}
+
+
+class SweepReport:
+    """一次参数扫描的结果
+
+    results 按组合序号排列；被合并掉的等价组合不在其中。shared_seconds 为
+    各组合共用的预计算耗时，elapsed 为包括预计算在内的总耗时。
+    """
+
+    def __init__(self, sweep, results, shared_seconds, elapsed):
+        self.sweep = sweep
+        self.results = results
+        self.shared_seconds = shared_seconds
+        self.elapsed = elapsed
+
+    @property
+    def total_seconds(self):
+        """各组合计算耗时之和，与 elapsed 相比可看出并行的效果"""
+        return sum(result.seconds for result in self.results)
+
+    def contact_sheet(self, labels=None, cell=256, columns=None):
+        """按网格位置排列的联系表（ContactSheet）
+
+        labels 为 {组合序号: 标注文本}，默认标注扫描的参数、耗时和前景比例。
+        两个及以上参数时每行对应前面参数的一组取值，列对应最后一个参数的取值。
+        """
+        sizes = self.sweep.shape
+        if columns is None:
+            columns = sizes[-1] if len(sizes) > 1 else math.ceil(math.sqrt(sizes[0]))
+        images = [None] * math.prod(sizes)
+        texts = [None] * len(images)
+        for result in self.results:
+            images[result.index] = result.thumbnail or result.image
+            texts[result.index] = (labels[result.index] if labels is not None
+                                   else result.label(self.sweep.names))
+        return contact_sheet(images, texts, columns, cell)
+
+    def as_dict(self):
+        return {'operation': self.sweep.operation.name,
+                'grid': {name: [_json_value(value) for value in values]
+                         for name, values in self.sweep.grid.items()},
+                'fixed': {name: _json_value(value) for name, value in self.sweep.fixed.items()},
+                'workers': self.sweep.workers,
+                'shared': self.sweep.share,
+                'shared_ms': self.shared_seconds * 1000,
+                'elapsed_ms': self.elapsed * 1000,
+                'results': [result.as_dict() for result in self.results]}
+
+    def write_timings(self, path):
+        """把各组合的参数与耗时写入文件：扩展名为 .csv 时每个组合一行，否则为 JSON"""
+        if os.path.splitext(path)[1].lower() != '.csv':
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.as_dict(), f, indent=2, ensure_ascii=False)
+            return
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['index'] + self.sweep.names + ['ms', 'coverage', 'path'])
+            for result in self.results:
+                writer.writerow([result.index] +
+                                [format_value(result.params[name]) for name in self.sweep.names] +
+                                [f"{result.seconds * 1000:.3f}",
+                                 '' if result.coverage is None else f"{result.coverage:.6f}",
+                                 result.path or ''])
+
+
+class ParameterSweep:
+    """对一个操作的参数网格批量求值
+
+    grid 为 {参数名: [取值, ...]}，各参数取值的笛卡尔积即全部组合，未列出的
+    参数取 fixed 中的值或操作的默认值。share 为 True 时组合之间共用预计算：
+    灰度图、直方图统计量和 CLAHE 的分块直方图在扫描开始前由 LoadedImage
+    计算一次；Canny 的 Sobel 梯度只计算一次，各组阈值只做非极大值抑制和
+    滞后阈值；阈值分割的前景比例直接由直方图得到；区域生长的种子已建好
+    索引时（见 LoadedImage.prepare_region_index）各阈值只做一次比较。结果与
+    逐个调用操作逐字节一致。share 为 False 时每个组合在未登记的图像上独立
+    计算，用于对比。
+
+    参数完全相同的组合只计算一次；Canny 在低阈值大于高阈值时交换两者，
+    交换后相同的组合同样只计算前一个。组合在 workers 个线程中并行求值
+    （OpenCV 与 Pillow 的计算释放 GIL），每个组合单独计时。
+    """
+
+    def __init__(self, operation, grid, fixed=None, workers=None, share=True):
+        self.operation = get_operation(operation) if isinstance(operation, str) else operation
+        names = self.operation.param_names
+        if not grid:
+            raise ValueError("参数网格为空")
+        for name, values in grid.items():
+            if name not in names:
+                raise ValueError(f"操作 {self.operation.name} 没有参数 {name}"
+                                 f"（可用：{', '.join(names) or '无'}）")
+            if not values:
+                raise ValueError(f"参数 {name} 没有取值")
+        fixed = dict(fixed or {})
+        overlap = set(grid) & set(fixed)
+        if overlap:
+            raise ValueError(f"参数不能同时扫描和固定：{', '.join(sorted(overlap))}")
+        # 按操作声明的参数顺序排列
+        self.grid = {name: list(grid[name]) for name in names if name in grid}
+        self.fixed = {name: value for name, value in self.operation.resolve(fixed).items()
+                      if name not in self.grid}
+        if math.prod(self.shape) > MAX_COMBINATIONS:
+            raise ValueError(f"参数组合共 {math.prod(self.shape)} 个，超过上限 {MAX_COMBINATIONS}")
+        self.workers = workers or os.cpu_count() or 1
+        self.share = share
+
+    @property
+    def names(self):
+        """扫描的参数名"""
+        return list(self.grid)
+
+    @property
+    def shape(self):
+        """各扫描参数的取值个数"""
+        return [len(values) for values in self.grid.values()]
+
+    def combinations(self):
+        """返回 [(组合序号, 完整参数字典), ...]，等价的组合只保留第一个"""
+        combinations = []
+        seen = set()
+        for index, values in enumerate(itertools.product(*self.grid.values())):
+            params = self.operation.resolve({**self.fixed, **dict(zip(self.names, values))})
+            key = self._canonical(params)
+            if key in seen:
+                continue
+            seen.add(key)
+            combinations.append((index, params))
+        return combinations
+
+    def file_name(self, result, extension='.png'):
+        """保存结果用的文件名，包含组合序号、操作名和扫描参数的取值"""
+        parts = [f"{result.index:03d}", self.operation.name]
+        parts += [f"{name}-{format_value(result.params[name])}" for name in self.names]
+        return '_'.join(parts).replace(',', '-') + extension
+
+    def _canonical(self, params):
+        if self.operation.name == 'canny_edge':
+            low, high = params['low_threshold'], params['high_threshold']
+            return min(low, high), max(low, high)
+        return tuple(params.values())
+
+    def run(self, image, thumbnail=None, keep_images=True, on_result=None, cancelled=None):
+        """对 PIL 图像求值全部组合，返回 SweepReport
+
+        thumbnail 为缩略图的最大边长，指定时为每个结果生成缩略图（在工作线程中，
+        不计入耗时）；keep_images 为 False 时不保留全尺寸结果，只保留缩略图。
+        on_result(SweepResult) 在工作线程中于每个组合完成后调用，可在此保存结果。
+        cancelled 为可选的回调，每个组合开始前调用，返回 True 时跳过其余组合
+        并返回 None。
+        """
+        combinations = self.combinations()
+        if not self.share:
+            # 未登记的副本，每次调用都重新转换灰度、统计直方图
+            evaluate = self._evaluate_separately(image.copy())
+        start = time.perf_counter()
+        if self.share:
+            # 持有登记的 LoadedImage，各组合通过 LoadedImage.of 共用它的视图
+            loaded = LoadedImage.register(image)
+            with metrics.measure(f"sweep.{self.operation.name}.shared", data_bytes(loaded.image)):
+                evaluate = self._prepare(loaded)
+        shared_seconds = time.perf_counter() - start
+
+        def task(item):
+            index, params = item
+            if cancelled is not None and cancelled():
+                return None
+            started = time.perf_counter()
+            with metrics.measure(f"sweep.{self.operation.name}"):
+                result, coverage = evaluate(params)
+            result = SweepResult(index, params, result, time.perf_counter() - started, coverage)
+            if thumbnail:
+                result.thumbnail = _thumbnail(result.image, thumbnail)
+            if on_result is not None:
+                on_result(result)
+            if not keep_images:
+                result.image = None
+            return result
+
+        with ThreadPoolExecutor(self.workers, thread_name_prefix='sweep') as executor:
+            results = list(executor.map(task, combinations))
+        if any(result is None for result in results):
+            return None
+        return SweepReport(self, results, shared_seconds, time.perf_counter() - start)
+
+    def _prepare(self, loaded):
+        """计算共用的视图与中间结果，返回 evaluate(参数字典) -> (结果图像, 前景比例)"""
+        for view in SHARED_VIEWS.get(self.operation.name, ()):
+            getattr(loaded, view)
+        image = loaded.image
+        name = self.operation.name
+        if name == 'clahe' and 'grid' in self.fixed:
+            loaded.tile_histograms(self.fixed['grid'])
+
+        if name == 'canny_edge':
+            # 与 cv2.Canny 内部相同的 3x3 Sobel 梯度，边界按复制处理
+            gray = loaded.gray_array
+            dx = cv2.Sobel(gray, cv2.CV_16S, 1, 0, ksize=3, borderType=cv2.BORDER_REPLICATE)
+            dy = cv2.Sobel(gray, cv2.CV_16S, 0, 1, ksize=3, borderType=cv2.BORDER_REPLICATE)
+
+            def evaluate(params):
+                edges = cv2.Canny(dx, dy, params['low_threshold'], params['high_threshold'])
+                return Image.fromarray(edges), cv2.countNonZero(edges) / edges.size
+            return evaluate
+
+        if name == 'threshold_segment':
+            # 灰度不小于阈值的像素为前景
+            counts = loaded.stats.gray
+            tail = np.concatenate((np.cumsum(counts[::-1])[::-1], [0]))
+            total = max(int(tail[0]), 1)
+
+            def evaluate(params):
+                threshold = min(max(int(params['threshold']), 0), 256)
+                return self.operation.func(image, **params), int(tail[threshold]) / total
+            return evaluate
+
+        return self._evaluate_separately(image)
+
+    def _evaluate_separately(self, image):
+        def evaluate(params):
+            result = self.operation.func(image, **params)
+            return result, _coverage(self.operation.name, result)
+        return evaluate
+
+
+class ContactSheet:
+    """联系表：按网格排列的缩略图，每格大小为 cell_size（含标注）"""
+
+    def __init__(self, image, columns, cell_size, count):
+        self.image = image
+        self.columns = columns
+        self.cell_size = cell_size
+        self.count = count
+
+    def index_at(self, x, y):
+        """图像坐标 (x, y) 所在格的序号，不在任何一格上时返回 None"""
+        width, height = self.cell_size
+        column, row = int(x // width), int(y // height)
+        if x < 0 or y < 0 or column >= self.columns:
+            return None
+        index = row * self.columns + column
+        return index if index < self.count else None
+
+
+def contact_sheet(images, labels=None, columns=None, cell=256, padding=6):
+    """把图像按 columns 列排成联系表，返回 ContactSheet
+
+    每张图像缩放到 cell x cell 以内，格子的宽高取缩放后的最大宽高，labels 中
+    对应的文本（可多行）写在图像下方；images 中的 None 留为空格。
+    """
+    count = len(images)
+    columns = max(1, min(columns or math.ceil(math.sqrt(count)), count))
+    rows = math.ceil(count / columns)
+    thumbs = [None if image is None else _thumbnail(image, cell) for image in images]
+    width = max((thumb.width for thumb in thumbs if thumb is not None), default=cell)
+    height = max((thumb.height for thumb in thumbs if thumb is not None), default=cell)
+    font = ImageFont.load_default()
+    lines = max((label.count('\n') + 1 for label in labels or () if label), default=0)
+    line_height = font.getbbox('Ag')[3] + 2
+    cell_size = (width + 2 * padding, height + 2 * padding + lines * line_height)
+    sheet = Image.new('RGB', (columns * cell_size[0], rows * cell_size[1]), (48, 48, 48))
+    draw = ImageDraw.Draw(sheet)
+    for index, thumb in enumerate(thumbs):
+        left = index % columns * cell_size[0] + padding
+        top = index // columns * cell_size[1] + padding
+        if thumb is not None:
+            if thumb.mode != 'RGB':
+                thumb = thumb.convert('RGB')
+            sheet.paste(thumb, (left + (width - thumb.width) // 2, top + (height - thumb.height) // 2))
+        if labels is not None and labels[index]:
+            draw.multiline_text((left, top + height + 2), labels[index],
+                                fill=(230, 230, 230), font=font, spacing=2)
+    return ContactSheet(sheet, columns, cell_size, count)
+
+
+def _thumbnail(image, size):
+    """缩放到 size x size 以内，已足够小时原样返回"""
+    scale = min(size / image.width, size / image.height)
+    if scale >= 1:
+        return image
+    target = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return image.resize(target, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+
+def _coverage(name, result):
+    if name not in SEGMENT_OPERATIONS:
+        return None
+    array = np.asarray(result)
+    return cv2.countNonZero(array) / array.size
+
+
+def format_value(value):
+    """参数取值的文本形式，用于标注与文件名"""
+    if isinstance(value, tuple):
+        return ','.join(map(str, value))
+    if isinstance(value, float):
+        return f"{value:g}"
+    return str(value)
+
+
+def _json_value(value):
+    return list(value) if isinstance(value, tuple) else value
\ No newline at end of file
@@ -0,0 +1,304 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from .enhance import EnhanceProcessor
+from .lut import PointLUT
+from ..utils.image_export import export_array
+from ..utils.image_stats import ImageStatistics
+from ..utils.loaded_image import normalize_mode
+
+# 按模式对应的通道数
+MODE_BANDS = {'L': 1, 'RGB': 3, 'RGBA': 4}
+
+# 未压缩格式中可直接映射的原始像素布局：rawmode -> (图像模式, 是否需要反转通道顺序)
+RAW_LAYOUTS = {
+    'L': ('L', False),
+    'RGB': ('RGB', False),
+    'RGBA': ('RGBA', False),
+    'BGR': ('RGB', True)
+}
+
+
+def mode_of(array):
+    """根据数组形状推断图像模式"""
+    if array.ndim == 2:
+        return 'L'
+    return {1: 'L', 3: 'RGB', 4: 'RGBA'}[array.shape[2]]
+
+
+class TileSource:
+    """可按区域读取像素的图像源
+
+    .npy 文件以及 BMP、未压缩 TIFF、PPM 等原始像素格式通过内存映射按需读取，
+    不会整体载入内存；PNG、JPEG 等压缩格式只能整体解码一次。
+    """
+
+    def __init__(self, strips, size, mode, lazy):
+        # strips: [(起始行, 数组), ...]，按行覆盖整幅图像
+        self.strips = strips
+        self.size = size
+        self.mode = mode
+        self.lazy = lazy
+
+    @property
+    def width(self):
+        return self.size[0]
+
+    @property
+    def height(self):
+        return self.size[1]
+
+    @classmethod
+    def from_array(cls, array):
+        array = np.asarray(array, dtype=np.uint8)
+        if array.ndim == 3 and array.shape[2] == 1:
+            array = array[..., 0]
+        return cls([(0, array)], (array.shape[1], array.shape[0]), mode_of(array), True)
+
+    @classmethod
+    def open(cls, path):
+        if path.lower().endswith('.npy'):
+            return cls.from_array(np.load(path, mmap_mode='r'))
+
+        image = Image.open(path)
+        strips = cls._map_raw_strips(path, image)
+        if strips is not None:
+            return cls(strips, image.size, image.mode, True)
+
+        # 压缩格式无法按块解码，整体解码一次并统一为 L/RGB/RGBA
+        image = normalize_mode(image)
+        return cls([(0, np.asarray(image))], image.size, image.mode, False)
+
+    @staticmethod
+    def _map_raw_strips(path, image):
+        """将未压缩的条带映射为内存数组，不支持时返回 None"""
+        if image.mode not in MODE_BANDS or not image.tile:
+            return None
+        bands = MODE_BANDS[image.mode]
+        width = image.width
+        strips = []
+        for tile in image.tile:
+            codec, extents, offset, args = tile[:4]
+            if isinstance(args, str):
+                args = (args, 0, 1)
+            rawmode, stride, orientation = (tuple(args) + (0, 1))[:3]
+            layout = RAW_LAYOUTS.get(rawmode)
+            if codec != 'raw' or layout is None or layout[0] != image.mode:
+                return None
+            left, top, right, bottom = extents
+            if left != 0 or right != width:
+                return None
+            rows = bottom - top
+            stride = stride or width * bands
+            mapped = np.memmap(path, np.uint8, 'r', offset, shape=(rows, stride))
+            array = mapped[:, :width * bands].reshape(rows, width, bands)
+            if orientation < 0:
+                array = array[::-1]
+            if layout[1]:
+                array = array[..., ::-1]
+            if bands == 1:
+                array = array[..., 0]
+            strips.append((top, array))
+        strips.sort(key=lambda strip: strip[0])
+        return strips
+
+    def read(self, left, top, right, bottom):
+        """读取 [left, right) x [top, bottom) 区域，返回连续数组"""
+        parts = []
+        for start, array in self.strips:
+            end = start + array.shape[0]
+            if end <= top or start >= bottom:
+                continue
+            parts.append(array[max(top, start) - start:min(bottom, end) - start, left:right])
+        if len(parts) == 1:
+            return np.array(parts[0])
+        return np.concatenate(parts)
+
+
+class TiledProcessor:
+    """分块处理引擎
+
+    按块读取图像源，对邻域操作（均值、高斯、中值滤波与 Canny）在块四周加上
+    足够的重叠边（halo），逐块执行操作链后裁掉重叠部分直接写入磁盘上的输出。
+    亮度、阈值等点操作不需要重叠边；直方图均衡化、对比度和自动阈值依赖整幅
+    图像的统计量，先用一遍扫描逐块统计直方图并合并（ImageStatistics.merge），
+    再作为点操作执行。
+    """
+
+    POINT_OPERATIONS = ('adjust_brightness', 'threshold_segment')
+    NEIGHBORHOOD_OPERATIONS = ('mean_filter', 'gaussian_filter', 'median_filter', 'canny_edge')
+    GLOBAL_OPERATIONS = ('adjust_contrast', 'equalize', 'auto_threshold')
+
+    def __init__(self, tile_size=1024, workers=None, strip=False, canny_halo=16):
+        self.tile_size = tile_size
+        self.workers = workers or os.cpu_count() or 1
+        # strip 为 True 时按整行条带分块，适合按行存储的格式
+        self.strip = strip
+        # Canny 的滞后阈值连接不是局部操作，较长的弱边缘跨块时可能与整图结果略有差异
+        self.canny_halo = canny_halo
+
+    def halo(self, name, params):
+        """邻域操作所需的重叠边宽度"""
+        if name == 'mean_filter':
+            # BoxBlur 还会以很小的权重用到半径外的一个像素
+            return int(params['radius']) + 1
+        if name == 'gaussian_filter':
+            # GaussianBlur 由三次盒式滤波近似
+            return 3 * (int(params['radius']) + 1)
+        if name == 'median_filter':
+            return int(params['radius'])
+        if name == 'canny_edge':
+            return self.canny_halo
+        return 0
+
+    def tiles(self, width, height):
+        """生成 (left, top, right, bottom) 块坐标"""
+        tile_w = width if self.strip else self.tile_size
+        for top in range(0, height, self.tile_size):
+            for left in range(0, width, tile_w):
+                yield (left, top, min(left + tile_w, width), min(top + self.tile_size, height))
+
+    def run(self, source, chain, output_path, save_options=None):
+        """对图像源执行操作链，结果写入 output_path（.npy 或图像格式），返回输出模式和尺寸
+
+        save_options 为图像格式的导出选项，见 utils.image_export。PNG 和无压缩/
+        Deflate 的 TIFF 逐条带编码，不会把整幅结果载入内存；需要大图输出时
+        应选用这些格式或 .npy。
+        """
+        if not isinstance(source, TileSource):
+            source = TileSource.open(source) if isinstance(source, str) \
+                else TileSource.from_array(source)
+
+        steps = []
+        for op, params in chain:
+            if op.name not in self.POINT_OPERATIONS + self.NEIGHBORHOOD_OPERATIONS + \
+                    self.GLOBAL_OPERATIONS:
+                raise ValueError(f"操作 {op.name} 不支持分块处理")
+            if op.name in self.GLOBAL_OPERATIONS:
+                # 全局操作的统计量取决于之前各步的输出
+                stats = self._statistics(source, steps)
+                steps.append((self._resolve_global(op.name, params, stats), 0))
+            else:
+                steps.append((self._bind(op, params), self.halo(op.name, params)))
+
+        writer = _OutputWriter(output_path, source.size, save_options)
+        try:
+            self._map_tiles(source, steps, writer.write)
+        except BaseException:
+            writer.close(discard=True)
+            raise
+        writer.close()
+        return writer.mode, source.size
+
+    @staticmethod
+    def _bind(op, params):
+        return lambda image: op.func(image, **params)
+
+    @staticmethod
+    def _resolve_global(name, params, stats):
+        """根据整图的统计量把全局操作转换为逐像素操作"""
+        if name == 'equalize':
+            lut = EnhanceProcessor.equalize_lut(stats.gray.tolist())
+            return lambda image: image.convert('L').point(lut)
+        if name == 'auto_threshold':
+            lut = PointLUT.multi_threshold(stats.multi_otsu(params['classes'])).tolist()
+            return lambda image: image.convert('L').point(lut)
+
+        # 与 ImageEnhance.Contrast 相同：以整图灰度均值为退化图像进行混合
+        mean = PointLUT.histogram_mean(stats.gray)
+        factor = params['factor']
+
+        def contrast(image):
+            degenerate = Image.new('L', image.size, mean)
+            if image.mode != 'L':
+                degenerate = degenerate.convert(image.mode)
+            if 'A' in image.getbands():
+                degenerate.putalpha(image.getchannel('A'))
+            return Image.blend(degenerate, image, factor)
+        return contrast
+
+    def _statistics(self, source, steps):
+        """扫描一遍图像，合并各块经过 steps 处理后的直方图统计量"""
+        merged = None
+        lock = threading.Lock()
+
+        def accumulate(box, result):
+            nonlocal merged
+            # 各块的统计在工作线程中并行完成，只有合并需要加锁
+            stats = ImageStatistics.from_array(result)
+            with lock:
+                merged = stats if merged is None else merged.merge(stats)
+
+        self._map_tiles(source, steps, accumulate)
+        return merged
+
+    def _map_tiles(self, source, steps, consume):
+        halo = sum(h for _, h in steps)
+        width, height = source.size
+
+        def process(box):
+            left, top, right, bottom = box
+            # 重叠边在图像边界处截断，边界像素的处理与整图一致
+            x0, y0 = max(0, left - halo), max(0, top - halo)
+            x1, y1 = min(width, right + halo), min(height, bottom + halo)
+            image = Image.fromarray(source.read(x0, y0, x1, y1))
+            for func, _ in steps:
+                image = func(image)
+            result = np.asarray(image)
+            consume(box, result[top - y0:bottom - y0, left - x0:right - x0])
+
+        if self.workers == 1:
+            for box in self.tiles(width, height):
+                process(box)
+            return
+        with ThreadPoolExecutor(self.workers) as executor:
+            # list() 使工作线程中的异常在这里抛出
+            list(executor.map(process, self.tiles(width, height)))
+
+
+class _OutputWriter:
+    """把各块结果直接写入磁盘上的内存映射数组
+
+    图像格式先写入临时 .npy，结束后由 export_array 从映射内存逐条带编码
+    （PNG、无压缩和 Deflate 的 TIFF），内存占用与图像大小无关；其他格式的
+    RGB 输出需要整体载入内存，导出时会给出警告。
+    """
+
+    def __init__(self, path, size, save_options=None):
+        self.path = path
+        self.size = size
+        self.save_options = save_options or {}
+        self.mode = None
+        self.array = None
+        self.lock = threading.Lock()
+        self.npy_path = path if path.lower().endswith('.npy') else path + '.tmp.npy'
+
+    def write(self, box, result):
+        with self.lock:
+            if self.array is None:
+                width, height = self.size
+                shape = (height, width) + result.shape[2:]
+                self.mode = mode_of(result)
+                self.array = np.lib.format.open_memmap(self.npy_path, 'w+', np.uint8, shape)
+        left, top, right, bottom = box
+        self.array[top:bottom, left:right] = result
+
+    def close(self, discard=False):
+        if self.array is None:
+            return
+        array, self.array = self.array, None
+        if discard:
+            del array
+            os.remove(self.npy_path)
+            return
+        array.flush()
+        if self.npy_path != self.path:
+            try:
+                export_array(array, self.path, **self.save_options)
+            finally:
+                del array
+                os.remove(self.npy_path)
\ No newline at end of file
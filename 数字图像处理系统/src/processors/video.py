@@ -0,0 +1,321 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import cv2
+import numpy as np
+
+from .affine import AffineTransform
+from .arrays import ArrayProcessor
+from .lut import PointLUT
+from .registry import parse_affine_steps
+from ..utils.image_stats import histogram, rgb_to_gray
+
+# 插值方式名称 -> OpenCV 常量，与 affine 操作的 resample 参数对应
+INTERPOLATIONS = {
+    'nearest': cv2.INTER_NEAREST,
+    'bilinear': cv2.INTER_LINEAR,
+    'bicubic': cv2.INTER_CUBIC,
+    'lanczos': cv2.INTER_LANCZOS4
+}
+
+
+# ---- 逐帧操作 ----
+# 直接处理 OpenCV 读出的 uint8 数组（灰度或 BGR），不经过 PIL。点操作、均值
+# 和中值滤波、分割由 ArrayProcessor 完成，灰度按 BGR 通道顺序转换，结果与
+# PIL 接口一致；旋转、缩放、仿射变换和高斯滤波改用 OpenCV 实现。
+
+def _gray(frame):
+    return rgb_to_gray(frame, 'BGR')
+
+
+def _warp(frame, transform, interpolation=cv2.INTER_NEAREST, size=None, fill=0):
+    """按 AffineTransform 的逆变换系数重采样，size 为输出 (宽, 高)，默认与输入相同
+
+    PIL 以 (x + 0.5, y + 0.5) 为像素中心，OpenCV 以整数坐标为像素中心，
+    这里把系数换算到 OpenCV 的约定。OpenCV 以定点数计算采样坐标，采样点
+    恰好落在像素边界上时（如奇数尺寸图像旋转 90 度）可能与 GeometricProcessor
+    相差一个像素，其余情况结果一致。
+    """
+    a, b, c, d, e, f = transform.coefficients
+    matrix = np.array([[a, b, c + 0.5 * (a + b) - 0.5],
+                       [d, e, f + 0.5 * (d + e) - 0.5]])
+    return cv2.warpAffine(frame, matrix, size or _size(frame),
+                          flags=interpolation | cv2.WARP_INVERSE_MAP,
+                          borderMode=cv2.BORDER_CONSTANT, borderValue=fill)
+
+
+def _size(frame):
+    height, width = frame.shape[:2]
+    return width, height
+
+
+def rotate(frame, angle):
+    return _warp(frame, AffineTransform(_size(frame)).rotate(angle))
+
+
+def scale(frame, scale_factor):
+    width, height = _size(frame)
+    new_size = (max(1, int(width * scale_factor)), max(1, int(height * scale_factor)))
+    x, y = (width - new_size[0]) // 2, (height - new_size[1]) // 2
+    resized = cv2.resize(frame, new_size, interpolation=cv2.INTER_LANCZOS4)
+    canvas = np.full_like(frame, 255)
+    # 放大时只保留画布范围内的部分
+    left, top = max(0, x), max(0, y)
+    right, bottom = min(width, x + new_size[0]), min(height, y + new_size[1])
+    canvas[top:bottom, left:right] = resized[top - y:bottom - y, left - x:right - x]
+    return canvas
+
+
+def affine(frame, steps, resample='bicubic', bounds='same'):
+    if resample not in INTERPOLATIONS:
+        raise ValueError(f"未知的插值方式：{resample}（可用：{', '.join(INTERPOLATIONS)}）")
+    transform = AffineTransform.from_steps(_size(frame), parse_affine_steps(steps))
+    size, (dx, dy) = transform.output_box(bounds)
+    if dx or dy:
+        transform = AffineTransform(_size(frame)).concat(transform).translate(dx, dy)
+    return _warp(frame, transform, INTERPOLATIONS[resample], size)
+
+
+def adjust_contrast(frame, factor):
+    mean = PointLUT.histogram_mean(histogram(_gray(frame)))
+    return ArrayProcessor.adjust_contrast(frame, factor, mean)
+
+
+def equalize(frame):
+    return ArrayProcessor.equalize(_gray(frame))
+
+
+def clahe(frame, clip_limit=2.0, grid=8):
+    return ArrayProcessor.clahe(_gray(frame), clip_limit, grid)
+
+
+def gaussian_filter(frame, radius):
+    # ImageFilter.GaussianBlur 的半径即标准差
+    return cv2.GaussianBlur(frame, (0, 0), radius, borderType=cv2.BORDER_REPLICATE)
+
+
+def threshold_segment(frame, threshold):
+    return ArrayProcessor.threshold_segment(_gray(frame), threshold)
+
+
+def auto_threshold(frame, classes=2):
+    return ArrayProcessor.auto_threshold(_gray(frame), classes)
+
+
+def canny_edge(frame, low_threshold, high_threshold):
+    return ArrayProcessor.canny_edge(_gray(frame), low_threshold, high_threshold)
+
+
+def region_growing(frame, threshold, seed=None):
+    gray = _gray(frame)
+    if seed is None:
+        seed = (gray.shape[0] // 2, gray.shape[1] // 2)
+    return ArrayProcessor.region_growing(gray, seed, threshold)
+
+
+FRAME_OPERATIONS = {func.__name__: func for func in [
+    ArrayProcessor.translate, rotate, scale, ArrayProcessor.mirror, affine,
+    ArrayProcessor.adjust_brightness, adjust_contrast, equalize, clahe,
+    ArrayProcessor.mean_filter, gaussian_filter, ArrayProcessor.median_filter,
+    threshold_segment, auto_threshold, canny_edge, region_growing
+]}
+
+
+def compile_chain(chain):
+    """把 parse_chain 得到的操作链转换为逐帧函数"""
+    steps = []
+    for op, params in chain:
+        func = FRAME_OPERATIONS.get(op.name)
+        if func is None:
+            raise ValueError(f"操作 {op.name} 不支持视频处理")
+        steps.append((func, params))
+
+    def process(frame):
+        for func, params in steps:
+            frame = func(frame, **params)
+        return frame
+    return process
+
+
+# ---- 视频流 ----
+
+class VideoSource:
+    """视频帧来源
+
+    path 为视频文件路径或摄像头编号。live 为 True 时按实时方式供帧：文件
+    按其帧率定时读出（模拟摄像头），处理跟不上时新帧被丢弃而不是等待；
+    摄像头始终是实时的。
+    """
+
+    def __init__(self, path, live=False, fps=None):
+        self.camera = isinstance(path, int) or str(path).isdigit()
+        self.capture = cv2.VideoCapture(int(path) if self.camera else path)
+        if not self.capture.isOpened():
+            raise ValueError(f"无法打开视频：{path}")
+        self.live = live or self.camera
+        self.fps = fps or self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_count = int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT)) if not self.camera else 0
+
+    def frames(self, stop):
+        """逐帧产生 (帧序号, 采集时刻, 帧)，stop 被设置时结束"""
+        start = time.perf_counter()
+        index = 0
+        while not stop.is_set():
+            if self.live and not self.camera:
+                # 模拟摄像头：第 index 帧不早于 start + index / fps 到达
+                delay = start + index / self.fps - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            ok, frame = self.capture.read()
+            if not ok:
+                break
+            yield index, time.perf_counter(), frame
+            index += 1
+
+    def close(self):
+        self.capture.release()
+
+
+class StreamStats:
+    """流处理统计：帧数、丢帧、跳帧、吞吐量与延迟"""
+
+    def __init__(self):
+        self.read = 0
+        self.processed = 0
+        self.dropped = 0     # 队列已满时丢弃的实时帧
+        self.skipped = 0     # 取出时已超出延迟预算而跳过的帧
+        self.late = 0        # 写出时超出延迟预算的帧
+        self.latencies = []
+        self.elapsed = 0.0
+
+    @property
+    def fps(self):
+        return self.processed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def latency(self, q):
+        return float(np.percentile(self.latencies, q)) if self.latencies else 0.0
+
+    def as_dict(self):
+        return {
+            'read': self.read,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'skipped': self.skipped,
+            'late': self.late,
+            'elapsed_s': self.elapsed,
+            'fps': self.fps,
+            'latency_p50_ms': self.latency(50) * 1000,
+            'latency_p95_ms': self.latency(95) * 1000
+        }
+
+
+class VideoProcessor:
+    """视频流处理器
+
+    读取线程把帧放入容量为 queue_size 的有界队列，主线程取出后交给
+    workers 个线程并行处理（OpenCV 调用会释放 GIL），再按帧序号顺序写出。
+    主线程在等待新帧的同时每隔 EMIT_POLL 秒检查一次处理中的帧，完成的帧
+    随即写出，不必等到下一帧到达。设置 latency_budget（秒）时，取出时已
+    超过预算的帧直接跳过；写出时超过预算的帧计入 StreamStats.late。
+    """
+
+    # 有帧在处理时等待新帧的最长时间（秒），即完成的帧最多推迟写出的时间
+    EMIT_POLL = 0.001
+
+    def __init__(self, chain, workers=None, queue_size=8, latency_budget=None):
+        self.process = compile_chain(chain)
+        self.workers = workers or 1
+        self.queue_size = queue_size
+        self.latency_budget = latency_budget
+
+    def run(self, source, output_path=None, fourcc='mp4v', on_frame=None):
+        """处理整个视频流，返回 StreamStats；on_frame(序号, 结果) 在写出每帧后调用"""
+        stats = StreamStats()
+        frames = queue.Queue(self.queue_size)
+        stop = threading.Event()
+        reader = threading.Thread(target=self._read, args=(source, frames, stop, stats),
+                                  daemon=True)
+        writer = None
+        pending = deque()
+        start = time.perf_counter()
+        reader.start()
+        try:
+            with ThreadPoolExecutor(self.workers) as executor:
+                finished = False
+                while not finished or pending:
+                    # 先按顺序写出已完成的帧，再等待
+                    while pending and pending[0][2].done():
+                        writer = self._emit(pending.popleft(), writer, output_path, fourcc,
+                                            source.fps, stats, on_frame)
+                    if finished or len(pending) >= self.workers:
+                        # 不再取新帧：等待任一处理中的帧完成
+                        if pending:
+                            wait([future for _, _, future in pending],
+                                 return_when=FIRST_COMPLETED)
+                        continue
+                    try:
+                        item = frames.get(timeout=self.EMIT_POLL if pending else None)
+                    except queue.Empty:
+                        continue
+                    if item is None:
+                        finished = True
+                        continue
+                    index, captured, frame = item
+                    if self.latency_budget is not None and \
+                            time.perf_counter() - captured > self.latency_budget:
+                        stats.skipped += 1
+                        continue
+                    pending.append((index, captured, executor.submit(self.process, frame)))
+        finally:
+            stop.set()
+            # 让读取线程从阻塞的 put 中退出
+            while reader.is_alive():
+                try:
+                    frames.get_nowait()
+                except queue.Empty:
+                    reader.join(0.05)
+            if writer is not None:
+                writer.release()
+            stats.elapsed = time.perf_counter() - start
+        return stats
+
+    @staticmethod
+    def _read(source, frames, stop, stats):
+        try:
+            for item in source.frames(stop):
+                stats.read += 1
+                if source.live:
+                    try:
+                        frames.put_nowait(item)
+                    except queue.Full:
+                        stats.dropped += 1
+                else:
+                    frames.put(item)
+        finally:
+            frames.put(None)
+
+    def _emit(self, entry, writer, output_path, fourcc, fps, stats, on_frame):
+        index, captured, future = entry
+        result = future.result()
+        stats.processed += 1
+        latency = time.perf_counter() - captured
+        stats.latencies.append(latency)
+        if self.latency_budget is not None and latency > self.latency_budget:
+            stats.late += 1
+        if output_path is not None:
+            if result.ndim == 2:
+                # 部分编码器只接受彩色帧
+                result = cv2.cvtColor(result, cv2.COLOR_GRAY2BGR)
+            if writer is None:
+                height, width = result.shape[:2]
+                writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*fourcc),
+                                         fps, (width, height))
+                if not writer.isOpened():
+                    raise ValueError(f"无法写入视频：{output_path}")
+            writer.write(result)
+        if on_frame is not None:
+            on_frame(index, result)
+        return writer
\ No newline at end of file
@@ -0,0 +1,8 @@
+from .service import ProcessingService, Overloaded
+from .http_server import ProcessingServer
+
+__all__ = [
+    'ProcessingService',
+    'Overloaded',
+    'ProcessingServer'
+]
\ No newline at end of file
@@ -0,0 +1,168 @@
+import json
+import logging
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from .service import Overloaded
+from ..processors.registry import OPERATIONS
+
+logger = logging.getLogger(__name__)
+
+# 队列已满时建议客户端重试的间隔（秒）
+RETRY_AFTER = 1
+
+
+class ProcessingServer(ThreadingHTTPServer):
+    """本机处理服务的 HTTP 接口，每个连接一个线程，计算交给 ProcessingService
+
+    GET  /health       存活检查
+    GET  /operations   可用操作及其参数默认值
+    GET  /metrics      队列深度、缓存命中、延迟分位数与吞吐量
+    POST /process      处理图像：
+        请求体为图像文件，参数在查询串中：chain（操作链）或 pipeline（流水线
+        JSON），可选 output（输出节点）与 format（输出格式，默认 png）；
+        或 Content-Type 为 application/json，请求体为
+        {"path": ..., "chain"/"pipeline": ..., "output": ..., "format": ...}，
+        读取服务端允许目录下的文件。
+    结果以分块传输编码边编码边返回，缓存命中时直接返回。参数错误返回 400，
+    队列已满返回 503 并带 Retry-After。
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, service):
+        super().__init__(address, RequestHandler)
+        self.service = service
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'ImageProcessingServer/1.0'
+    # 响应头与数据分多次写出，关闭 Nagle 算法以免等待延迟确认
+    disable_nagle_algorithm = True
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def log_message(self, format, *args):
+        logger.debug("%s %s", self.address_string(), format % args)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == '/health':
+            self.send_json(200, {'status': 'ok'})
+        elif path == '/operations':
+            self.send_json(200, {op.name: {name: default for name, _, default in op.params}
+                                 for op in OPERATIONS.values()})
+        elif path == '/metrics':
+            self.send_json(200, self.service.stats())
+        else:
+            self.send_json(404, {'error': f"未知的路径：{path}"})
+
+    def do_POST(self):
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        if url.path != '/process':
+            self.send_json(404, {'error': f"未知的路径：{url.path}"})
+            return
+        try:
+            job = self.parse_job(url)
+        except ValueError as e:
+            self.send_json(400, {'error': str(e)})
+            return
+
+        data = self.service.cached(job)
+        if data is not None:
+            self.send_response(200)
+            self.send_header('Content-Type', job.content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.send_header('X-Cache', 'hit')
+            self.end_headers()
+            self.wfile.write(data)
+            self.service.record_request(time.perf_counter() - start, len(data))
+            return
+
+        try:
+            future = self.service.submit(job)
+        except Overloaded as e:
+            self.send_json(503, {'error': str(e)}, {'Retry-After': str(RETRY_AFTER)})
+            return
+        # 编码同样占用 CPU，编码完成后才交还排队名额
+        try:
+            self.send_result(job, future, start)
+        finally:
+            self.service.release(job)
+
+    def send_result(self, job, future, start):
+        try:
+            image = future.result()
+        except (ValueError, IndexError, OSError) as e:
+            # 参数不适用于该图像（如种子点超出图像范围），或上传的数据无法解码
+            self.send_json(400, {'error': str(e)})
+            return
+        except Exception as e:
+            logger.exception("处理请求出错")
+            self.send_json(500, {'error': f"{type(e).__name__}: {e}"})
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', job.content_type)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('X-Cache', 'miss')
+        self.end_headers()
+        try:
+            data = self.service.encode(job, image, self.write_chunk)
+            self.wfile.write(b'0\r\n\r\n')
+        except Exception:
+            # 响应头已发出，只能中断连接
+            logger.exception("编码结果出错")
+            self.close_connection = True
+            return
+        self.service.record_request(time.perf_counter() - start, len(data))
+
+    def parse_job(self, url):
+        length = self.headers.get('Content-Length')
+        if length is None:
+            raise ValueError("缺少 Content-Length")
+        length = int(length)
+        if length > self.service.max_upload_bytes:
+            # 不读取过大的请求体，处理完后关闭连接
+            self.close_connection = True
+            raise ValueError(f"请求体超过 {self.service.max_upload_bytes // 2**20} MB")
+        body = self.rfile.read(length)
+
+        content_type = self.headers.get('Content-Type', '').split(';')[0].strip()
+        if content_type == 'application/json':
+            try:
+                spec = json.loads(body)
+            except ValueError as e:
+                raise ValueError(f"请求体不是有效的 JSON：{e}") from None
+            if not isinstance(spec, dict):
+                raise ValueError("请求体须为 JSON 对象")
+            return self.service.create_job(spec.get('chain'), spec.get('pipeline'),
+                                           spec.get('output'), spec.get('format'),
+                                           path=spec.get('path'))
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        return self.service.create_job(query.get('chain'), query.get('pipeline'),
+                                       query.get('output'), query.get('format'), data=body)
+
+    def write_chunk(self, data):
+        if data:
+            self.wfile.write(b'%x\r\n' % len(data) + bytes(data) + b'\r\n')
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
\ No newline at end of file
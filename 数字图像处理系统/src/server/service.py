@@ -0,0 +1,298 @@
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from ..processors.pipeline import Pipeline
+from ..processors.registry import parse_chain
+from ..utils.image_store import ImageStore
+from ..utils.instrumentation import Instrumentation
+from ..utils.loaded_image import LoadedImage
+from ..utils.result_cache import ResultCache
+
+# 输出格式 -> (PIL 格式名, MIME 类型, 编码时是否需要可定位的文件)
+FORMATS = {
+    'png': ('PNG', 'image/png', False),
+    'jpeg': ('JPEG', 'image/jpeg', False),
+    'jpg': ('JPEG', 'image/jpeg', False),
+    'webp': ('WEBP', 'image/webp', False),
+    'bmp': ('BMP', 'image/bmp', False),
+    'tiff': ('TIFF', 'image/tiff', True),
+    'tif': ('TIFF', 'image/tiff', True)
+}
+
+# 计算吞吐量的时间窗口（秒）
+THROUGHPUT_WINDOW = 60
+
+
+class Overloaded(Exception):
+    """等待处理的任务已达上限，调用方应稍后重试"""
+
+
+class Job:
+    """一次处理请求：源图像（上传的编码数据或文件路径）、处理图、输出节点和格式
+
+    key 由源图像的哈希、处理图、输出节点和格式计算，相同的请求得到相同的
+    key，用于缓存编码结果和合并同时到达的相同请求。
+    """
+
+    def __init__(self, pipeline, output, fmt, data=None, path=None, source_key=None):
+        self.pipeline = pipeline
+        self.output = output
+        self.format = fmt
+        self.data = data
+        self.path = path
+        self.source_key = source_key
+        spec = json.dumps([source_key, pipeline.to_dict(), output, fmt], sort_keys=True)
+        self.key = hashlib.blake2b(spec.encode(), digest_size=16).hexdigest()
+
+    @property
+    def content_type(self):
+        return FORMATS[self.format][1]
+
+
+class ProcessingService:
+    """多客户端共用的处理服务
+
+    任务在 workers 个线程的线程池中执行（OpenCV 和 Pillow 的计算会释放
+    GIL）。排队、正在执行和正在编码结果的任务合计不超过 workers +
+    queue_size，超出时 submit 抛出 Overloaded，由调用方（HTTP 服务返回
+    503）实现反压；调用方编码完成后调用 release 交还名额。
+    中间结果与编码后的输出都存入同一个按字节数限制的 ResultCache：中间
+    结果以处理图节点的内容哈希为键，不同请求共用相同的前缀；编码结果以
+    Job.key 为键，再次请求直接返回。同时到达的相同请求只计算一次。
+
+    roots 为允许按路径读取文件的目录，为空时只接受上传的图像。
+    """
+
+    def __init__(self, workers=None, queue_size=None, cache_bytes=512 * 2**20,
+                 roots=(), max_upload_bytes=256 * 2**20):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = self.workers * 2 if queue_size is None else queue_size
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.max_upload_bytes = max_upload_bytes
+        self.cache = ResultCache(cache_bytes)
+        self.metrics = Instrumentation()
+        self.metrics.enable()
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='job')
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self._lock = threading.Lock()
+        self._inflight = {}          # Job.key -> [Future, 使用者数]
+        self._completions = deque(maxlen=8192)
+        self.started = time.time()
+        self.queued = 0
+        self.running = 0
+        self.encoding = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.cache_hits = 0
+
+    # ---- 请求解析 ----
+
+    def create_job(self, chain=None, pipeline=None, output=None, fmt='png',
+                   data=None, path=None):
+        """校验请求并创建 Job，参数有误时抛出 ValueError"""
+        fmt = (fmt or 'png').lower()
+        if fmt not in FORMATS:
+            raise ValueError(f"不支持的输出格式：{fmt}（可用：{', '.join(FORMATS)}）")
+        if not isinstance(chain, (str, type(None))) or \
+                not isinstance(pipeline, (str, dict, type(None))):
+            raise ValueError("chain 须为文本，pipeline 须为 JSON 文本或对象")
+        if pipeline is not None:
+            if isinstance(pipeline, str):
+                pipeline = Pipeline.from_json(pipeline, self.cache)
+            else:
+                pipeline = Pipeline.from_dict(pipeline, self.cache)
+        elif chain:
+            pipeline = Pipeline.from_chain(parse_chain(chain), self.cache)
+        else:
+            raise ValueError("须指定 chain 或 pipeline")
+        if not pipeline.outputs:
+            raise ValueError("处理图为空")
+        output = output or pipeline.outputs[0]
+        pipeline.node(output)
+
+        if (data is None) == (path is None):
+            raise ValueError("须上传图像或指定 path 之一")
+        if data is not None:
+            if len(data) > self.max_upload_bytes:
+                raise ValueError(f"上传的图像超过 {self.max_upload_bytes // 2**20} MB")
+            source_key = hashlib.blake2b(data, digest_size=16).hexdigest()
+        else:
+            path = self.resolve_path(path)
+            # 文件以路径、修改时间和大小标识，与 ImageStore 的条目键相同
+            identity = json.dumps(ImageStore.identify(path))
+            source_key = hashlib.blake2b(identity.encode(), digest_size=16).hexdigest()
+        return Job(pipeline, output, fmt, data, path, source_key)
+
+    def resolve_path(self, path):
+        """只允许读取 roots 目录下的已有文件"""
+        if not self.roots:
+            raise ValueError("服务未开放按路径读取文件")
+        path = os.path.realpath(path)
+        if not any(os.path.commonpath([root, path]) == root for root in self.roots):
+            raise ValueError(f"路径不在允许的目录中：{path}")
+        if not os.path.isfile(path):
+            raise ValueError(f"文件不存在：{path}")
+        return path
+
+    # ---- 执行 ----
+
+    def cached(self, job):
+        """已缓存的编码结果，没有时返回 None"""
+        data = self.cache.get(('encoded', job.key))
+        if data is not None:
+            with self._lock:
+                self.cache_hits += 1
+        return data
+
+    def submit(self, job):
+        """提交任务，返回结果为 PIL 图像的 Future；队列已满时抛出 Overloaded
+
+        任务占用的名额在结果编码完成后才交还：提交成功的调用方无论成败都须
+        调用 release(job)。相同的任务正在执行或编码时返回同一个 Future，
+        共用一个名额。
+        """
+        with self._lock:
+            entry = self._inflight.get(job.key)
+            if entry is not None:
+                entry[1] += 1
+                return entry[0]
+            if not self._slots.acquire(blocking=False):
+                self.rejected += 1
+                raise Overloaded(f"等待处理的任务已达上限（{self.workers + self.queue_size}）")
+            self.queued += 1
+            future = self._executor.submit(self._run, job, time.perf_counter())
+            self._inflight[job.key] = [future, 1]
+        future.add_done_callback(self._finish)
+        return future
+
+    def release(self, job):
+        """调用方不再使用 submit 返回的结果时调用，最后一个使用者交还名额"""
+        with self._lock:
+            entry = self._inflight[job.key]
+            entry[1] -= 1
+            if entry[1]:
+                return
+            del self._inflight[job.key]
+        self._slots.release()
+
+    def _run(self, job, submitted):
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        self.metrics.record('queue_wait', time.perf_counter() - submitted)
+        try:
+            with self.metrics.measure('process'):
+                if job.path is not None:
+                    image = LoadedImage.open(job.path).image
+                else:
+                    try:
+                        image = Image.open(io.BytesIO(job.data))
+                    except OSError:
+                        raise ValueError("无法识别上传的图像格式") from None
+                    image = LoadedImage.from_image(image).image
+                job.pipeline.set_input(image, job.source_key)
+                return job.pipeline.evaluate(job.output)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    def _finish(self, future):
+        if future.cancelled() or future.exception() is not None:
+            with self._lock:
+                self.failed += 1
+
+    def encode(self, job, image, write):
+        """把结果编码为 job.format，边编码边调用 write(数据块)，并缓存完整的编码结果
+
+        在调用方线程中执行，此时任务仍占用 submit 取得的名额。
+        """
+        # 同一任务的其他请求已编码完成
+        data = self.cache.get(('encoded', job.key))
+        if data is not None:
+            write(data)
+            return data
+        name, _, seekable = FORMATS[job.format]
+        if name == 'JPEG' and image.mode not in ('L', 'RGB'):
+            image = image.convert('RGB')
+        with self._lock:
+            self.encoding += 1
+        start = time.perf_counter()
+        buffer = io.BytesIO()
+        try:
+            if seekable:
+                image.save(buffer, name)
+                data = buffer.getvalue()
+                write(data)
+            else:
+                image.save(_TeeWriter(write, buffer), name)
+                data = buffer.getvalue()
+        finally:
+            with self._lock:
+                self.encoding -= 1
+        self.metrics.record('encode', time.perf_counter() - start, len(data))
+        self.cache.put(('encoded', job.key), data)
+        return data
+
+    def record_request(self, elapsed, nbytes):
+        """记录一次完成的请求（含缓存命中）的总耗时和输出字节数"""
+        self.metrics.record('request', elapsed, nbytes)
+        with self._lock:
+            self.completed += 1
+            self._completions.append(time.time())
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            recent = sum(1 for t in self._completions if now - t <= THROUGHPUT_WINDOW)
+            counters = {
+                'workers': self.workers,
+                'capacity': self.workers + self.queue_size,
+                'queued': self.queued,
+                'running': self.running,
+                'encoding': self.encoding,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'cache_hits': self.cache_hits
+            }
+        uptime = now - self.started
+        return {
+            **counters,
+            'uptime_s': uptime,
+            'throughput_rps': recent / min(uptime, THROUGHPUT_WINDOW) if uptime > 0 else 0.0,
+            'cache': {
+                'entries': len(self.cache),
+                'bytes': self.cache.bytes_used,
+                'hits': self.cache.hits,
+                'misses': self.cache.misses
+            },
+            'timings': self.metrics.snapshot()
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+class _TeeWriter:
+    """PIL 编码器的输出文件：每个数据块立即交给 write，同时保存一份副本"""
+
+    def __init__(self, write, buffer):
+        self._write = write
+        self._buffer = buffer
+
+    def write(self, data):
+        self._write(data)
+        self._buffer.write(data)
+        return len(data)
+
+    def flush(self):
+        pass
\ No newline at end of file
@@ -0,0 +1,387 @@
+import logging
+import os
+import struct
+import time
+import uuid
+import zlib
+
+from PIL import Image, TiffImagePlugin, features
+
+from .instrumentation import metrics, data_bytes
+from .lazy_import import lazy_import
+
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+# 超过该像素数的 PNG 在 adaptive 选项开启时降为 FAST_PNG_LEVEL：
+# 12 MP 的照片压缩级别 6 约需 7 秒，级别 1 约 1.3 秒，文件只大 15% 左右
+ADAPTIVE_PIXELS = 8 * 10**6
+FAST_PNG_LEVEL = 1
+# 优化或渐进式 JPEG 要在内存中缓冲整个输出文件，超过该像素数时不使用，
+# 使编码结果直接写入磁盘
+JPEG_BUFFER_PIXELS = 64 * 10**6
+# WebP 的宽高上限
+WEBP_MAX_SIZE = 16383
+# 无压缩 TIFF 每个条带的目标字节数（Pillow 默认整幅图像一个条带）；
+# export_array 逐条带编码时每次读取的字节数也取该值
+TIFF_STRIP_BYTES = 1 * 2**20
+# 经典 TIFF 以 32 位整数记录偏移量，文件不能超过 4 GB
+TIFF_MAX_BYTES = 2**32 - 1
+
+
+class ExportFormat:
+    """导出格式：PIL 格式名、扩展名和可调选项
+
+    params 为 [(选项名, 说明, 默认值, 取值范围), ...]，取值范围对整数为
+    (最小值, 最大值)，对文本为可选值，对布尔值为 None。
+    """
+
+    def __init__(self, name, extensions, params):
+        self.name = name
+        self.extensions = extensions
+        self.params = params
+
+    @property
+    def extension(self):
+        return self.extensions[0]
+
+    def resolve(self, options):
+        """以默认值补全 options 并校验，文本形式的取值（如命令行参数）按类型转换"""
+        known = {name: (default, choices) for name, _, default, choices in self.params}
+        for name in options:
+            if name not in known:
+                raise ValueError(f"{self.name} 没有选项 {name}（可用：{', '.join(known) or '无'}）")
+        resolved = {}
+        for name, (default, choices) in known.items():
+            value = options.get(name, default)
+            if isinstance(default, bool):
+                if isinstance(value, str):
+                    value = value.lower() in ('1', 'true', 'yes', 'on')
+                value = bool(value)
+            elif isinstance(default, int):
+                try:
+                    value = int(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"选项 {name} 须为整数：{value}") from None
+                low, high = choices
+                if not low <= value <= high:
+                    raise ValueError(f"选项 {name} 须在 {low}-{high} 之间：{value}")
+            elif value not in choices:
+                raise ValueError(f"选项 {name} 须为 {', '.join(choices)} 之一：{value}")
+            resolved[name] = value
+        return resolved
+
+
+# 速度与大小的取舍：PNG 压缩级别越高越小越慢；JPEG 的优化与渐进式略小但更慢；
+# WebP 的 method 越大越小越慢，无损模式很慢；TIFF 均为无损，按条带写入
+EXPORT_FORMATS = {
+    'png': ExportFormat('PNG', ('.png',), [
+        ('compress_level', "压缩级别", 6, (0, 9)),
+        ('adaptive', "大图快速压缩", True, None)
+    ]),
+    'jpeg': ExportFormat('JPEG', ('.jpg', '.jpeg'), [
+        ('quality', "质量", 90, (1, 100)),
+        ('optimize', "优化编码", False, None),
+        ('progressive', "渐进式", False, None)
+    ]),
+    'tiff': ExportFormat('TIFF', ('.tif', '.tiff'), [
+        ('compression', "压缩", 'raw', ('raw', 'tiff_lzw', 'tiff_adobe_deflate'))
+    ])
+}
+if features.check('webp'):
+    EXPORT_FORMATS['webp'] = ExportFormat('WEBP', ('.webp',), [
+        ('quality', "质量", 90, (1, 100)),
+        ('method', "压缩方法", 4, (0, 6)),
+        ('lossless', "无损", False, None)
+    ])
+
+
+class ExportResult:
+    """一次导出的结果：路径、格式、输出字节数、编码并写入的耗时，以及自动调整的说明"""
+
+    def __init__(self, path, format, nbytes, seconds, notes=()):
+        self.path = path
+        self.format = format
+        self.nbytes = nbytes
+        self.seconds = seconds
+        self.notes = list(notes)
+
+    def describe(self):
+        text = f"{self.format}，{self.nbytes / 2**20:.1f} MB，{self.seconds:.2f} s"
+        if self.notes:
+            text += f"（{'；'.join(self.notes)}）"
+        return text
+
+
+def format_for_path(path):
+    """按扩展名返回 EXPORT_FORMATS 中的格式键，其他格式返回 None"""
+    extension = os.path.splitext(path)[1].lower()
+    for key, fmt in EXPORT_FORMATS.items():
+        if extension in fmt.extensions:
+            return key
+    return None
+
+
+def parse_options(texts):
+    """把 ['quality=85', 'optimize=1'] 解析为 {选项名: 文本}，类型在 resolve 时转换"""
+    options = {}
+    for text in texts or ():
+        name, sep, value = text.partition('=')
+        if not sep or not name.strip():
+            raise ValueError(f"导出选项须为 name=value 形式：{text}")
+        options[name.strip()] = value.strip()
+    return options
+
+
+def check_options(path, options):
+    """校验按 path 的扩展名保存时 options 是否有效，无效时抛出 ValueError"""
+    key = format_for_path(path)
+    if key is not None:
+        EXPORT_FORMATS[key].resolve(options)
+    elif options:
+        raise ValueError(f"{os.path.splitext(path)[1] or path} 格式不支持导出选项")
+
+
+def _png_level(options, pixels, notes):
+    level = options['compress_level']
+    if options['adaptive'] and pixels > ADAPTIVE_PIXELS and level > FAST_PNG_LEVEL:
+        level = FAST_PNG_LEVEL
+        notes.append(f"大图压缩级别降为 {level}")
+    return level
+
+
+def _strip_rows(stride, height):
+    """每个条带的行数，使条带约为 TIFF_STRIP_BYTES 字节"""
+    return max(1, min(height, TIFF_STRIP_BYTES // max(stride, 1)))
+
+
+def save_arguments(image, key, options):
+    """返回 (要编码的图像, image.save 的参数, 自动调整的说明)"""
+    options = EXPORT_FORMATS[key].resolve(options)
+    pixels = image.width * image.height
+    notes = []
+    if key == 'png':
+        return image, {'compress_level': _png_level(options, pixels, notes)}, notes
+    if key == 'jpeg':
+        if image.mode not in ('L', 'RGB'):
+            image = image.convert('RGB')
+        kwargs = dict(options)
+        if (kwargs['optimize'] or kwargs['progressive']) and pixels > JPEG_BUFFER_PIXELS:
+            kwargs['optimize'] = kwargs['progressive'] = False
+            notes.append("图像过大，不使用优化与渐进式编码")
+        return image, kwargs, notes
+    if key == 'webp':
+        if max(image.size) > WEBP_MAX_SIZE:
+            raise ValueError(f"WebP 的宽高不能超过 {WEBP_MAX_SIZE}，当前为 {image.width}x{image.height}")
+        return image, dict(options), notes
+    # TIFF：压缩格式由 libtiff 按 strip_size 分条带写入，无压缩时指定每条带的行数
+    rows = _strip_rows(image.width * len(image.getbands()), image.height)
+    if options['compression'] == 'raw':
+        return image, {'compression': 'raw',
+                       'tiffinfo': {TiffImagePlugin.ROWSPERSTRIP: rows}}, notes
+    return image, {'compression': options['compression'],
+                   'strip_size': TIFF_STRIP_BYTES}, notes
+
+
+def export_image(image, path, key=None, **options):
+    """把 PIL 图像保存为 path，返回 ExportResult
+
+    key 为 EXPORT_FORMATS 中的格式，默认按扩展名确定；其他扩展名（如 .bmp）
+    按 PIL 的默认设置保存，不接受选项。编码器边编码边写入 path 所在目录中的
+    临时文件，完成后再改名为 path，出错时不会留下不完整的文件；只有 WebP 和
+    优化/渐进式 JPEG 需要在内存中先得到完整的输出。
+    """
+    key = key or format_for_path(path)
+    notes = []
+    if key is None:
+        check_options(path, options)
+        name = Image.registered_extensions().get(os.path.splitext(path)[1].lower())
+        if name is None:
+            raise ValueError(f"不支持的输出格式：{path}")
+        kwargs = {}
+    else:
+        name = EXPORT_FORMATS[key].name
+        image, kwargs, notes = save_arguments(image, key, options)
+
+    return _write_file(path, name, data_bytes(image), notes,
+                       lambda f: image.save(f, name, **kwargs))
+
+
+def export_array(array, path, key=None, **options):
+    """把 uint8 数组（可为内存映射）保存为 path，返回 ExportResult
+
+    选项与 export_image 相同。PNG 和无压缩/Deflate 的 TIFF 每次从数组读取约
+    TIFF_STRIP_BYTES 字节的整行条带编码后写出，内存占用与图像大小无关；其他
+    格式须交给 PIL 编码，灰度和 RGBA 数组直接映射为 PIL 图像，RGB 等需要转换
+    的会把整幅图像复制到内存中，此时记录警告并在结果的说明中注明。
+    """
+    key = key or format_for_path(path)
+    mode = {1: 'L', 3: 'RGB', 4: 'RGBA'}[1 if array.ndim == 2 else array.shape[2]]
+    height, width = array.shape[:2]
+    notes = []
+    if key == 'png':
+        level = _png_level(EXPORT_FORMATS[key].resolve(options), width * height, notes)
+        return _write_file(path, 'PNG', array.nbytes, notes,
+                           lambda f: _write_png_strips(f, array, level))
+    if key == 'tiff':
+        compression = EXPORT_FORMATS[key].resolve(options)['compression']
+        if compression in TIFF_STRIP_COMPRESSION:
+            return _write_file(path, 'TIFF', array.nbytes, notes,
+                               lambda f: _write_tiff_strips(f, array, compression))
+
+    # PIL 内部 RGB 每像素占 4 字节，JPEG 还要去掉透明通道，都需要复制
+    if mode == 'RGB' or (key == 'jpeg' and mode == 'RGBA'):
+        logger.warning("%s 不能逐条带编码，%dx%d %s 图像将整体载入内存（约 %.0f MB）",
+                       os.path.basename(path), width, height, mode, width * height * 4 / 2**20)
+        notes.append("整幅图像载入内存编码")
+    result = export_image(Image.fromarray(array), path, key, **options)
+    result.notes[:0] = notes
+    return result
+
+
+def _write_file(path, name, nbytes, notes, write):
+    """调用 write(f) 写入 path 所在目录中的临时文件，完成后改名为 path"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp = os.path.join(directory, f".{os.path.basename(path)}.tmp-{uuid.uuid4().hex[:8]}")
+    start = time.perf_counter()
+    try:
+        with metrics.measure(f"export.{name.lower()}", nbytes):
+            with open(temp, 'wb') as f:
+                write(f)
+        os.replace(temp, path)
+    except BaseException:
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+        raise
+    seconds = time.perf_counter() - start
+    return ExportResult(path, name, os.path.getsize(path), seconds, notes)
+
+
+def _strips(array):
+    """按 TIFF_STRIP_BYTES 划分的 (起始行, 二维 uint8 条带)，每行为一行像素的全部字节"""
+    height, width = array.shape[:2]
+    stride = array.size // max(height, 1)
+    rows = _strip_rows(stride, height)
+    for top in range(0, height, rows):
+        yield top, np.ascontiguousarray(array[top:top + rows]).reshape(-1, stride)
+
+
+def _png_chunk(f, kind, data):
+    f.write(struct.pack('>I', len(data)))
+    f.write(kind)
+    f.write(data)
+    f.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(kind))))
+
+
+def _png_filter(rows, previous, bands):
+    """对每行按最小绝对差之和从 PNG 的五种滤波器中择一，返回加上滤波类型字节的行
+
+    与 libpng 和 Pillow 的自适应滤波相同的启发式，previous 为条带前一行。
+    滤波结果按模 256 定义，除 Paeth 的预测外都直接以 uint8 计算。
+    """
+    above = np.vstack([previous[np.newaxis], rows[:-1]])
+    left = np.zeros_like(rows)
+    left[:, bands:] = rows[:, :-bands]
+    upper_left = np.zeros_like(above)
+    upper_left[:, bands:] = above[:, :-bands]
+
+    a, b, c = (x.astype(np.int16) for x in (left, above, upper_left))
+    pa, pb, pc = np.abs(b - c), np.abs(a - c), np.abs(a + b - 2 * c)
+    paeth = np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, above, upper_left))
+    del a, b, c, pa, pb, pc
+    average = (left >> 1) + (above >> 1) + (left & above & 1)
+    candidates = [rows, rows - left, rows - above, rows - average, rows - paeth]
+    # 按有符号字节计算绝对值之和
+    scores = [np.abs(x.view(np.int8)).view(np.uint8).sum(axis=1, dtype=np.uint32)
+              for x in candidates]
+    choice = np.argmin(scores, axis=0)
+
+    filtered = np.empty((rows.shape[0], rows.shape[1] + 1), np.uint8)
+    filtered[:, 0] = choice
+    for kind, candidate in enumerate(candidates):
+        selected = choice == kind
+        filtered[selected, 1:] = candidate[selected]
+    return filtered
+
+
+def _write_png_strips(f, array, level):
+    height, width = array.shape[:2]
+    bands = 1 if array.ndim == 2 else array.shape[2]
+    f.write(b'\x89PNG\r\n\x1a\n')
+    _png_chunk(f, b'IHDR', struct.pack('>IIBBBBB', width, height, 8,
+                                       {1: 0, 3: 2, 4: 6}[bands], 0, 0, 0))
+    compressor = zlib.compressobj(level)
+    previous = np.zeros(width * bands, np.uint8)
+    for _, rows in _strips(array):
+        if level == 0:
+            # 不压缩时滤波没有意义，各行都用 None 滤波
+            filtered = np.zeros((rows.shape[0], rows.shape[1] + 1), np.uint8)
+            filtered[:, 1:] = rows
+        else:
+            filtered = _png_filter(rows, previous, bands)
+        previous = rows[-1]
+        data = compressor.compress(filtered)
+        if data:
+            _png_chunk(f, b'IDAT', data)
+    _png_chunk(f, b'IDAT', compressor.flush())
+    _png_chunk(f, b'IEND', b'')
+
+
+# export_array 能逐条带写入的 TIFF 压缩方式 -> Compression 标签的值
+TIFF_STRIP_COMPRESSION = {'raw': 1, 'tiff_adobe_deflate': 8}
+
+
+def _write_tiff_strips(f, array, compression):
+    """写入小端序的经典 TIFF：文件头、各条带、最后是 IFD 及其引用的数组"""
+    height, width = array.shape[:2]
+    bands = 1 if array.ndim == 2 else array.shape[2]
+    if compression == 'raw' and array.nbytes > TIFF_MAX_BYTES - 2**20:
+        raise ValueError(f"TIFF 不能超过 4 GB，{width}x{height} 的图像请保存为 .npy 或其他格式")
+    f.write(b'II*\x00\x00\x00\x00\x00')
+    offsets, counts = [], []
+    for _, rows in _strips(array):
+        data = rows.tobytes() if compression == 'raw' else zlib.compress(rows, 6)
+        offsets.append(f.tell())
+        counts.append(len(data))
+        f.write(data)
+    if f.tell() > TIFF_MAX_BYTES - 2**20:
+        raise ValueError(f"TIFF 不能超过 4 GB，{width}x{height} 的图像请保存为 .npy 或其他格式")
+    if f.tell() % 2:
+        f.write(b'\x00')
+
+    SHORT, LONG = 3, 4
+    tags = [
+        (256, LONG, [width]),
+        (257, LONG, [height]),
+        (258, SHORT, [8] * bands),
+        (259, SHORT, [TIFF_STRIP_COMPRESSION[compression]]),
+        (262, SHORT, [1 if bands == 1 else 2]),
+        (273, LONG, offsets),
+        (277, SHORT, [bands]),
+        (278, LONG, [_strip_rows(array.size // max(height, 1), height)]),
+        (279, LONG, counts),
+        (284, SHORT, [1])
+    ]
+    if bands == 4:
+        # 非预乘的透明通道
+        tags.append((338, SHORT, [2]))
+
+    ifd = f.tell()
+    extra = ifd + 2 + 12 * len(tags) + 4
+    entries, values = [], []
+    for tag, kind, items in tags:
+        data = struct.pack(f"<{len(items)}{'H' if kind == SHORT else 'I'}", *items)
+        if len(data) <= 4:
+            entries.append(struct.pack('<HHI', tag, kind, len(items)) + data.ljust(4, b'\x00'))
+        else:
+            entries.append(struct.pack('<HHII', tag, kind, len(items), extra))
+            values.append(data)
+            extra += len(data)
+    f.write(struct.pack('<H', len(tags)) + b''.join(entries) + struct.pack('<I', 0))
+    f.write(b''.join(values))
+    f.seek(4)
+    f.write(struct.pack('<I', ifd))
\ No newline at end of file
@@ -0,0 +1,50 @@
+from PIL import Image
+
+
+class ImagePyramid:
+    """图像金字塔
+
+    第 0 级为原图，之后每级宽高减半，直到短边小于 min_size。
+    交互预览时在与画布尺寸相当的代理图像上计算，避免处理全分辨率图像。
+    """
+
+    def __init__(self, image, min_size=64):
+        self.levels = [image]
+        current = image
+        while min(current.size) // 2 >= min_size:
+            try:
+                current = current.reduce(2)
+            except ValueError:
+                # 调色板等模式不支持 reduce，退回最近邻缩放
+                size = (current.width // 2, current.height // 2)
+                current = current.resize(size, Image.Resampling.NEAREST)
+            self.levels.append(current)
+
+    @classmethod
+    def from_levels(cls, levels):
+        """由已有的各级图像（如从磁盘存储映射出的）构造，不重新缩放"""
+        pyramid = cls.__new__(cls)
+        pyramid.levels = list(levels)
+        return pyramid
+
+    @property
+    def base(self):
+        return self.levels[0]
+
+    def scale(self, level):
+        """第 level 级相对原图的缩放比例"""
+        return self.levels[level].width / self.base.width
+
+    def level_for(self, max_width, max_height):
+        """返回能填满 max_width x max_height 显示区域的最小一级"""
+        fit = min(max_width / self.base.width, max_height / self.base.height)
+        for level in range(len(self.levels) - 1, 0, -1):
+            if self.scale(level) >= fit:
+                return level
+        return 0
+
+    def __len__(self):
+        return len(self.levels)
+
+    def __getitem__(self, level):
+        return self.levels[level]
\ No newline at end of file
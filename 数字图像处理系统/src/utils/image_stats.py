@@ -0,0 +1,205 @@
+import numpy as np
+from PIL import Image
+
+from .lazy_import import lazy_import
+
+cv2 = lazy_import('cv2')
+
+# 单次 calcHist 统计的最大像素数，float32 计数在此范围内是精确的
+_HISTOGRAM_CHUNK = 1 << 24
+_LEVELS = np.arange(256, dtype=np.float64)
+
+
+def histogram(array):
+    """uint8 数组的 256 级直方图（int64）"""
+    # cv2.calcHist 比 np.bincount 快数倍，但以 float32 计数，超过 2^24
+    # 会丢失精度，因此分段统计后累加
+    flat = array.reshape(-1)
+    counts = np.zeros(256, dtype=np.int64)
+    for start in range(0, flat.size, _HISTOGRAM_CHUNK):
+        chunk = cv2.calcHist([flat[start:start + _HISTOGRAM_CHUNK]], [0], None, [256], [0, 256])
+        counts += chunk.ravel().astype(np.int64)
+    return counts
+
+
+def rgb_to_gray(array, order='RGB', out=None):
+    """把 (高, 宽, 3|4) 的 uint8 数组转换为灰度，结果与 convert('L') 逐字节一致
+
+    order 为通道顺序，OpenCV 读出的帧为 'BGR'；透明通道被忽略。二维数组
+    视为已是灰度图，直接返回（指定 out 时复制进去）。
+    """
+    if array.ndim == 2:
+        if out is None or out is array:
+            return array
+        np.copyto(out, array)
+        return out
+    height, width, channels = array.shape
+    mode = 'RGBA' if channels == 4 else 'RGB'
+    # Pillow 直接读取数组内存并按定点数权重转换，比逐通道的 NumPy 整数运算快数倍；
+    # cv2.cvtColor 的权重精度不同，个别像素会相差 1
+    image = Image.frombuffer(mode, (width, height), np.ascontiguousarray(array),
+                             'raw', order + mode[3:], 0, 1)
+    gray = np.asarray(image.convert('L'))
+    if out is None:
+        out = np.empty(gray.shape, dtype=np.uint8)
+    np.copyto(out, gray)
+    return out
+
+
+def tile_histograms(gray, grid):
+    """按 cv2.createCLAHE 的方式把灰度数组分为 grid x grid 个等大的块，
+    返回 (块高, 块宽, 形状为 (grid, grid, 256) 的直方图)
+
+    尺寸不能被 grid 整除时，与 OpenCV 相同地以 BORDER_REFLECT_101 在下侧和
+    右侧补边：两个方向都补，已能整除的方向补整整 grid 行（列）。
+    """
+    grid = max(1, int(grid))
+    height, width = gray.shape
+    if height % grid or width % grid:
+        gray = cv2.copyMakeBorder(gray, 0, grid - height % grid, 0, grid - width % grid,
+                                  cv2.BORDER_REFLECT_101)
+    tile_height, tile_width = gray.shape[0] // grid, gray.shape[1] // grid
+    histograms = np.empty((grid, grid, 256), dtype=np.int64)
+    for i in range(grid):
+        for j in range(grid):
+            histograms[i, j] = histogram(gray[i * tile_height:(i + 1) * tile_height,
+                                              j * tile_width:(j + 1) * tile_width])
+    return tile_height, tile_width, histograms
+
+
+class ImageStatistics:
+    """一幅图像的直方图统计量
+
+    保存各通道和灰度（与 convert('L') 相同的亮度）的 256 级直方图，
+    累积分布、均值、方差以及 Otsu / 多级 Otsu 阈值都由直方图推算并缓存，
+    不再扫描像素。两幅图像（如大图像的两个分块）的统计量可以用 merge()
+    合并，结果与整幅图像一次统计相同。
+    """
+
+    def __init__(self, bands, histograms, gray):
+        self.bands = tuple(bands)
+        self.histograms = np.asarray(histograms, dtype=np.int64).reshape(len(self.bands), 256)
+        self.gray = np.asarray(gray, dtype=np.int64)
+        self._cache = {}
+
+    @classmethod
+    def from_image(cls, image, gray=None):
+        """由 PIL 图像统计；gray 为已转换好的灰度图，省去一次转换"""
+        bands = image.getbands()
+        histograms = np.asarray(image.histogram(), dtype=np.int64)
+        if image.mode == 'L':
+            return cls(bands, histograms, histograms)
+        if gray is None:
+            gray = image.convert('L')
+        return cls(bands, histograms, gray.histogram())
+
+    @classmethod
+    def from_array(cls, array, order='RGB'):
+        """由 uint8 数组统计，order 为彩色数组的通道顺序"""
+        if array.ndim == 2:
+            counts = histogram(array)
+            return cls(('L',), counts, counts)
+        bands = tuple(order) + ('A',) * (array.shape[2] - 3)
+        histograms = [histogram(array[..., channel]) for channel in range(array.shape[2])]
+        return cls(bands, histograms, histogram(rgb_to_gray(array, order)))
+
+    def merge(self, other):
+        """合并两组统计量（如同一图像的两个分块），返回新对象"""
+        if other.bands != self.bands:
+            raise ValueError(f"通道不一致，无法合并：{self.bands} 与 {other.bands}")
+        return ImageStatistics(self.bands, self.histograms + other.histograms,
+                               self.gray + other.gray)
+
+    def _memo(self, key, compute):
+        value = self._cache.get(key)
+        if value is None:
+            value = self._cache[key] = compute()
+        return value
+
+    @property
+    def count(self):
+        """像素数"""
+        return int(self.gray.sum())
+
+    def histogram(self, band='gray'):
+        """灰度（'gray'）或某个通道（'R'、'G'、'B'、'A'、'L'）的直方图"""
+        if band == 'gray':
+            return self.gray
+        try:
+            return self.histograms[self.bands.index(band)]
+        except ValueError:
+            raise ValueError(f"未知的通道：{band}（可用：gray, {', '.join(self.bands)}）") from None
+
+    def cdf(self, band='gray'):
+        """累积像素数"""
+        return self._memo(('cdf', band), lambda: np.cumsum(self.histogram(band)))
+
+    def mean(self, band='gray'):
+        counts = self.histogram(band)
+        total = counts.sum()
+        return float(np.dot(counts, _LEVELS) / total) if total else 0.0
+
+    def variance(self, band='gray'):
+        counts = self.histogram(band)
+        total = counts.sum()
+        if not total:
+            return 0.0
+        mean = np.dot(counts, _LEVELS) / total
+        return float(np.dot(counts, (_LEVELS - mean) ** 2) / total)
+
+    def std(self, band='gray'):
+        return self.variance(band) ** 0.5
+
+    def otsu(self, band='gray'):
+        """Otsu 阈值：灰度小于该值的像素为背景，与 threshold_segment 的阈值含义相同"""
+        return self.multi_otsu(2, band)[0]
+
+    def multi_otsu(self, classes=3, band='gray'):
+        """把灰度分为 classes 类、使类间方差最大的 classes-1 个阈值（升序）
+
+        第 k 类为 [阈值[k-1], 阈值[k]) 区间。用动态规划求解，复杂度与像素数无关。
+        """
+        classes = int(classes)
+        if not 2 <= classes <= 256:
+            raise ValueError(f"多级 Otsu 的类数应在 2 到 256 之间：{classes}")
+        return self._memo(('otsu', classes, band),
+                          lambda: _multi_otsu(self.histogram(band), classes))
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'bands': {band: {'mean': self.mean(band), 'std': self.std(band)}
+                      for band in ('gray',) + self.bands},
+            'otsu': self.otsu(),
+            'histogram': self.gray.tolist()
+        }
+
+
+def _multi_otsu(counts, classes):
+    """最大化 sum(S_k^2 / P_k)（P、S 为各类像素数与灰度和），等价于最大化类间方差"""
+    counts = counts.astype(np.float64)
+    # P[b] - P[a] 为灰度 [a, b) 的像素数，S 同理
+    P = np.concatenate([[0.0], np.cumsum(counts)])
+    S = np.concatenate([[0.0], np.cumsum(counts * _LEVELS)])
+    # score[a, b]：灰度 [a, b) 作为一类的得分，a >= b 时无效
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weight = P[None, :] - P[:, None]
+        score = np.where(weight > 0, (S[None, :] - S[:, None]) ** 2 / weight, 0.0)
+    invalid = np.tril(np.ones((257, 257), dtype=bool))
+    score[invalid] = -np.inf
+
+    # best[b]：把 [0, b) 分为 k 类的最高得分，start[k][b] 为最后一类的起点
+    best = score[0].copy()
+    starts = []
+    for _ in range(classes - 1):
+        total = best[:, None] + score
+        start = np.argmax(total, axis=0)
+        best = total[start, np.arange(257)]
+        starts.append(start)
+
+    thresholds = []
+    end = 256
+    for start in reversed(starts):
+        end = int(start[end])
+        thresholds.append(end)
+    return tuple(thresholds[::-1])
\ No newline at end of file
@@ -0,0 +1,237 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import numpy as np
+from PIL import Image
+
+from .image_pyramid import ImagePyramid
+from .image_stats import ImageStatistics
+from .instrumentation import metrics
+
+# 存储目录，默认在用户缓存目录下
+STORE_ENV_VAR = 'IMAGE_PROCESSOR_STORE'
+# 存储容量上限（MB），设为 0 关闭存储
+LIMIT_ENV_VAR = 'IMAGE_PROCESSOR_STORE_MB'
+DEFAULT_LIMIT_MB = 4096
+
+FORMAT_VERSION = 1
+META_FILE = 'meta.json'
+# 写入时每次从 PIL 图像复制的最大字节数
+_WRITE_CHUNK = 64 * 2**20
+# 超过该时长的临时目录视为其他进程中断写入后遗留的
+_STALE_TEMP_SECONDS = 3600
+
+
+def default_directory():
+    base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'digital-image-processing', 'images')
+
+
+class StoredImage:
+    """从存储中映射出的图像：金字塔各级的 PIL 图像、对应的只读数组和统计量"""
+
+    def __init__(self, levels, arrays, stats):
+        self.levels = levels
+        self.arrays = arrays
+        self.stats = stats
+
+    @property
+    def pyramid(self):
+        return ImagePyramid.from_levels(self.levels)
+
+
+class ImageStore:
+    """解码图像的磁盘存储
+
+    第一次打开图像文件后，把规范化后的像素、预览金字塔各级和直方图统计量
+    写入 directory 下的一个条目（各级为 .npy 文件，其余为 meta.json）。
+    再次打开同一文件时用内存映射读取，不再解码，内存由操作系统的页缓存管理。
+    L 和 RGBA 图像的 PIL 图像与数组都直接引用映射的内存；Pillow 内部以每像素
+    4 字节存放 RGB，RGB 图像只能从映射内存解包一次，数组仍是映射的。
+
+    条目以文件路径、修改时间和大小为键，文件被修改后旧条目不再命中，并在
+    写入新条目时删除。条目先写入临时目录再整体改名，中断的写入不会留下
+    不完整的条目。总大小超过 limit_bytes 时按最近使用时间淘汰，小于
+    min_bytes 的图像解码很快，不写入存储。
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, directory, limit_bytes, min_bytes=8 * 2**20):
+        self.directory = directory
+        self.limit_bytes = limit_bytes
+        self.min_bytes = min_bytes
+        self._lock = threading.Lock()
+
+    @classmethod
+    def default(cls):
+        """按环境变量配置的全局存储，容量上限为 0 时返回 None"""
+        with cls._default_lock:
+            if cls._default is None:
+                limit = float(os.environ.get(LIMIT_ENV_VAR, DEFAULT_LIMIT_MB)) * 2**20
+                directory = os.environ.get(STORE_ENV_VAR) or default_directory()
+                cls._default = cls(directory, limit) if limit > 0 else False
+        return cls._default or None
+
+    @staticmethod
+    def identify(path):
+        """返回文件的 (绝对路径, 修改时间 ns, 大小)，应在解码之前取得"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        return path, stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _key(identity):
+        """条目名：路径的哈希加上版本（修改时间与大小）的哈希"""
+        path, mtime, size = identity
+        prefix = hashlib.sha1(os.path.normcase(path).encode('utf-8')).hexdigest()[:16]
+        version = hashlib.sha1(f"{mtime}:{size}".encode()).hexdigest()[:16]
+        return prefix, f"{prefix}-{version}"
+
+    def accepts(self, image):
+        """图像（及其金字塔）的数据量是否适合写入存储"""
+        nbytes = image.width * image.height * len(image.getbands())
+        # 金字塔各级合计约为原图的 1/3
+        return self.min_bytes <= nbytes and nbytes * 4 // 3 <= self.limit_bytes
+
+    def load(self, identity):
+        """返回已存储的 StoredImage，没有或已失效时返回 None"""
+        _, key = self._key(identity)
+        entry = os.path.join(self.directory, key)
+        meta_path = os.path.join(entry, META_FILE)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta['version'] != FORMAT_VERSION or \
+                    (meta['path'], meta['mtime_ns'], meta['size']) != tuple(identity):
+                raise ValueError("条目与文件不符")
+            arrays = [np.load(os.path.join(entry, f'level{index}.npy'), mmap_mode='r')
+                      for index in range(meta['levels'])]
+            stats = ImageStatistics(meta['bands'], meta['histograms'], meta['gray'])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError):
+            # 损坏的条目删除后重新解码
+            self._remove(entry)
+            return None
+        try:
+            # 以 meta.json 的修改时间记录最近使用时间
+            os.utime(meta_path)
+        except OSError:
+            pass
+        mode = meta['mode']
+        levels = [Image.frombuffer(mode, (array.shape[1], array.shape[0]), array,
+                                   'raw', mode, 0, 1) for array in arrays]
+        return StoredImage(levels, arrays, stats)
+
+    def save(self, identity, pyramid, stats):
+        """写入图像的金字塔与统计量，成功时返回 True"""
+        prefix, key = self._key(identity)
+        entry = os.path.join(self.directory, key)
+        temp = os.path.join(self.directory, f"{key}.tmp-{uuid.uuid4().hex[:8]}")
+        path, mtime, size = identity
+        base = pyramid.base
+        nbytes = sum(level.width * level.height * len(level.getbands())
+                     for level in pyramid.levels)
+        try:
+            os.makedirs(temp)
+            with metrics.measure('image.store_write', nbytes):
+                for index, level in enumerate(pyramid.levels):
+                    _write_level(os.path.join(temp, f'level{index}.npy'), level)
+                meta = {
+                    'version': FORMAT_VERSION,
+                    'path': path,
+                    'mtime_ns': mtime,
+                    'size': size,
+                    'mode': base.mode,
+                    'levels': len(pyramid.levels),
+                    'bands': list(stats.bands),
+                    'histograms': stats.histograms.tolist(),
+                    'gray': stats.gray.tolist()
+                }
+                with open(os.path.join(temp, META_FILE), 'w', encoding='utf-8') as f:
+                    json.dump(meta, f)
+            # 其他进程已写入同一条目时改名失败，保留已有的条目
+            os.rename(temp, entry)
+        except OSError:
+            shutil.rmtree(temp, ignore_errors=True)
+            return False
+        self._invalidate(prefix, key)
+        self.evict(keep=key)
+        return True
+
+    def _invalidate(self, prefix, key):
+        """删除同一文件的其他版本"""
+        for name in self._entries():
+            if name.startswith(prefix + '-') and name != key:
+                self._remove(os.path.join(self.directory, name))
+
+    def _entries(self):
+        try:
+            return os.listdir(self.directory)
+        except OSError:
+            return []
+
+    def usage(self):
+        """返回 [(条目名, 字节数, 最近使用时间), ...]，按最近使用时间排序"""
+        entries = []
+        for name in self._entries():
+            entry = os.path.join(self.directory, name)
+            try:
+                if '.tmp-' in name:
+                    # 其他进程中断写入遗留的临时目录
+                    if time.time() - os.path.getmtime(entry) > _STALE_TEMP_SECONDS:
+                        self._remove(entry)
+                    continue
+                used = os.path.getmtime(os.path.join(entry, META_FILE))
+                nbytes = sum(item.stat().st_size for item in os.scandir(entry))
+            except OSError:
+                continue
+            entries.append((name, nbytes, used))
+        entries.sort(key=lambda item: item[2])
+        return entries
+
+    def evict(self, keep=None):
+        """按最近使用时间删除最旧的条目，直到总大小不超过上限"""
+        with self._lock:
+            entries = self.usage()
+            total = sum(nbytes for _, nbytes, _ in entries)
+            for name, nbytes, _ in entries:
+                if total <= self.limit_bytes:
+                    break
+                if name != keep and self._remove(os.path.join(self.directory, name)):
+                    total -= nbytes
+
+    def clear(self):
+        for name in self._entries():
+            self._remove(os.path.join(self.directory, name))
+
+    @staticmethod
+    def _remove(entry):
+        try:
+            shutil.rmtree(entry)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            # Windows 上仍被映射的文件无法删除，下次淘汰时再试
+            return False
+        return True
+
+
+def _write_level(path, image):
+    """把 PIL 图像逐条带写入 .npy 文件，不生成整幅图像的临时副本"""
+    bands = len(image.getbands())
+    shape = (image.height, image.width) + ((bands,) if bands > 1 else ())
+    array = np.lib.format.open_memmap(path, 'w+', np.uint8, shape)
+    rows = max(1, _WRITE_CHUNK // (image.width * bands))
+    for top in range(0, image.height, rows):
+        bottom = min(top + rows, image.height)
+        array[top:bottom] = np.asarray(image.crop((0, top, image.width, bottom)))
+    array.flush()
+    del array
\ No newline at end of file
@@ -0,0 +1,197 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from .lazy_import import lazy_import
+
+# 只在统计分位数和估算数组大小时用到 NumPy，不在启动时导入
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+# 设置该环境变量即在启动时开启统计，值为退出时导出的 JSON 文件路径
+ENV_VAR = 'IMAGE_PROCESSOR_METRICS'
+
+
+def data_bytes(value):
+    """估算图像或数组的数据字节数，其他对象返回 0"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if hasattr(value, 'getbands'):
+        return value.width * value.height * len(value.getbands())
+    return 0
+
+
+class OperationStats:
+    """单个操作的调用次数、累计耗时、处理字节数和最近若干次耗时样本"""
+
+    __slots__ = ('name', 'count', 'total', 'bytes', 'samples')
+
+    def __init__(self, name, sample_size):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.bytes = 0
+        # 只保留最近的样本计算分位数，长时间运行时内存不增长
+        self.samples = deque(maxlen=sample_size)
+
+    def record(self, elapsed, nbytes):
+        self.count += 1
+        self.total += elapsed
+        self.bytes += nbytes
+        self.samples.append(elapsed)
+
+    def percentiles(self, quantiles=(50, 95, 99)):
+        if not self.samples:
+            return [0.0] * len(quantiles)
+        return [float(v) for v in np.percentile(np.fromiter(self.samples, float), quantiles)]
+
+    def as_dict(self):
+        p50, p95, p99 = self.percentiles()
+        return {
+            'count': self.count,
+            'total_ms': self.total * 1000,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'p50_ms': p50 * 1000,
+            'p95_ms': p95 * 1000,
+            'p99_ms': p99 * 1000,
+            'bytes': self.bytes,
+            'mb_per_s': self.bytes / self.total / 2**20 if self.total else 0.0
+        }
+
+
+class _Timer:
+    __slots__ = ('registry', 'name', 'nbytes', 'start')
+
+    def __init__(self, registry, name, nbytes):
+        self.registry = registry
+        self.name = name
+        self.nbytes = nbytes
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.record(self.name, time.perf_counter() - self.start, self.nbytes)
+        return False
+
+
+class _NullTimer:
+    """关闭统计时使用的空计时器"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Instrumentation:
+    """热点路径计时注册表
+
+    用法：
+        @metrics.timed('segment.canny_edge')
+        def canny_edge(...): ...
+
+        with metrics.measure('display.resize', nbytes):
+            ...
+
+    关闭时（默认）装饰器和上下文管理器只多一次属性判断，几乎没有开销。
+    所有方法均可在多线程中调用。
+    """
+
+    def __init__(self, sample_size=2048):
+        self.sample_size = sample_size
+        self.enabled = False
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    def record(self, name, elapsed, nbytes=0):
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = OperationStats(name, self.sample_size)
+            stats.record(elapsed, nbytes)
+
+    def measure(self, name, nbytes=0):
+        """计时上下文管理器"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, nbytes)
+
+    def timed(self, name):
+        """计时装饰器，处理字节数取第一个参数（图像或数组）的大小"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start,
+                                data_bytes(args[0]) if args else 0)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """返回 {操作名: 统计字典}，按累计耗时从大到小排列"""
+        with self._lock:
+            stats = sorted(self._stats.values(), key=lambda s: s.total, reverse=True)
+            return {s.name: s.as_dict() for s in stats}
+
+    def export_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'timestamp': time.time(), 'operations': self.snapshot()},
+                      f, ensure_ascii=False, indent=2)
+
+    def format_table(self, limit=None):
+        """格式化为等宽文本表格，用于界面统计浮层和日志"""
+        lines = [f"{'操作':<28}{'次数':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'MB/s':>8}"]
+        for name, s in list(self.snapshot().items())[:limit]:
+            lines.append(f"{name:<30}{s['count']:>6}{s['p50_ms']:>9.1f}{s['p95_ms']:>9.1f}"
+                         f"{s['p99_ms']:>9.1f}{s['mb_per_s']:>8.0f}")
+        return '\n'.join(lines)
+
+    def log_summary(self, level=logging.INFO):
+        logger.log(level, "耗时统计（毫秒）：\n%s", self.format_table())
+
+
+metrics = Instrumentation()
+if os.environ.get(ENV_VAR):
+    metrics.enable()
+
+
+def instrumented(prefix, exclude=()):
+    """类装饰器：为类中所有公开的静态方法加上计时，名称为 "prefix.方法名"
+
+    exclude 中的方法（如只处理直方图的辅助方法）不计时。
+    """
+    def decorator(cls):
+        for name, member in list(vars(cls).items()):
+            if isinstance(member, staticmethod) and not name.startswith('_') \
+                    and name not in exclude:
+                setattr(cls, name, staticmethod(metrics.timed(f"{prefix}.{name}")(member.__func__)))
+        return cls
+    return decorator
\ No newline at end of file
@@ -0,0 +1,39 @@
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """延迟导入的模块代理
+
+    第一次访问属性时才导入真正的模块，之后把模块的属性复制到代理上，
+    再次访问不再经过 __getattr__，与直接使用模块的开销相同。
+    """
+
+    def __getattr__(self, name):
+        # 导入由解释器的模块锁保护，多个线程同时首次访问时只导入一次
+        module = importlib.import_module(self.__name__)
+        vars(self).update(vars(module))
+        return getattr(module, name)
+
+    def __repr__(self):
+        state = "已导入" if self.loaded else "未导入"
+        return f"<延迟导入的模块 {self.__name__!r}（{state}）>"
+
+    @property
+    def loaded(self):
+        return '__file__' in vars(self)
+
+
+def lazy_import(name):
+    """返回模块 name 的代理，在第一次使用时才导入；已导入的模块直接返回"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
+
+def preload(*names):
+    """提前导入模块（如在后台线程中），之后的首次使用不再等待"""
+    for name in names:
+        importlib.import_module(name)
\ No newline at end of file
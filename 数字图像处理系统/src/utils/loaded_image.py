@@ -0,0 +1,279 @@
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from .image_pyramid import ImagePyramid
+from .image_stats import ImageStatistics, tile_histograms
+from .image_store import ImageStore
+from .instrumentation import metrics, data_bytes
+
+# 处理器支持的模式，其余模式在载入时统一转换
+NORMALIZED_MODES = ('L', 'RGB', 'RGBA')
+# 每张图像（金字塔每一级）保留的已建好的区域生长索引个数
+REGION_INDEXES = 4
+
+# 区域生长索引在单独的后台线程中依次构建，不占用界面的处理线程
+_index_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='region-index')
+
+
+def normalize_mode(image):
+    """将图像转换为 L、RGB 或 RGBA 之一
+
+    调色板图像按是否带透明色转换为 RGBA/RGB，1 位图转为灰度，16 位和
+    整数/浮点灰度图按取值范围线性映射到 0-255（直接 convert('L') 会截断），
+    CMYK、YCbCr 等转为 RGB。
+    """
+    if image.mode in NORMALIZED_MODES:
+        return image
+    if image.mode in ('I;16', 'I;16B', 'I;16L', 'I', 'F'):
+        array = np.asarray(image, dtype=np.float64)
+        if image.mode.startswith('I;16'):
+            low, high = 0.0, 65535.0
+        else:
+            low, high = float(array.min()), float(array.max())
+        scale = 255.0 / (high - low) if high > low else 0.0
+        return Image.fromarray(np.round((array - low) * scale).astype(np.uint8), 'L')
+    if image.mode == '1':
+        return image.convert('L')
+    has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+    return image.convert('RGBA' if has_alpha else 'RGB')
+
+
+class LoadedImage:
+    """解码后的图像及其按需计算并缓存的派生视图
+
+    灰度图、RGB 图、NumPy 数组、直方图统计量和预览金字塔都只在第一次访问时
+    计算一次；较大的图像文件经 open() 打开后保存在 ImageStore 中，再次打开时
+    这些视图直接映射自磁盘。
+    通过 from_image()/open() 创建的对象会登记在全局表中，处理器用
+    LoadedImage.of(image) 取得同一张 PIL 图像对应的视图，因此阈值分割、
+    Canny 和区域生长共用一次灰度转换。登记表只保存弱引用，持有者（如主窗口）
+    释放 LoadedImage 后自动失效；未登记的图像得到一个临时对象，行为与
+    直接转换相同。视图可在多个线程中并发访问。
+    """
+
+    # id(PIL 图像) -> LoadedImage
+    _registry = weakref.WeakValueDictionary()
+
+    def __init__(self, image, register=False):
+        self.image = image
+        self._views = {}
+        self._lock = threading.RLock()
+        # (种子, 连通方式) -> (Future, 取消标志)，按最近使用排序
+        self._region_indexes = OrderedDict()
+        if register:
+            LoadedImage._registry[id(image)] = self
+
+    @classmethod
+    def from_image(cls, image):
+        """规范化图像模式并登记"""
+        return cls(normalize_mode(image), register=True)
+
+    @classmethod
+    def open(cls, path, use_store=True):
+        """打开图像文件
+
+        use_store 为 True 且启用了 ImageStore.default() 时，存储中已有该文件
+        （路径、修改时间和大小都相同）的条目则直接映射其中的像素、金字塔和
+        统计量，不再解码；否则解码后由后台线程计算金字塔和统计量并写入存储。
+        """
+        store = ImageStore.default() if use_store else None
+        identity = ImageStore.identify(path) if store is not None else None
+        if store is not None:
+            with metrics.measure('image.store_load'):
+                stored = store.load(identity)
+            if stored is not None:
+                return cls.from_stored(stored)
+
+        with metrics.measure('image.decode'):
+            image = Image.open(path)
+            image.load()
+        loaded = cls.from_image(image)
+        if store is not None and store.accepts(loaded.image):
+            # 不阻塞打开；金字塔和统计量由 _memo 共用，界面同时访问时只计算一次
+            threading.Thread(target=lambda: store.save(identity, loaded.pyramid, loaded.stats),
+                             name="image-store").start()
+        return loaded
+
+    @classmethod
+    def from_stored(cls, stored):
+        """由 ImageStore 映射出的图像构造，数组、统计量和金字塔直接使用存储中的"""
+        loaded = cls(stored.levels[0], register=True)
+        loaded._views['array'] = stored.arrays[0]
+        loaded._views['stats'] = stored.stats
+        loaded._attach_pyramid(stored.pyramid)
+        for level, array in zip(loaded._views['levels'], stored.arrays[1:]):
+            level._views['array'] = array
+        return loaded
+
+    @classmethod
+    def of(cls, image):
+        """返回 PIL 图像对应的 LoadedImage，未登记时返回临时对象"""
+        if isinstance(image, LoadedImage):
+            return image
+        loaded = cls._registry.get(id(image))
+        # id 可能被已释放图像之后的新对象复用
+        if loaded is not None and loaded.image is image:
+            return loaded
+        return cls(image)
+
+    @classmethod
+    def register(cls, image):
+        """返回图像已登记的 LoadedImage，未登记时规范化模式后登记
+
+        登记表只保存弱引用，调用方须在使用期间持有返回值。
+        """
+        loaded = cls.of(image)
+        if cls._registry.get(id(loaded.image)) is loaded:
+            return loaded
+        return cls.from_image(image)
+
+    def _memo(self, name, compute):
+        value = self._views.get(name)
+        if value is None:
+            with self._lock:
+                value = self._views.get(name)
+                if value is None:
+                    value = self._views[name] = compute()
+        return value
+
+    @property
+    def mode(self):
+        return self.image.mode
+
+    @property
+    def size(self):
+        return self.image.size
+
+    @property
+    def gray(self):
+        """灰度图（L 模式）"""
+        if self.image.mode == 'L':
+            return self.image
+
+        def convert():
+            with metrics.measure('image.convert_gray', data_bytes(self.image)):
+                return self.image.convert('L')
+        return self._memo('gray', convert)
+
+    @property
+    def rgb(self):
+        """RGB 图，灰度图扩展为三通道，RGBA 丢弃透明通道"""
+        if self.image.mode == 'RGB':
+            return self.image
+        return self._memo('rgb', lambda: self.image.convert('RGB'))
+
+    @property
+    def array(self):
+        """只读 NumPy 数组，形状为 (高, 宽) 或 (高, 宽, 通道数)"""
+        return self._memo('array', lambda: np.asarray(self.image))
+
+    @property
+    def gray_array(self):
+        """只读灰度 NumPy 数组"""
+        return self._memo('gray_array', lambda: np.asarray(self.gray))
+
+    @property
+    def stats(self):
+        """各通道与灰度的直方图统计量（ImageStatistics）"""
+        def compute():
+            with metrics.measure('image.stats', data_bytes(self.image)):
+                return ImageStatistics.from_image(self.image, self.gray)
+        return self._memo('stats', compute)
+
+    def tile_histograms(self, grid):
+        """灰度图分为 grid x grid 块后各块的直方图，见 image_stats.tile_histograms"""
+        return self._memo(('tiles', int(grid)), lambda: tile_histograms(self.gray_array, grid))
+
+    def region_index(self, seed, connectivity=8, wait=True):
+        """以 seed (row, col) 为种子的区域生长索引（RegionIndex）
+
+        wait 为 False 时只返回已建好的索引，没有时返回 None 且不开始构建；
+        为 True 时等待构建完成。
+        """
+        key = (tuple(seed), connectivity)
+        with self._lock:
+            entry = self._region_indexes.get(key)
+            if entry is not None:
+                self._region_indexes.move_to_end(key)
+        if entry is not None:
+            future = entry[0]
+        elif wait:
+            future = self.prepare_region_index(seed, connectivity)
+        else:
+            return None
+        if not wait and (not future.done() or future.cancelled() or future.exception()):
+            return None
+        return None if future.cancelled() else future.result()
+
+    def prepare_region_index(self, seed, connectivity=8):
+        """在后台线程中构建区域生长索引，返回结果为 RegionIndex 的 Future
+
+        同一种子只构建一次；超出 REGION_INDEXES 个时丢弃最久未用的已建好的索引。
+        构建中的索引在 cancel_region_indexes() 或本对象被释放时中止。
+        """
+        key = (tuple(seed), connectivity)
+        with self._lock:
+            entry = self._region_indexes.get(key)
+            if entry is not None:
+                self._region_indexes.move_to_end(key)
+                return entry[0]
+            cancelled = threading.Event()
+            future = _index_executor.submit(_build_region_index, weakref.ref(self),
+                                            key[0], connectivity, cancelled)
+            self._region_indexes[key] = (future, cancelled)
+            done = [k for k, (f, _) in self._region_indexes.items() if f.done()]
+            for k in done[:max(0, len(self._region_indexes) - REGION_INDEXES)]:
+                del self._region_indexes[k]
+        return future
+
+    def cancel_region_indexes(self):
+        """中止尚未建好的区域生长索引，已建好的保留"""
+        with self._lock:
+            for key, (future, cancelled) in list(self._region_indexes.items()):
+                if not future.done():
+                    future.cancel()
+                    cancelled.set()
+                    del self._region_indexes[key]
+
+    @property
+    def pyramid(self):
+        """预览用图像金字塔，各级图像同样登记为 LoadedImage"""
+        def build():
+            with metrics.measure('image.pyramid', data_bytes(self.image)):
+                pyramid = ImagePyramid(self.image)
+            self._attach_pyramid(pyramid)
+            return pyramid
+        return self._memo('pyramid', build)
+
+    def _attach_pyramid(self, pyramid):
+        # 保持各级的 LoadedImage 存活，处理器才能共用它们的视图
+        self._views['levels'] = [LoadedImage(level, register=True)
+                                 for level in pyramid.levels[1:]]
+        self._views['pyramid'] = pyramid
+
+    def level(self, index):
+        """金字塔第 index 级对应的 LoadedImage"""
+        if index == 0:
+            return self
+        self.pyramid
+        return self._views['levels'][index - 1]
+
+
+def _build_region_index(owner, seed, connectivity, cancelled):
+    """后台构建区域生长索引；只持有灰度数组，图像被释放后在下一个阈值处中止"""
+    # 处理器模块依赖本模块，用到时才导入
+    from ..processors.region_growing import RegionIndex
+
+    loaded = owner()
+    if loaded is None or cancelled.is_set():
+        return None
+    gray = loaded.gray_array
+    del loaded
+    with metrics.measure('image.region_index', gray.nbytes):
+        return RegionIndex.build(gray, seed, connectivity,
+                                 cancelled=lambda: cancelled.is_set() or owner() is None)
\ No newline at end of file
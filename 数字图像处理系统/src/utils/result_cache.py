@@ -0,0 +1,99 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class ResultCache:
+    """按字节数限制容量的 LRU 结果缓存
+
+    键通常为 (图像标识, 操作名, 参数值元组)。固定（pinned）的条目不参与
+    LRU 淘汰，用于保存不依赖参数的结果（如直方图均衡化、镜像），直到
+    调用 clear() 或 unpin()。所有方法均可在多线程中调用。
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, nbytes)
+        self._pinned = set()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def sizeof(value):
+        """估算缓存值占用的字节数"""
+        if isinstance(value, np.ndarray):
+            return value.nbytes
+        if isinstance(value, (bytes, bytearray)):
+            return len(value)
+        if hasattr(value, 'getbands'):
+            return value.width * value.height * len(value.getbands())
+        return 0
+
+    @property
+    def bytes_used(self):
+        return self._bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, pinned=False):
+        nbytes = self.sizeof(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            # 超过总容量的非固定结果不缓存
+            if nbytes > self.max_bytes and not pinned:
+                self._pinned.discard(key)
+                return
+            self._entries[key] = (value, nbytes)
+            self._bytes += nbytes
+            if pinned:
+                self._pinned.add(key)
+            self._evict()
+
+    def unpin(self, key):
+        with self._lock:
+            self._pinned.discard(key)
+            self._evict()
+
+    def discard(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+            self._pinned.discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pinned.clear()
+            self._bytes = 0
+
+    def _evict(self):
+        # 调用方需持有 self._lock，从最久未使用的条目开始淘汰
+        if self._bytes <= self.max_bytes:
+            return
+        for key in list(self._entries):
+            if self._bytes <= self.max_bytes:
+                break
+            if key in self._pinned:
+                continue
+            self._bytes -= self._entries.pop(key)[1]
\ No newline at end of file
@@ -0,0 +1,148 @@
+import queue
+import sys
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ProcessingScheduler:
+    """后台处理调度器
+
+    任务按 key（例如结果面板序号）合并：同一个 key 同时最多只有一个任务在运行、
+    一个任务在等待，新提交的任务会直接替换等待中的旧任务，运行中旧任务的结果
+    完成后被丢弃，因此只有最新的参数会被显示。
+
+    完成的结果先放入队列，由调用 poll() 的线程分发回调；在 GUI 中通过
+    attach_to_tk() 用 after() 定时在 Tk 主线程上调用 poll()，无界面的调用方
+    可以直接调用 wait()。
+    """
+
+    def __init__(self, max_workers=None, executor=None, on_error=None):
+        # executor 可以是线程池或进程池（进程池要求任务函数及参数可序列化）
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='processing')
+        self._on_error = on_error
+        # 任务可能在 add_done_callback 时已经完成并在当前线程回调，因此使用可重入锁
+        self._lock = threading.RLock()
+        self._idle = threading.Condition(self._lock)
+        self._generations = {}  # key -> 最新提交的任务代号
+        self._running = {}      # key -> 正在运行的任务代号
+        self._pending = {}      # key -> 等待运行的最新任务
+        self._results = queue.Queue()
+        self._tk_root = None
+        self._tk_job = None
+
+    def submit(self, key, func, *args, callback=None, error_callback=None, **kwargs):
+        """提交任务，返回该任务的代号"""
+        with self._lock:
+            generation = self._generations.get(key, 0) + 1
+            self._generations[key] = generation
+            job = (generation, func, args, kwargs, callback, error_callback)
+            if key in self._running:
+                self._pending[key] = job
+            else:
+                self._start(key, job)
+        return generation
+
+    def cancel(self, key=None):
+        """作废指定 key（默认全部）的等待任务与未分发的结果"""
+        with self._lock:
+            keys = [key] if key is not None else list(self._generations)
+            for k in keys:
+                self._generations[k] = self._generations.get(k, 0) + 1
+                self._pending.pop(k, None)
+
+    def is_current(self, key, generation):
+        """判断代号是否仍是该 key 最新提交的任务"""
+        with self._lock:
+            return self._generations.get(key) == generation
+
+    def busy(self):
+        with self._lock:
+            return bool(self._running or self._pending)
+
+    def _start(self, key, job):
+        # 调用方需持有 self._lock
+        generation, func, args, kwargs = job[:4]
+        self._running[key] = generation
+        try:
+            future = self._executor.submit(func, *args, **kwargs)
+        except RuntimeError:
+            # 调度器已关闭
+            del self._running[key]
+            return
+        future.add_done_callback(lambda f: self._finished(key, job, f))
+
+    def _finished(self, key, job, future):
+        generation, _, _, _, callback, error_callback = job
+        try:
+            result, error = future.result(), None
+        except Exception as e:
+            result, error = None, e
+
+        with self._lock:
+            del self._running[key]
+            pending = self._pending.pop(key, None)
+            if pending:
+                self._start(key, pending)
+            if self._generations.get(key) == generation:
+                self._results.put((key, generation, callback, error_callback, result, error))
+            self._idle.notify_all()
+
+    def poll(self):
+        """在当前线程中分发所有已完成任务的回调，返回分发的数量"""
+        dispatched = 0
+        while True:
+            try:
+                key, generation, callback, error_callback, result, error = \
+                    self._results.get_nowait()
+            except queue.Empty:
+                return dispatched
+            # 结果入队后又有新任务提交，则该结果已过期
+            if not self.is_current(key, generation):
+                continue
+            dispatched += 1
+            if error is not None:
+                self._report_error(error, error_callback)
+            elif callback is not None:
+                callback(result)
+
+    def _report_error(self, error, error_callback):
+        handler = error_callback or self._on_error
+        if handler is not None:
+            handler(error)
+        else:
+            traceback.print_exception(type(error), error, error.__traceback__,
+                                      file=sys.stderr)
+
+    def wait(self, timeout=None):
+        """阻塞直到所有任务完成并分发回调，超时返回 False"""
+        with self._lock:
+            finished = self._idle.wait_for(
+                lambda: not self._running and not self._pending, timeout)
+        self.poll()
+        return finished
+
+    def attach_to_tk(self, root, interval=15):
+        """在 Tk 事件循环中定时分发回调"""
+        self._tk_root = root
+
+        def pump():
+            try:
+                self.poll()
+            finally:
+                self._tk_job = root.after(interval, pump)
+
+        pump()
+
+    def detach_from_tk(self):
+        if self._tk_root is not None and self._tk_job is not None:
+            self._tk_root.after_cancel(self._tk_job)
+        self._tk_root = self._tk_job = None
+
+    def shutdown(self, wait=False):
+        self.detach_from_tk()
+        self.cancel()
+        if self._own_executor:
+            self._executor.shutdown(wait=wait)
\ No newline at end of file